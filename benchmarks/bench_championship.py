@@ -0,0 +1,106 @@
+"""Time the standings of a championship grid: per-row cleaning and counting, vectorized, minimal
+
+A synthetic drivers' championship (`benchmarks.synthetic_pdfs`) with `--races` result columns is
+generated, and the cells of its grid are read once with find_tables. `--dirty` of its rows get the
+two extra characters that `utils.clean_rows` drops. Then the standings are built from these cells,
+`--repeat` times each way:
+
+- rows: as the parser did before: `df.apply(clean_row, axis=1)` and a Python loop counting the
+  wins, splitting every result cell,
+- vectorized: `utils.championship_standings`, a dataframe of the whole grid cleaned and counted
+  with string operations over the whole block,
+- minimal: `utils.championship_standings(..., minimal=True)`, only the pos, driver and total
+  columns are built, the wins are matched in the result cells as they are read.
+
+All three should give the same standings, which is checked.
+
+    python -m benchmarks.bench_championship [--races 30] [--drivers 20] [--dirty 5] [--repeat 50]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pymupdf as fitz
+import pandas as pd
+
+from benchmarks.synthetic_pdfs import drivers_championship
+from f1_data_downloader.parser.utils import championship_standings, table_cells
+
+
+def read_grid(file: Path) -> tuple[list[str], list[list[str]]]:
+    """The column names and the cells of every row of the grid, as `parse_driver_championship_page`"""
+    with fitz.open(file) as doc:
+        page = doc[0]
+        w = page.bound()[2]
+        header = page.search_for("DRIVER")[0]
+        b = page.search_for("Formula One World Championship Limited")[0].y0
+        words = [w for w in page.get_text("words") if header.y0 <= (w[1] + w[3]) / 2 <= header.y1]
+        header_words = [word[4].lower() for word in sorted(words, key=lambda word: word[0])]
+        first_row, rows = table_cells(page.find_tables(clip=fitz.Rect(0, header.y0, w, b))[0])
+    return ["pos"] + header_words, [first_row] + rows
+
+
+def clean_row(row):
+    if "-" in str(row['pos']):
+        row = row.map(lambda x: str(x)[2:])
+    return row
+
+
+def count_wins(row):
+    result = 0
+    for i in range(len(row)):
+        if len(row[i].split("\n")) < 2:
+            continue
+        else:
+            pos = row[i].split("\n")[1]
+            if pos == "1" or pos == "1F":
+                result += 1
+            else:
+                continue
+    return result
+
+
+def rows(columns: list[str], cells: list[list[str]]) -> pd.DataFrame:
+    """The standings of before: per-row cleaning and counting"""
+    df = pd.DataFrame(cells, columns=columns)
+    df = df.apply(clean_row, axis=1)
+    df['wins'] = [count_wins(row) for row in df.iloc[:, 3:].values]
+    return df[["pos", "driver", "total", "wins"]]
+
+
+def vectorized(columns: list[str], cells: list[list[str]]) -> pd.DataFrame:
+    return championship_standings(columns, cells, "driver")
+
+
+def minimal(columns: list[str], cells: list[list[str]]) -> pd.DataFrame:
+    return championship_standings(columns, cells, "driver", minimal=True)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Time the standings of a championship grid")
+    arg_parser.add_argument("--races", type=int, default=30)
+    arg_parser.add_argument("--drivers", type=int, default=20)
+    arg_parser.add_argument("--dirty", type=int, default=5, help="Rows with two characters to drop")
+    arg_parser.add_argument("--repeat", type=int, default=50)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file = Path(tmp) / "drivers_championship.pdf"
+        drivers_championship(file, args.drivers, args.races)
+        columns, cells = read_grid(file)
+    for row in cells[len(cells) - args.dirty:]:
+        row[:] = [f"- {cell}" for cell in row]
+
+    results = {}
+    for standings in [rows, vectorized, minimal]:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            df = standings(columns, cells)
+        results[standings.__name__] = df, (time.perf_counter() - start) / args.repeat
+    for name in ["vectorized", "minimal"]:
+        pd.testing.assert_frame_equal(results["rows"][0], results[name][0], check_dtype=False)
+
+    print(f"{len(cells)} rows x {len(columns)} columns, {df['wins'].sum()} wins")
+    for name, (_, seconds) in results.items():
+        print(f"{name:<12} {seconds * 1000:>7.2f}ms  {results['rows'][1] / seconds:>5.1f}x")
@@ -0,0 +1,113 @@
+"""Benchmark the event page scraper against the previous full page walk
+
+By default the event pages saved by the event cache (`.cache/events/<season>/<event>.html`) are
+used as fixtures. A synthetic page is generated if there is none.
+
+    python -m benchmarks.bench_event_page [page.html ...] [--repeat 20]
+"""
+from pathlib import Path
+import argparse
+import logging
+import time
+
+from bs4 import BeautifulSoup
+from bs4.element import Tag
+
+from f1_data_downloader.cache import DEFAULT_EVENT_CACHE_DIR
+from f1_data_downloader.event_page import EVENT_HEADERS, find_event_files
+
+
+def find_event_files_full_walk(html: str) -> dict[str, list[tuple[str, str]]]:
+    """The scraper as it was before: parse the whole page and search every descendant"""
+    soup = BeautifulSoup(html, "html.parser")
+    middle = soup.find("div", class_="content").find("div", class_="middle")
+
+    files_url = {header: [] for header in EVENT_HEADERS}
+    current_header = ""
+
+    for div in middle.find_all():
+        if not isinstance(div, Tag):
+            continue
+
+        b_tag = div.find("b")
+        strong_tag = div.find("strong")
+
+        if div.name == "p":
+            if b_tag is not None:
+                current_header = ""
+
+                for header in files_url:
+                    if header == b_tag.getText(strip=True):
+                        current_header = header
+                        break
+            elif strong_tag is not None:
+                current_header = ""
+
+                for header in files_url:
+                    if header == strong_tag.getText(strip=True):
+                        current_header = header
+                        break
+
+        classes = div.get("class")
+
+        if current_header == "":
+            continue
+
+        if classes is None or classes[0] != 'for-documents':
+            continue
+
+        a = div.find("a")
+        title_div = div.find("div", class_="title")
+        files_url[current_header].append((title_div.text, a.get("href")))
+
+    return files_url
+
+
+def synthetic_event_page(n_sections: int = 8, n_documents: int = 25) -> str:
+    """An event page shaped like the FIA one: heavy navigation and footer around the documents"""
+    nav = "".join(f'<li><a href="/nav/{i}">Menu entry {i}</a><ul>' +
+                  "".join(f'<li><a href="/nav/{i}/{j}">Sub entry {j}</a></li>' for j in range(20)) +
+                  "</ul></li>" for i in range(40))
+    sections = ["FREE PRACTICE 1", "FREE PRACTICE 2", "SPRINT QUALIFYING", "SPRINT RACE",
+                "FREE PRACTICE 3", "QUALIFYING", "RACE", "EVENT"]
+    middle = []
+    for s in range(n_sections):
+        middle.append(f"<p><strong>{sections[s % len(sections)]}</strong></p>")
+        for d in range(n_documents):
+            middle.append(
+                f'<div class="for-documents"><a href="https://www.fia.com/doc_{s}_{d}.pdf">'
+                f'<div class="published">Published on 01.01.25 12:00</div>'
+                f'<div class="title">Document {d}</div></a></div>')
+    footer = "".join(f'<div class="footer-col"><p>Footer text {i}</p><a href="/f/{i}">link</a></div>'
+                     for i in range(200))
+    return (f'<html><head><script>var x = 1;</script></head><body><nav><ul>{nav}</ul></nav>'
+            f'<div class="content"><div class="left">{nav}</div><div class="middle">{"".join(middle)}'
+            f'</div></div><footer>{footer}</footer></body></html>')
+
+
+def timeit(fn, html: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(html)
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+
+    arg_parser = argparse.ArgumentParser(description="Benchmark the event page scraper")
+    arg_parser.add_argument("pages", nargs="*", type=Path, help="Saved event pages")
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    pages = args.pages or sorted(DEFAULT_EVENT_CACHE_DIR.glob("*/*.html"))
+    fixtures = [(p.name, p.read_text()) for p in pages] or [("synthetic", synthetic_event_page())]
+
+    print(f"{'page':<40} {'size':>8} {'full walk':>10} {'scoped':>10} {'speedup':>8}")
+    for name, html in fixtures:
+        assert find_event_files(html) == find_event_files_full_walk(html), f"different output for {name}"
+
+        before = timeit(find_event_files_full_walk, html, args.repeat)
+        after = timeit(find_event_files, html, args.repeat)
+        print(f"{name:<40} {len(html) // 1024:>6}KB {before * 1000:>8.1f}ms {after * 1000:>8.1f}ms "
+              f"{before / after:>7.1f}x")
@@ -0,0 +1,118 @@
+"""Time the assembly of a history chart: one dataframe per lap table, or one per document
+
+A synthetic race history chart (`benchmarks.synthetic_pdfs`) of `--laps` laps is generated, and the
+cells of its lap tables are read once with find_tables. Then the parsed document is assembled from
+these cells, `--repeat` times each way:
+
+- frames: as the parser did before `parser.history`: a dataframe per lap table, the leader added as
+  its first row, the positions from its index, `pd.concat` of all of them, and the lapped cars fixed
+  with `apply`, `sort_values` and `shift`,
+- rows: as `parse_race_history_chart` does: the rows of every table in one list, one dataframe built
+  from them, the gaps decoded and the lapped cars fixed on integer sort keys
+  (`history.fix_lapped_laps`).
+
+Both should give the same dataframe, apart from the decoded gaps, which is checked.
+
+    python -m benchmarks.bench_history_chart [--laps 70] [--drivers 20] [--repeat 20]
+"""
+import argparse
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import pymupdf as fitz
+import pandas as pd
+
+from benchmarks.synthetic_pdfs import race_history_chart
+from f1_data_downloader.parser.history import COLUMNS, decode_gaps, fix_lapped_laps, lap_rows
+from f1_data_downloader.parser.utils import table_cells
+
+
+def read_tables(file: Path) -> list[tuple[int, list[str], list[list[str]]]]:
+    """The lap No., header and rows of every lap table of the chart, in the order of the document"""
+    tables = []
+    with fitz.open(file) as doc:
+        w, h = doc[0].bound()[2:]
+        for page in doc:
+            t = page.search_for('Race History Chart')[0].y1
+            b = page.search_for('TIME')[0].y1
+            headers = sorted(page.search_for('LAP', clip=(0, t, w, b)), key=lambda r: r.x0)
+            for i, lap in enumerate(headers):
+                right = headers[i + 1].x0 if i + 1 < len(headers) else (lap.x0 + w / 5) * 1.05
+                table = page.find_tables(clip=fitz.Rect(lap.x0, t, right, h), strategy='lines',
+                                         add_lines=[((lap.x0, 0), (lap.x0, h))])[0]
+                lap_no = int(page.get_text(clip=fitz.Rect(lap.x0, t, right, b)).split("\n")[0].split(' ')[1])
+                tables.append((lap_no, *table_cells(table)))
+    return tables
+
+
+def frames(tables: list[tuple[int, list[str], list[list[str]]]]) -> pd.DataFrame:
+    """The assembly of before: a dataframe per lap table"""
+    dfs = []
+    for lap_no, header, cells in tables:
+        temp = pd.DataFrame(cells, columns=header)
+        first_row = list(temp.columns)
+        if first_row[1] != 'PIT':
+            first_row[1] = ''
+        temp.columns = ['driver_no', 'gap', 'time']
+        temp.loc[-1] = first_row
+        temp.index = temp.index + 1
+        temp = temp.sort_index()
+        temp['lap'] = lap_no
+        temp = temp[temp['driver_no'] != '']
+        temp.reset_index(drop=False, names=['position'], inplace=True)
+        temp['position'] += 1
+        dfs.append(temp)
+    df = pd.concat(dfs, ignore_index=True)
+
+    df['lap'] = df['lap'] - df['gap'].apply(lambda x: int(re.findall(r'\d+', x)[0]) if 'LAP' in x
+                                                      else 0)
+    df.reset_index(drop=False, inplace=True)
+    df.sort_values(by=['driver_no', 'lap', 'index'], inplace=True)
+    df.loc[(df['driver_no'] == df['driver_no'].shift(-1)) & (df['lap'] == df['lap'].shift(-1)),
+           'lap'] -= 1
+    df.loc[(df['driver_no'] == df['driver_no'].shift(1)) & (df['lap'] == df['lap'].shift(1) + 2),
+           'lap'] -= 1
+    del df['index']
+    return df
+
+
+def rows(tables: list[tuple[int, list[str], list[list[str]]]]) -> pd.DataFrame:
+    """The assembly of `parse_race_history_chart`: one dataframe built from the rows of all tables"""
+    records = []
+    for lap_no, header, cells in tables:
+        cells = [header] + cells
+        if cells[0][1] != 'PIT':
+            cells[0] = [cells[0][0], '', cells[0][2]]
+        records.extend(lap_rows(cells, lap_no))
+    return fix_lapped_laps(decode_gaps(pd.DataFrame.from_records(records, columns=COLUMNS)))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Time the assembly of a history chart")
+    arg_parser.add_argument("--laps", type=int, default=70)
+    arg_parser.add_argument("--drivers", type=int, default=20)
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file = Path(tmp) / "race_history_chart.pdf"
+        race_history_chart(file, args.drivers, args.laps)
+        start = time.perf_counter()
+        tables = read_tables(file)
+        reading = time.perf_counter() - start
+
+    results = {}
+    for assemble in [frames, rows]:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            df = assemble(tables)
+        results[assemble.__name__] = df, (time.perf_counter() - start) / args.repeat
+    # The rows also have the decoded gaps
+    pd.testing.assert_frame_equal(results["frames"][0], results["rows"][0][COLUMNS])
+
+    print(f"{len(tables)} lap tables, {len(df)} rows, read by find_tables in {reading:.2f}s")
+    for name, (_, seconds) in results.items():
+        print(f"{name:<8} {seconds * 1000:>8.1f}ms")
+    print(f"speedup  {results['frames'][1] / results['rows'][1]:>8.1f}x")
@@ -0,0 +1,74 @@
+"""Compare the memory of the parsed documents before and after their compact dtypes
+
+Every document of a synthetic sprint weekend (`benchmarks.synthetic_pdfs`) is parsed once. Its
+memory (`DataFrame.memory_usage(deep=True)`) is compared with the same values in the dtypes the
+parsers returned before `parser.dtypes`: Python strings in object columns, and int64 for the few
+columns that were already numbers. The season holds `--rounds` weekends, `--sprints` of them with a
+sprint, the memory of every round adding up.
+
+    python -m benchmarks.bench_memory [--rounds 24] [--sprints 6] [--drivers 20] [--laps 57]
+"""
+import argparse
+import logging
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic_pdfs import generate_weekend
+from f1_data_downloader.registry import PARSERS
+
+# The columns the parsers returned as numbers before, every other column held Python strings
+BEFORE = {
+    "starting_grid": {"position": "float64", "car": "int64", "pit_lane": "bool"},
+    "race_lap_chart": {"lap": "int64", "position": "int64", "driver_no": "int64"},
+    "sprint_lap_chart": {"lap": "int64", "position": "int64", "driver_no": "int64"},
+    "drivers_championship": {"wins": "int64"},
+    "constructors_championship": {"wins": "int64"},
+    "race_history_chart": {"position": "int64", "lap": "int64"},
+    "sprint_history_chart": {"position": "int64", "lap": "int64"},
+}
+
+
+def before(name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """The parsed document in the dtypes of before"""
+    numbers = BEFORE.get(name, {})
+    columns = {}
+    for column in df.columns:
+        if column in numbers:
+            columns[column] = df[column].astype("float64" if df[column].hasnans else numbers[column])
+        else:
+            values = df[column].astype(object)
+            columns[column] = values.where(values.notna(), "").astype(str).astype(object)
+    return pd.DataFrame(columns)
+
+
+def memory(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Memory of the parsed documents of a season")
+    arg_parser.add_argument("--rounds", type=int, default=24)
+    arg_parser.add_argument("--sprints", type=int, default=6)
+    arg_parser.add_argument("--drivers", type=int, default=20)
+    arg_parser.add_argument("--laps", type=int, default=57)
+    args = arg_parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        generate_weekend(data_dir, args.drivers, args.laps)
+        frames = {name: parser(data_dir / f"{name}.pdf") for name, parser in PARSERS.items()}
+
+    totals = [0, 0]
+    print(f"{'document':<28} {'rows':>6} {'before':>10} {'after':>10} {'ratio':>6}")
+    for name, df in frames.items():
+        old, new = memory(before(name, df)), memory(df)
+        rounds = args.sprints if name.startswith("sprint_") else args.rounds
+        totals[0] += old * rounds
+        totals[1] += new * rounds
+        print(f"{name:<28} {len(df):>6} {old / 1024:>8.1f}KiB {new / 1024:>8.1f}KiB {old / new:>5.1f}x")
+
+    print(f"{'season':<28} {'':>6} {totals[0] / 2**20:>8.2f}MiB {totals[1] / 2**20:>8.2f}MiB "
+          f"{totals[0] / totals[1]:>5.1f}x  ({args.rounds} rounds, {args.sprints} sprints)")
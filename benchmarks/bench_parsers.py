@@ -0,0 +1,139 @@
+"""Time every parser and every csv stage on synthetic documents, against a stored baseline
+
+A weekend of documents is generated with `benchmarks.synthetic_pdfs` at the given scale, then:
+
+- every `parse_*` entry point (`registry.PARSERS`) parses its document,
+- every `create_*` stage of `tables` runs on a registry where the documents are already parsed, so
+  only the stage itself is timed.
+
+The best of `--repeat` runs is kept. With `--save`, the timings are written to the baseline file.
+Otherwise they are compared to it, and the suite fails when something is more than `--threshold`
+times slower than its baseline. Timings below `--min-seconds` are too noisy to be compared.
+
+    python -m benchmarks.bench_parsers [--save] [--threshold 1.25] [--drivers 20] [--laps 57]
+
+The baseline depends on the machine, record it on the machine the suite runs on.
+"""
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.synthetic_pdfs import generate_weekend
+from f1_data_downloader import tables
+from f1_data_downloader.output import TableWriter
+from f1_data_downloader.registry import PARSERS, DocumentRegistry
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+# The csv stages, run with a registry and a table writer
+STAGES: dict[str, Callable[[DocumentRegistry, TableWriter], None]] = {
+    "create_constructor_results": tables.create_constructor_results,
+    "create_constructor_standings": tables.create_constructor_standings,
+    "create_results": tables.create_results,
+    "create_driver_standings": tables.create_driver_standings,
+    "create_lap_times": lambda registry, writer: tables.create_lap_times(False, registry, writer),
+    "create_pit_stops": tables.create_pit_stops,
+    "create_qualifying": tables.create_qualifying,
+    "create_sprint_results": tables.create_sprint_results,
+    "create_sprint_classification": tables.create_sprint_classification,
+    "create_sprint_lap_times": tables.create_sprint_lap_times,
+}
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_suite(data_dir: Path, out_dir: Path, repeat: int) -> dict[str, float | None]:
+    """Time every parser and stage
+
+    :return: The seconds of every parser ("parse:<document>") and stage ("stage:<function>"), None
+             for a stage that fails
+    """
+    timings = {}
+    for name, parser in PARSERS.items():
+        timings[f"parse:{name}"] = best_of(lambda: parser(data_dir / f"{name}.pdf"), repeat)
+
+    registry = DocumentRegistry(data_dir)
+    writer = TableWriter(out_dir)
+    for name, stage in STAGES.items():
+        try:
+            stage(registry, writer)  # Also parses the documents of the stage, once
+        except Exception as e:
+            print(f"{name} failed: {type(e).__name__}: {e}", file=sys.stderr)
+            timings[f"stage:{name}"] = None
+            continue
+        timings[f"stage:{name}"] = best_of(lambda: stage(registry, writer), repeat)
+    return timings
+
+
+def compare(timings: dict[str, float | None], baseline: dict[str, float | None], threshold: float,
+            min_seconds: float) -> list[str]:
+    """Print the timings next to the baseline
+
+    :return: The benchmarks slower than `threshold` times their baseline
+    """
+    slower = []
+    print(f"{'benchmark':<40} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, seconds in timings.items():
+        before = baseline.get(name)
+        if seconds is None or before is None:
+            current = "failed" if seconds is None else f"{seconds * 1000:.1f}ms"
+            previous = "-" if before is None else f"{before * 1000:.1f}ms"
+            print(f"{name:<40} {previous:>10} {current:>10}")
+            continue
+
+        ratio = seconds / before
+        flag = ""
+        if ratio > threshold and max(seconds, before) >= min_seconds:
+            slower.append(name)
+            flag = "  SLOWER"
+        print(f"{name:<40} {before * 1000:>8.1f}ms {seconds * 1000:>8.1f}ms {ratio:>6.2f}x{flag}")
+    return slower
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the parsers and csv stages")
+    arg_parser.add_argument("--baseline", type=Path, default=BASELINE)
+    arg_parser.add_argument("--save", action="store_true", help="Write the timings to the baseline")
+    arg_parser.add_argument("--threshold", type=float, default=1.25,
+                            help="Fail when a benchmark takes more than this times its baseline")
+    arg_parser.add_argument("--min-seconds", type=float, default=0.005)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--drivers", type=int, default=20)
+    arg_parser.add_argument("--laps", type=int, default=57)
+    arg_parser.add_argument("--races", type=int, default=24)
+    arg_parser.add_argument("--sprint-laps", type=int, default=19)
+    args = arg_parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / "data"
+        generate_weekend(data_dir, args.drivers, args.laps, args.races, args.sprint_laps)
+        timings = run_suite(data_dir, Path(tmp), args.repeat)
+
+    if args.save:
+        args.baseline.write_text(json.dumps(timings, indent=2))
+        for name, seconds in timings.items():
+            print(f"{name:<40} {'failed' if seconds is None else f'{seconds * 1000:.1f}ms':>10}")
+        print(f"Baseline written to {args.baseline}")
+        sys.exit(0)
+
+    if not args.baseline.exists():
+        sys.exit(f"No baseline at {args.baseline}, record one with --save")
+
+    slower = compare(timings, json.loads(args.baseline.read_text()), args.threshold, args.min_seconds)
+    if slower:
+        print(f"{len(slower)} benchmark(s) more than {args.threshold}x slower than the baseline: "
+              f"{', '.join(slower)}")
+        sys.exit(1)
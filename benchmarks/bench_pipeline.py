@@ -0,0 +1,104 @@
+"""Compare downloading then parsing a round with parsing every document as it is downloaded
+
+The downloads are simulated: a weekend of synthetic documents (`benchmarks.synthetic_pdfs`) is
+copied to the data directory by `--workers` threads, each document taking its size divided by
+`--rate` KiB/s. Then the stages of a round (`tables.round_stages`) run:
+
+- sequential: after every download, as `main.py` does by default,
+- pipeline: while the documents arrive, as `main.py --pipeline` does (`scheduler.run_stages`).
+
+The documents are downloaded in the order of `main.download_files`, the slowest to parse first.
+The pipeline should take about max(network, parsing) instead of their sum. It cannot take less than
+the download and parse of the slowest document, the history chart, which is also the largest.
+
+    python -m benchmarks.bench_pipeline [--rate 256] [--workers 4] [--stage-processes N]
+"""
+import argparse
+import logging
+import queue
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+from benchmarks.synthetic_pdfs import generate_weekend
+from f1_data_downloader import main, tables
+from f1_data_downloader.output import TableWriter
+from f1_data_downloader.registry import DocumentRegistry
+from f1_data_downloader.scheduler import critical_path, run_stages
+
+
+def simulate_downloads(source_dir: Path, data_dir: Path, names: list[str], rate: float,
+                       workers: int) -> Iterator[str]:
+    """Copy the documents at `rate` KiB/s each, yielding their names as they land"""
+    landed = queue.SimpleQueue()
+
+    def download(name: str):
+        source = source_dir / f"{name}.pdf"
+        time.sleep(source.stat().st_size / 1024 / rate)
+        shutil.copyfile(source, data_dir / source.name)
+        landed.put(name)
+
+    data_dir.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for name in names:
+            executor.submit(download, name)
+        for _ in names:
+            yield landed.get()
+
+
+def documents(stages: dict) -> list[str]:
+    """The documents of the stages, in download order"""
+    return main.slowest_first(dict.fromkeys(document for _, needs in stages.values() for document in needs))
+
+
+def run(mode: str, source_dir: Path, tmp: Path, args: argparse.Namespace) -> tuple[float, list[dict]]:
+    stages = tables.round_stages(False)
+    names = documents(stages)
+    data_dir = tmp / mode / "data"
+    registry = DocumentRegistry(data_dir)
+    writer = TableWriter(tmp / mode)
+
+    start = time.perf_counter()
+    arrivals = simulate_downloads(source_dir, data_dir, names, args.rate, args.workers)
+    if mode == "sequential":
+        for _ in arrivals:
+            pass
+        arrivals = None
+    schedule = run_stages(stages, registry, writer, args.stage_processes, arrivals)
+    return time.perf_counter() - start, schedule
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the download -> parse pipeline")
+    arg_parser.add_argument("--rate", type=float, default=256, help="Simulated KiB/s of every download")
+    arg_parser.add_argument("--workers", type=int, default=main.DEFAULT_WORKERS)
+    arg_parser.add_argument("--stage-processes", type=int, default=None)
+    arg_parser.add_argument("--drivers", type=int, default=20)
+    arg_parser.add_argument("--laps", type=int, default=57)
+    args = arg_parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source_dir = tmp / "source"
+        generate_weekend(source_dir, args.drivers, args.laps)
+
+        # The time the downloads take alone
+        start = time.perf_counter()
+        names = documents(tables.round_stages(False))
+        for _ in simulate_downloads(source_dir, tmp / "network", names, args.rate, args.workers):
+            pass
+        network = time.perf_counter() - start
+
+        results = {mode: run(mode, source_dir, tmp, args) for mode in ["sequential", "pipeline"]}
+
+    _, schedule = results["sequential"]
+    parsing = sum(node["end"] - node["start"] for node in schedule)
+    print(f"network {network:.2f}s, parsing and stages {parsing:.2f}s of work")
+    for mode, (seconds, schedule) in results.items():
+        path, path_seconds = critical_path({node["name"]: node["end"] - node["start"] for node in schedule},
+                                           {node["name"]: node["needs"] for node in schedule})
+        print(f"{mode:<12} {seconds:>6.2f}s  critical path {' -> '.join(path)} ({path_seconds:.2f}s)")
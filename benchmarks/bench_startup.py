@@ -0,0 +1,83 @@
+"""Measure the cold start of every mode of `main.py` with `python -X importtime`
+
+Every mode imports what it needs in a fresh interpreter:
+
+- cli: `main.py` itself, what `--help` and the argument checks cost,
+- download: plus the event page scraper and the HTTP session (`main.py download`),
+- parse: plus the registry of parsers and the csv transforms (`main.py parse`),
+- round: both, as `main.py` downloading and parsing a grand prix.
+
+The import time of the modules imported by the mode is reported, with the heavy packages it
+loaded. The best of `--repeat` runs is kept, the OS cache makes the first one slower.
+
+    python -m benchmarks.bench_startup [--repeat 5] [--top 8]
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+MODES = {
+    "cli": ["f1_data_downloader.main"],
+    "download": ["f1_data_downloader.main", "f1_data_downloader.event_page", "requests.adapters"],
+    "parse": ["f1_data_downloader.main", "f1_data_downloader.registry", "f1_data_downloader.parser.times"],
+    "round": ["f1_data_downloader.main", "f1_data_downloader.event_page", "requests.adapters",
+              "f1_data_downloader.registry", "f1_data_downloader.parser.times"],
+}
+
+# The packages that dominate the start of a mode when they are imported
+HEAVY = ["pandas", "numpy", "pymupdf", "requests", "bs4", "pyarrow"]
+
+
+def import_times(modules: list[str]) -> dict[str, tuple[int, int]]:
+    """Import the modules in a fresh interpreter
+
+    :return: The (own, cumulative) microseconds of every module imported after the interpreter
+             started, by name
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        if name.strip() == "site":
+            # The interpreter start, and whatever the .pth files of the environment import
+            times.clear()
+            continue
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def measure(modules: list[str], repeat: int) -> dict[str, tuple[int, int]]:
+    """The import times of the run with the lowest total"""
+    runs = [import_times(modules) for _ in range(repeat)]
+    return min(runs, key=lambda times: sum(own for own, _ in times.values()))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Measure the import time of every mode of main.py")
+    arg_parser.add_argument("modes", nargs="*", default=list(MODES), help=f"Any of {', '.join(MODES)}")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--top", type=int, default=8, help="Show the slowest top level imports")
+    args = arg_parser.parse_args()
+    unknown = [mode for mode in args.modes if mode not in MODES]
+    if unknown:
+        arg_parser.error(f"unknown mode {', '.join(unknown)}")
+
+    for mode in args.modes:
+        times = measure(MODES[mode], args.repeat)
+        total = sum(own for own, _ in times.values())
+        heavy = [package for package in HEAVY if package in times]
+        print(f"{mode}: {total / 1000:.1f}ms, {len(times)} modules, heavy packages: "
+              f"{', '.join(heavy) or 'none'}")
+
+        # The cumulative time of a package includes its own imports, only the packages are listed
+        packages = {name: cumulative for name, (_, cumulative) in times.items() if "." not in name}
+        for name, cumulative in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {name:<30} {cumulative / 1000:>8.1f}ms")
@@ -0,0 +1,75 @@
+"""Compare the peak memory of writing a parsed document whole or page by page
+
+A synthetic race history chart (`benchmarks.synthetic_pdfs`) of `--laps` laps is written to a
+Parquet (or `--format`) file in two ways:
+
+- document: `parse_race_history_chart`, the whole dataframe built, then written at once,
+- batches: `iter_race_history_chart` written page by page with `output.write_batches`.
+
+The peak is the one of the memory allocations traced by `tracemalloc`, Python objects and numpy
+and pandas arrays, not the memory of PyMuPDF. Both files should hold the same rows, which is
+checked.
+
+    python -m benchmarks.bench_streaming [--laps 70] [--drivers 20] [--format parquet]
+"""
+import argparse
+import logging
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic_pdfs import race_history_chart
+from f1_data_downloader.output import CSV, FORMATS, PARQUET, write_batches
+from f1_data_downloader.parser.parse_race_history_chart import (iter_race_history_chart,
+                                                                parse_race_history_chart)
+
+
+def document(file: Path, out: Path, fmt: str) -> int:
+    df = parse_race_history_chart(str(file))
+    return write_batches([df], out, fmt)
+
+
+def batches(file: Path, out: Path, fmt: str) -> int:
+    return write_batches(iter_race_history_chart(str(file)), out, fmt)
+
+
+def read(out: Path, fmt: str) -> pd.DataFrame:
+    if fmt == CSV:
+        return pd.read_csv(out, dtype=str, keep_default_na=False)
+    return pd.read_parquet(out) if fmt == PARQUET else pd.read_feather(out)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Peak memory of writing a history chart")
+    arg_parser.add_argument("--laps", type=int, default=70)
+    arg_parser.add_argument("--drivers", type=int, default=20)
+    arg_parser.add_argument("--format", choices=FORMATS, default=PARQUET)
+    args = arg_parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        file = Path(tmp) / "race_history_chart.pdf"
+        race_history_chart(file, args.drivers, args.laps)
+
+        results = {}
+        for write in [document, batches]:
+            out = Path(tmp) / f"{write.__name__}.{args.format}"
+            tracemalloc.start()
+            start = time.perf_counter()
+            rows = write(file, out, args.format)
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[write.__name__] = read(out, args.format), rows, peak, seconds
+
+        # The batches hold the rows in the order of the document, the document sorted by car
+        columns = ["driver_no", "lap"]
+        expected = results["document"][0].sort_values(columns, kind="stable").reset_index(drop=True)
+        streamed = results["batches"][0].sort_values(columns, kind="stable").reset_index(drop=True)
+        pd.testing.assert_frame_equal(expected, streamed)
+
+    for name, (_, rows, peak, seconds) in results.items():
+        print(f"{name:<10} {rows:>6} rows  peak {peak / 1024:>8.1f}KiB  {seconds:>6.2f}s")
@@ -0,0 +1,73 @@
+"""Check the bucketing table engine against find_tables, and time both
+
+Every document supporting a table engine (`registry.TABLE_ENGINE`) found in the given directories
+is parsed with both engines. The dataframes should be the same, and no table should fall back to
+find_tables: a fallback is reported, as it means the bucketing did not validate that table.
+
+    python -m benchmarks.bench_table_engine [data_dir ...] [--repeat 3]
+
+The default directory is `data/`, where `main.py` downloads the documents of a grand prix.
+`python -m benchmarks.synthetic_pdfs DIR` generates a weekend of sample documents.
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from f1_data_downloader.parser.buckets import BUCKETS, FIND_TABLES
+from f1_data_downloader.registry import PARSERS, TABLE_ENGINE
+
+
+class FallbackCounter(logging.Handler):
+    """Count the warnings of the parsers falling back to find_tables"""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.count = 0
+
+    def emit(self, record: logging.LogRecord):
+        if "using find_tables" in record.getMessage():
+            self.count += 1
+
+
+def timeit(parser, file: Path, engine: str, repeat: int) -> tuple[pd.DataFrame, float]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        df = parser(file, engine=engine)
+    return df, (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare the table engines")
+    arg_parser.add_argument("data_dirs", type=Path, nargs="*", default=[Path("data")])
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    fallbacks = FallbackCounter()
+    logging.getLogger("f1_data_downloader").addHandler(fallbacks)
+
+    ok = True
+    print(f"{'document':<40} {FIND_TABLES:>11} {BUCKETS:>9} {'speedup':>8}  result")
+    for data_dir in args.data_dirs:
+        for name in sorted(TABLE_ENGINE):
+            file = data_dir / f"{name}.pdf"
+            if not file.exists():
+                continue
+
+            expected, before = timeit(PARSERS[name], file, FIND_TABLES, args.repeat)
+            fallbacks.count = 0
+            df, after = timeit(PARSERS[name], file, BUCKETS, args.repeat)
+
+            try:
+                pd.testing.assert_frame_equal(df, expected)
+                result = "same" if fallbacks.count == 0 else f"same, {fallbacks.count // args.repeat} fallback(s)"
+            except AssertionError as e:
+                ok = False
+                result = f"DIFFERENT: {e}"
+            print(f"{str(file):<40} {before * 1000:>9.1f}ms {after * 1000:>7.1f}ms {before / after:>7.1f}x  {result}")
+
+    if not ok:
+        sys.exit(1)
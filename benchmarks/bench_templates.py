@@ -0,0 +1,66 @@
+"""Time the parsers with and without the layout templates (`parser.templates`)
+
+The documents whose layout is found by searching their headers are generated for a synthetic sprint
+weekend (`benchmarks.synthetic_pdfs`) and parsed `--repeat` times each way:
+
+- detect: without templates, the layout of every page is detected,
+- cold: with an empty templates file, the layout of the first page of every layout is detected and
+  kept, the next pages reuse it,
+- warm: with the templates file written by the cold parse, no layout is detected.
+
+The three should give the same dataframes, which is checked.
+
+    python -m benchmarks.bench_templates [--drivers 20] [--laps 57] [--repeat 5]
+"""
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic_pdfs import generate_weekend
+from f1_data_downloader.parser import templates as layout_templates
+from f1_data_downloader.registry import PARSERS, TEMPLATES
+
+
+def parse_all(data_dir: Path, templates: Path | None) -> dict[str, pd.DataFrame]:
+    return {name: PARSERS[name](data_dir / f"{name}.pdf", templates=templates and str(templates))
+            for name in sorted(TEMPLATES)}
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Time the parsers with the layout templates")
+    arg_parser.add_argument("--drivers", type=int, default=20)
+    arg_parser.add_argument("--laps", type=int, default=57)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        generate_weekend(data_dir, args.drivers, args.laps)
+        file = data_dir / "templates.json"
+
+        results = {}
+        for mode in ["detect", "cold", "warm"]:
+            seconds = 0.0
+            for _ in range(args.repeat):
+                if mode == "cold":
+                    file.unlink(missing_ok=True)
+                # A new process would read the file again
+                layout_templates._loaded.clear()
+                start = time.perf_counter()
+                frames = parse_all(data_dir, None if mode == "detect" else file)
+                seconds += time.perf_counter() - start
+            results[mode] = frames, seconds / args.repeat
+            if mode != "detect":
+                cache = layout_templates.load_templates(file)
+                print(f"{mode:<8} {cache.hits} hits, {cache.misses} misses, {len(cache.templates)} templates")
+
+    for mode in ["cold", "warm"]:
+        for name, df in results[mode][0].items():
+            pd.testing.assert_frame_equal(results["detect"][0][name], df)
+    for mode, (_, seconds) in results.items():
+        print(f"{mode:<8} {seconds * 1000:>8.1f}ms  {results['detect'][1] / seconds:>5.2f}x")
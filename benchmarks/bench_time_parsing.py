@@ -0,0 +1,77 @@
+"""Benchmark the time parsing of `parser.times` against the previous per row conversion
+
+The fixture is a full season of lap times: 24 rounds of 20 cars over 60 laps, with a few pit
+laps, hour long times and invalid values mixed in.
+
+    python -m benchmarks.bench_time_parsing [--rounds 24] [--repeat 5]
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from f1_data_downloader.parser.times import to_ms
+
+
+def to_ms_safe(t: str):
+    """The conversion as it was before, applied to every row with `Series.apply`"""
+    if pd.isna(t) or t == "" or t is None:
+        return None
+    t_str = str(t).strip()
+    # If it has 0 colon, assume SS.sss    → prepend 0:0:
+    # If it has 1 colon, assume MM:SS.sss → prepend 0:
+    if t_str.count(":") == 0:
+        t_str = "0:0:" + t_str
+    elif t_str.count(":") == 1:
+        t_str = "0:" + t_str
+
+    td = pd.to_timedelta(t_str, errors="coerce")
+    return None if pd.isna(td) else int(td.total_seconds()) * 1000
+
+
+def season_lap_times(n_rounds: int = 24, n_drivers: int = 20, n_laps: int = 60,
+                     seed: int = 0) -> pd.Series:
+    rng = random.Random(seed)
+    times = []
+    for _ in range(n_rounds * n_drivers * n_laps):
+        r = rng.random()
+        if r < 0.001:
+            times.append(rng.choice(["", None, "DNF"]))
+        elif r < 0.002:
+            times.append(f"1:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}.{rng.randint(0, 999):03d}")
+        elif r < 0.03:
+            times.append(f"{rng.uniform(20, 30):.3f}")
+        else:
+            ms = rng.randint(80_000, 130_000)
+            times.append(f"{ms // 60_000}:{ms % 60_000 // 1000:02d}.{ms % 1000:03d}")
+    return pd.Series(times, name="time")
+
+
+def timeit(fn, times: pd.Series, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(times)
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the time parsing")
+    arg_parser.add_argument("--rounds", type=int, default=24)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    times = season_lap_times(args.rounds)
+
+    def per_row(s: pd.Series) -> pd.Series:
+        return s.apply(to_ms_safe).astype("Int64")
+
+    # The previous conversion dropped the milliseconds, apart from that both should agree
+    before, after = per_row(times), to_ms(times)
+    assert (after // 1000 * 1000).equals(before), "different output"
+    assert (after % 1000 != 0).any(), "milliseconds are lost"
+
+    before = timeit(per_row, times, args.repeat)
+    after = timeit(to_ms, times, args.repeat)
+    print(f"{'rows':>8} {'per row':>10} {'vectorized':>11} {'speedup':>8}")
+    print(f"{len(times):>8} {before * 1000:>8.1f}ms {after * 1000:>9.1f}ms {before / after:>7.1f}x")
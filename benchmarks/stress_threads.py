@@ -0,0 +1,111 @@
+"""Parse documents of different page sizes at the same time, and check the results
+
+The parsers keep the geometry of their document on a parser object (`parser.pages.DocumentParser`),
+so several documents can be parsed at the same time in one process. This parses every document of
+`--sizes` synthetic weekends (`benchmarks.synthetic_pdfs`), each weekend with its own laps and seed
+and its pages scaled to its own size:
+
+- interleaved: with the page by page iterators (`registry.ITERATORS`), `--repeat` times each, in a
+  random order, drained by `--threads` threads sharing a layout templates file,
+- then every weekend with `scheduler.run_stages(..., threads=True)`, as `main.py --stage-threads`.
+
+Every dataframe must be the same as the one of the document parsed alone, before. The calls to
+PyMuPDF take turns (`parser.page_text.FITZ_LOCK`), the dataframes are built at the same time.
+
+    python -m benchmarks.stress_threads [--threads 4] [--sizes 0.8,1.0,1.3] [--repeat 3]
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic_pdfs import generate_weekend, scale_document
+from f1_data_downloader.registry import ITERATORS, PARSERS, TEMPLATES, DocumentRegistry
+from f1_data_downloader.scheduler import run_stages
+
+# The documents whose batches come in another order than their dataframe, see `rows`
+HISTORY_CHARTS = {"race_history_chart", "sprint_history_chart"}
+
+
+def rows(df: pd.DataFrame) -> pd.DataFrame:
+    """The rows in the order of their values: the batches of a history chart come in the order of
+    the document, and its dataframe sorted by car"""
+    df = df.astype({column: str for column in df.select_dtypes("category").columns})
+    return df.sort_values(list(df.columns), kind="stable").reset_index(drop=True)
+
+
+def same(expected: pd.DataFrame, df: pd.DataFrame, sort: bool = False) -> bool:
+    """Whether the dataframes are equal, index and dtypes included. With `sort`, their `rows` are
+    compared instead, and the categories of the batches are those of their page"""
+    try:
+        if sort:
+            pd.testing.assert_frame_equal(rows(expected), rows(df), check_dtype=False)
+        else:
+            pd.testing.assert_frame_equal(expected, df)
+    except AssertionError:
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Parse documents of different sizes at the same time")
+    arg_parser.add_argument("--threads", type=int, default=4)
+    arg_parser.add_argument("--sizes", default="0.8,1.0,1.3", help="The scale of the pages of every weekend")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        weekends = []
+        for i, scale in enumerate(float(size) for size in args.sizes.split(",")):
+            data_dir = tmp / f"weekend_{i}"
+            for name, path in generate_weekend(tmp / f"generated_{i}", n_laps=50 + 3 * i, seed=i).items():
+                data_dir.mkdir(exist_ok=True)
+                scale_document(path, data_dir / path.name, scale)
+            weekends.append(data_dir)
+
+        # Each document alone
+        start = time.perf_counter()
+        expected = {(data_dir, name): PARSERS[name](data_dir / f"{name}.pdf")
+                    for data_dir in weekends for name in PARSERS}
+        alone = time.perf_counter() - start
+
+        templates = tmp / "templates.json"
+        jobs = [(data_dir, name) for data_dir in weekends for name in ITERATORS] * args.repeat
+        rng.shuffle(jobs)
+
+        def drain(data_dir: Path, name: str) -> pd.DataFrame:
+            kwargs = {"templates": str(templates)} if name in TEMPLATES else {}
+            return pd.concat(list(ITERATORS[name](data_dir / f"{name}.pdf", **kwargs)), ignore_index=True)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.threads) as executor:
+            results = list(executor.map(drain, *zip(*jobs)))
+        interleaved = time.perf_counter() - start
+        failed = [(data_dir.name, name, "interleaved") for (data_dir, name), df in zip(jobs, results)
+                  if not same(expected[data_dir, name], df, sort=name in HISTORY_CHARTS)]
+
+        # The stages of every weekend, parsed in threads
+        stages = {name: (lambda registry, writer: None, [name]) for name in PARSERS}
+        for data_dir in weekends:
+            registry = DocumentRegistry(data_dir, templates=templates)
+            run_stages(stages, registry, None, args.threads, threads=True)
+            failed += [(data_dir.name, name, "stages") for name in PARSERS
+                       if not same(expected[data_dir, name], registry.frames[name])]
+
+    print(f"{len(expected)} documents of {len(weekends)} page sizes parsed alone in {alone:.1f}s, "
+          f"{len(jobs)} interleaved in {interleaved:.1f}s")
+    for failure in failed:
+        print("DIFFERENT", *failure)
+    if failed:
+        sys.exit(1)
+    print("OK")
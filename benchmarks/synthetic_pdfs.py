@@ -0,0 +1,541 @@
+"""Generate FIA-style timing PDFs with pymupdf
+
+The documents reproduce the layout features the parsers rely on (titles, header words, ruling
+lines, shaded rows, footers) with made-up but consistent data, so the parsers can be exercised and
+timed without downloading anything from the FIA. The scale (number of drivers, laps, races) is
+configurable.
+
+    python -m benchmarks.synthetic_pdfs OUTPUT_DIR [--drivers 20] [--laps 57] [--races 24]
+"""
+from bisect import bisect_right
+from itertools import accumulate
+from pathlib import Path
+import argparse
+import random
+
+import pymupdf as fitz
+
+FONT = "helv"
+BOLD = "hebo"
+SIZE = 6.5
+
+LINE_COLOR = (0.6, 0.6, 0.6)
+SHADE_COLOR = (0.9, 0.9, 0.9)
+
+FOOTER = "Formula One World Championship Limited"
+
+# (number, driver, first name, nationality, entrant)
+DRIVERS = [
+    (4, "L. NORRIS", "Lando", "GBR", "McLaren Formula 1 Team"),
+    (81, "O. PIASTRI", "Oscar", "AUS", "McLaren Formula 1 Team"),
+    (1, "M. VERSTAPPEN", "Max", "NED", "Oracle Red Bull Racing"),
+    (22, "Y. TSUNODA", "Yuki", "JPN", "Oracle Red Bull Racing"),
+    (63, "G. RUSSELL", "George", "GBR", "Mercedes-AMG PETRONAS F1 Team"),
+    (12, "K. ANTONELLI", "Kimi", "ITA", "Mercedes-AMG PETRONAS F1 Team"),
+    (16, "C. LECLERC", "Charles", "MON", "Scuderia Ferrari HP"),
+    (44, "L. HAMILTON", "Lewis", "GBR", "Scuderia Ferrari HP"),
+    (14, "F. ALONSO", "Fernando", "ESP", "Aston Martin Aramco F1 Team"),
+    (18, "L. STROLL", "Lance", "CAN", "Aston Martin Aramco F1 Team"),
+    (23, "A. ALBON", "Alexander", "THA", "Atlassian Williams Racing"),
+    (55, "C. SAINZ", "Carlos", "ESP", "Atlassian Williams Racing"),
+    (10, "P. GASLY", "Pierre", "FRA", "BWT Alpine F1 Team"),
+    (43, "F. COLAPINTO", "Franco", "ARG", "BWT Alpine F1 Team"),
+    (31, "E. OCON", "Esteban", "FRA", "MoneyGram Haas F1 Team"),
+    (87, "O. BEARMAN", "Oliver", "GBR", "MoneyGram Haas F1 Team"),
+    (6, "I. HADJAR", "Isack", "FRA", "Visa Cash App Racing Bulls F1 Team"),
+    (30, "L. LAWSON", "Liam", "NZL", "Visa Cash App Racing Bulls F1 Team"),
+    (27, "N. HULKENBERG", "Nico", "GER", "Kick Sauber F1 Team"),
+    (5, "G. BORTOLETO", "Gabriel", "BRA", "Kick Sauber F1 Team"),
+]
+
+RACES = ["AUS", "CHN", "JPN", "BRN", "KSA", "MIA", "EMI", "MON", "ESP", "CAN", "AUT", "GBR",
+         "BEL", "HUN", "NED", "ITA", "AZE", "SIN", "USA", "MXC", "SAP", "LVG", "QAT", "ABU"]
+
+POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+
+
+def drivers(n: int) -> list[tuple[int, str, str, str, str]]:
+    """The first `n` drivers, made-up ones are added after the real grid"""
+    result = list(DRIVERS[:n])
+    for i in range(len(result), n):
+        no, _, _, nat, entrant = DRIVERS[i % len(DRIVERS)]
+        result.append((100 + i, f"X. DRIVER{chr(65 + i % 26)}", "Extra", nat, entrant))
+    return result
+
+
+def text(page: fitz.Page, x: float, y: float, s: str, size: float = SIZE, bold: bool = False):
+    page.insert_text((x, y), s, fontsize=size, fontname=BOLD if bold else FONT)
+
+
+def text_width(s: str, size: float = SIZE, bold: bool = False) -> float:
+    return fitz.get_text_length(s, fontname=BOLD if bold else FONT, fontsize=size)
+
+
+def hline(page: fitz.Page, x0: float, x1: float, y: float):
+    page.draw_line((x0, y), (x1, y), color=LINE_COLOR, width=0.3)
+
+
+def vline(page: fitz.Page, x: float, y0: float, y1: float):
+    page.draw_line((x, y0), (x, y1), color=LINE_COLOR, width=0.3)
+
+
+def shade(page: fitz.Page, x0: float, y0: float, x1: float, y1: float):
+    page.draw_rect(fitz.Rect(x0, y0, x1, y1), color=None, fill=SHADE_COLOR)
+
+
+def lap_time(rng: random.Random, base: float = 92.0) -> str:
+    t = base + rng.random() * 3
+    return f"{int(t // 60)}:{t % 60:06.3f}"
+
+
+def race_time(ms: int) -> str:
+    h, rest = divmod(ms, 3_600_000)
+    m, rest = divmod(rest, 60_000)
+    return f"{h}:{m:02d}:{rest / 1000:06.3f}"
+
+
+def header(page: fitz.Page, title: str, width: float):
+    text(page, 20, 30, "FORMULA 1 SYNTHETIC GRAND PRIX", 9, True)
+    text(page, 20, 48, title, 12, True)
+
+
+def footer(page: fitz.Page, height: float):
+    text(page, 20, height - 20, f"{FOOTER} - Synthetic document for benchmarks", 5)
+
+
+def race_final_classification(filepath: Path, n_drivers: int = 20, n_laps: int = 57, seed: int = 0,
+                              title: str = "Race Final Classification"):
+    """One page final classification, with header lines used to place the column separators"""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    w, h = 595, 842
+    page = doc.new_page(width=w, height=h)
+    header(page, title, w)
+
+    # (header, x of the header, x of the values)
+    cols = [("POS", 20, 20), ("NO", 40, 41), ("DRIVER", 58, 58), ("NAT", 135, 135),
+            ("ENTRANT", 160, 152), ("LAPS", 300, 302), ("TIME", 335, 320), ("GAP", 385, 373),
+            ("INT", 425, 415), ("KM/H", 462, 455), ("FASTEST", 500, 502), ("ON", 535, 537),
+            ("PTS", 560, 562)]
+    # The ruled area ends at the right of "PTS"
+    right = 574
+    y = 80
+    hline(page, 15, right, y - 9)
+    for name, x, _ in cols:
+        text(page, x, y, name, bold=True)
+
+    rh = 12
+    y0 = y + 4
+    total = 5_400_000
+    for i, (no, driver, _, nat, entrant) in enumerate(drivers(n_drivers)):
+        top = y0 + i * rh
+        if i % 2 == 0:
+            shade(page, 15, top, right, top + rh)
+        hline(page, 15, right, top)
+
+        gap = rng.randint(500, 3000) * (i + 1)
+        dnf = i == n_drivers - 1 and n_drivers > 3
+        values = [
+            str(i + 1), str(no), driver, nat, entrant,
+            str(n_laps if not dnf else n_laps // 2),
+            race_time(total) if i == 0 else race_time(total + gap) if not dnf else "",
+            "" if i == 0 else "DNF" if dnf else f"{gap / 1000:.3f}",
+            "" if i == 0 or dnf else f"{rng.randint(100, 3000) / 1000:.3f}",
+            f"{200 + rng.random() * 20:.3f}",
+            lap_time(rng, 86), str(rng.randint(2, n_laps)),
+            str(POINTS[i]) if i < len(POINTS) else "",
+        ]
+        for (_, _, x), value in zip(cols, values):
+            text(page, x, top + 9, value)
+    hline(page, 15, right, y0 + n_drivers * rh)
+
+    text(page, 20, y0 + n_drivers * rh + 25, "FASTEST LAP", 8, True)
+    footer(page, h)
+    doc.save(filepath)
+
+
+def sprint_final_classification(filepath: Path, n_drivers: int = 20, n_laps: int = 19, seed: int = 0):
+    race_final_classification(filepath, n_drivers, n_laps, seed, title="Sprint Final Classification")
+
+
+def quali_final_classification(filepath: Path, n_drivers: int = 20, seed: int = 0):
+    """One page qualifying classification, Q2 and Q3 are only filled for the drivers through"""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    w, h = 595, 842
+    page = doc.new_page(width=w, height=h)
+    header(page, "Qualifying Session Final Classification", w)
+
+    cols = [("", 20), ("NO", 32), ("DRIVER", 48), ("NAT", 115), ("ENTRANT", 140), ("Q1", 290),
+            ("LAPS", 320), ("TIME", 340), ("Q2", 375), ("LAPS", 405), ("TIME", 425), ("Q3", 460),
+            ("LAPS", 490), ("TIME", 510)]
+    y = 80
+    for name, x in cols:
+        text(page, x, y, name, bold=True)
+
+    rh = 12
+    y0 = y + 6
+    for i, (no, driver, _, nat, entrant) in enumerate(drivers(n_drivers)):
+        top = y0 + i * rh
+        if i % 2 == 0:
+            shade(page, 15, top, w - 15, top + rh)
+        hline(page, 15, w - 15, top)
+
+        values = [str(i + 1), str(no), driver, nat, entrant]
+        for q, through in enumerate([n_drivers, 15, 10]):
+            if i < through:
+                values += [lap_time(rng, 75 - q * 0.3), str(rng.randint(3, 9)),
+                           f"{16 + q}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"]
+            else:
+                values += ["", "", ""]
+        for (_, x), value in zip(cols, values):
+            text(page, x, top + 9, value, SIZE - 1 if len(value) > 20 else SIZE)
+        for x in [15, 30, 46, 113, 138, 288, 318, 338, 373, 403, 423, 458, 488, 508, w - 15]:
+            vline(page, x, top, top + rh)
+    bottom = y0 + n_drivers * rh
+    hline(page, 15, w - 15, bottom)
+
+    text(page, 20, bottom + 25, "POLE POSITION LAP", 8, True)
+    footer(page, h)
+    doc.save(filepath)
+
+
+def starting_grid(filepath: Path, n_drivers: int = 20, seed: int = 0):
+    """Two columns of grid slots, the last driver starts from the pit lane"""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    w, h = 595, 842
+    page = doc.new_page(width=w, height=h)
+    header(page, "Final Starting Grid", w)
+
+    grid = drivers(n_drivers)
+    for i, (no, driver, first_name, _, _) in enumerate(grid[:-1]):
+        # Two columns, the slots are far enough apart to be separate text blocks
+        x = 60 if i % 2 == 0 else 320
+        y = 90 + (i // 2) * 60
+        surname = driver.split(" ", 1)[1]
+        page.insert_text((x, y), f"{i + 1}\n{no} {first_name} {surname}\n{lap_time(rng, 80)}",
+                         fontsize=SIZE + 1, fontname=FONT)
+
+    no, driver, first_name, _, _ = grid[-1]
+    y = 90 + ((n_drivers - 1) // 2) * 60 + 40
+    text(page, 60, y, "THE FOLLOWING DRIVER WILL START FROM THE PIT LANE", bold=True)
+    text(page, 60, y + 30, f"{no} {first_name} {driver.split(' ', 1)[1]}", SIZE + 1)
+    footer(page, h)
+    doc.save(filepath)
+
+
+def race_history_chart(filepath: Path, n_drivers: int = 20, n_laps: int = 57, seed: int = 0,
+                       title: str = "Race History Chart", lap_word: str = "LAP",
+                       ruled_header: bool = False):
+    """Five laps per page, each lap is a [driver No., gap, time] table below a "LAP x" header
+
+    In race charts the header row sits above the ruled area and the first row is shaded, so the
+    leader's row is the top row of the table. In sprint charts the header row is ruled as well.
+
+    The table of a lap lists the cars crossing the line after the leader completed it. A lapped car
+    crossing the line for its lap j after the leader completed lap j + k is listed in the table of
+    lap j + k with a "k LAP" gap, below the cars on the lead lap, so it is missing from the table
+    of the lap it was lapped on, and from the last tables. As in the FIA documents, "PIT" hides the
+    laps down.
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    w, h = 842, 595
+    grid = drivers(n_drivers)
+    laps_per_page = 5
+
+    # Lap times of each driver, every driver pits once in the middle
+    pace = {no: 92 + i * 0.08 for i, (no, *_) in enumerate(grid)}
+    # The last driver loses more than one and a half laps over the race, so it gets lapped whatever the
+    # number of laps
+    pace[grid[-1][0]] += 1.5 * 92 / n_laps
+    pit_lap = {no: rng.randint(10, max(11, n_laps - 5)) for no, *_ in grid}
+    times = {no: [] for no, *_ in grid}
+    for lap in range(1, n_laps + 1):
+        for no, *_ in grid:
+            times[no].append(pace[no] + rng.random() * 0.8 + (20 if lap == pit_lap[no] else 0))
+
+    # The time every driver crosses the line, and the time the leader completes every lap
+    crossings = {no: list(accumulate(t)) for no, t in times.items()}
+    leader = [min(crossings[no][i] for no in crossings) for i in range(n_laps)]
+    tables: dict[int, list] = {lap: [] for lap in range(1, n_laps + 1)}
+    for no, crossed in crossings.items():
+        for i, at in enumerate(crossed):
+            lap = i + 1
+            # The leader laps completed when this car crossed the line
+            down = bisect_right(leader, at) - lap
+            if lap == pit_lap[no]:
+                gap_text = "PIT"
+            elif down > 0:
+                gap_text = f"{down} LAP" if down == 1 else f"{down} LAPS"
+            else:
+                gap_text = f"{at - leader[i]:.3f}" if at > leader[i] else ""
+            tables[lap + down].append((down, at, no, gap_text, times[no][i]))
+            # The race is over once the leader completed the last lap
+            if at >= leader[-1]:
+                break
+
+    for first in range(1, n_laps + 1, laps_per_page):
+        page = doc.new_page(width=w, height=h)
+        header(page, title, w)
+
+        laps = range(first, min(first + laps_per_page, n_laps + 1))
+        table_w = w / laps_per_page
+
+        for j, lap in enumerate(laps):
+            x = 20 + j * table_w
+            text(page, x, 80, f"{lap_word} {lap}", bold=True)
+            text(page, x + 28, 80, "GAP", bold=True)
+            text(page, x + 75, 80, "TIME", bold=True)
+
+        for j, lap in enumerate(laps):
+            x = 20 + j * table_w
+            # In race order: the lapped cars last
+            rows = sorted(tables[lap])
+
+            rh = 11
+            y0 = 86
+            if ruled_header:
+                hline(page, x, x + 120, 72)
+            for i, (_, _, no, gap_text, t) in enumerate(rows):
+                top = y0 + i * rh
+                if i == 0 and not ruled_header:
+                    shade(page, x, top, x + 120, top + rh)
+                hline(page, x, x + 120, top)
+                text(page, x + 3, top + 8, str(no))
+                text(page, x + 28, top + 8, gap_text)
+                text(page, x + 75, top + 8, f"{int(t // 60)}:{t % 60:06.3f}")
+            bottom = y0 + len(rows) * rh
+            hline(page, x, x + 120, bottom)
+            for vx in [x + 25, x + 72, x + 120]:
+                vline(page, vx, 72 if ruled_header else y0, bottom)
+
+        footer(page, h)
+    doc.save(filepath)
+
+
+def sprint_history_chart(filepath: Path, n_drivers: int = 20, n_laps: int = 19, seed: int = 0):
+    race_history_chart(filepath, n_drivers, n_laps, seed, title="Sprint History Chart", lap_word="Lap",
+                       ruled_header=True)
+
+
+def race_lap_chart(filepath: Path, n_drivers: int = 20, n_laps: int = 57, seed: int = 0,
+                   title: str = "Race Lap Chart", trailer: bool = True):
+    """Positions of the cars at the end of each lap, up to 30 laps per page
+
+    The last lap of each page is repeated at the top of the next one: the parser drops the last
+    row of every page.
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    w, h = 842, 595
+    grid = [no for no, *_ in drivers(n_drivers)]
+    laps_per_page = 30
+    col_w = (w - 80) / max(n_drivers, 1)
+
+    order = list(grid)
+    orders = [list(order)]
+    for _ in range(n_laps):
+        i = rng.randrange(max(n_drivers - 1, 1))
+        order[i], order[i + 1] = order[i + 1], order[i]
+        orders.append(list(order))
+
+    first = 1
+    while first <= n_laps:
+        page = doc.new_page(width=w, height=h)
+        header(page, title, w)
+
+        y = 75
+        text(page, 20, y, "POS", bold=True)
+        for p in range(n_drivers):
+            text(page, 60 + p * col_w, y, str(p + 1), bold=True)
+
+        rows = [("GRID", orders[0])] if first == 1 else []
+        last = min(first + laps_per_page, n_laps + 1)
+        rows += [(f"LAP {lap}", orders[lap]) for lap in range(first, last)]
+        for i, (label, positions) in enumerate(rows):
+            y += 12
+            # Tightly kerned like in the FIA documents: "LAP" and the lap No. are one word
+            text(page, 20, y, label.replace(" ", "\u2009"))
+            for p, no in enumerate(positions):
+                text(page, 60 + p * col_w, y, str(no))
+
+        if trailer:
+            # The race parser stops at the last but one "LAP" of the page
+            text(page, 20, y + 25, "LAP CHART", 5)
+        footer(page, h)
+        first = last - 1 if last <= n_laps else last
+    doc.save(filepath)
+
+
+def sprint_lap_chart(filepath: Path, n_drivers: int = 20, n_laps: int = 19, seed: int = 0):
+    # The sprint parser stops at the footer
+    race_lap_chart(filepath, n_drivers, n_laps, seed, title="Sprint Lap Chart", trailer=False)
+
+
+def race_pit_stops(filepath: Path, n_drivers: int = 20, n_laps: int = 57, seed: int = 0):
+    """One page pit stop summary, one or two stops per driver in lap order"""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    w, h = 595, 842
+    page = doc.new_page(width=w, height=h)
+    header(page, "Pit Stop Summary", w)
+
+    stops = []
+    for no, driver, _, _, entrant in drivers(n_drivers):
+        total = 0.0
+        laps = sorted(rng.sample(range(2, max(n_laps, 4)), rng.randint(1, 2)))
+        for k, lap in enumerate(laps):
+            duration = 21 + rng.random() * 4
+            total += duration
+            stops.append((lap, no, driver, entrant, k + 1, duration, total))
+    stops.sort()
+
+    cols = [("NO", 20), ("DRIVER", 45), ("ENTRANT", 120), ("LAP", 280), ("TIME OF DAY", 310),
+            ("STOP", 380), ("DURATION", 420), ("TOTAL TIME", 480)]
+    y = 80
+    for name, x in cols:
+        text(page, x, y, name, bold=True)
+
+    rh = 12
+    y0 = y + 6
+    for i, (lap, no, driver, entrant, stop, duration, total) in enumerate(stops):
+        top = y0 + i * rh
+        if i % 2 == 0:
+            shade(page, 15, top, w - 15, top + rh)
+        hline(page, 15, w - 15, top)
+        values = [str(no), driver, entrant, str(lap),
+                  f"15:{lap // 2 + 3:02d}:{rng.randint(10, 59):02d}", str(stop),
+                  f"{duration:.3f}", f"{total:.3f}"]
+        for (_, x), value in zip(cols, values):
+            text(page, x, top + 9, value)
+        for _, x in cols[1:]:
+            vline(page, x - 3, top, top + rh)
+    hline(page, 15, w - 15, y0 + len(stops) * rh)
+    footer(page, h)
+    doc.save(filepath)
+
+
+def championship(filepath: Path, n_rows: int, n_races: int, seed: int, entrant: bool):
+    rng = random.Random(seed)
+    doc = fitz.open()
+    w, h = 842, 595
+    page = doc.new_page(width=w, height=h)
+    # The parsers look for the first "DRIVER"/"ENTRANT" of the page, keep them out of the title
+    header(page, "Teams Championship Standings" if entrant else "Championship Standings", w)
+
+    if entrant:
+        names = list(dict.fromkeys(d[4] for d in DRIVERS))
+        names += [f"Synthetic Team {i}" for i in range(len(names), n_rows)]
+        names = names[:n_rows]
+        cols = [("ENTRANT", 40, 150)]
+    else:
+        names = [d[1] for d in drivers(n_rows)]
+        cols = [("DRIVER", 40, 85), ("NAT", 125, 30)]
+    x_total = 40 + sum(width for _, _, width in cols)
+    race_w = (w - 40 - x_total - 40) / max(n_races, 1)
+
+    y = 75
+    for name, x, _ in cols:
+        text(page, x, y, name, bold=True)
+    text(page, x_total, y, "TOTAL", bold=True)
+    for r in range(n_races):
+        text(page, x_total + 40 + r * race_w, y, RACES[r % len(RACES)], bold=True)
+
+    # Two lines per row: points above, finishing position below
+    results = {name: [] for name in names}
+    for _ in range(n_races):
+        finish = rng.sample(names, len(names))
+        for p, name in enumerate(finish):
+            results[name].append((POINTS[p] if p < len(POINTS) else 0, p + 1))
+    standings = sorted(names, key=lambda n: -sum(pts for pts, _ in results[n]))
+
+    rh = 18
+    y0 = y + 6
+    for i, name in enumerate(standings):
+        top = y0 + i * rh
+        if i % 2 == 0:
+            shade(page, 15, top, w - 15, top + rh)
+        hline(page, 15, w - 15, top)
+        text(page, 20, top + 8, str(i + 1))
+        if entrant:
+            text(page, 40, top + 8, name)
+        else:
+            text(page, 40, top + 8, name)
+            text(page, 125, top + 8, DRIVERS[DRIVERS.index(next(d for d in DRIVERS if d[1] == name))][3]
+                 if any(d[1] == name for d in DRIVERS) else "GBR")
+        text(page, x_total, top + 8, str(sum(pts for pts, _ in results[name])))
+        for r, (pts, p) in enumerate(results[name]):
+            rx = x_total + 40 + r * race_w
+            text(page, rx, top + 8, str(pts))
+            text(page, rx, top + 15, f"{p}F" if p == 1 and rng.random() < 0.3 else str(p))
+        for vx in [17, 38] + [x for _, x, _ in cols[1:]] + [x_total - 2] + \
+                  [x_total + 38 + r * race_w for r in range(n_races)]:
+            vline(page, vx - 2, top, top + rh)
+        vline(page, w - 15, top, top + rh)
+    hline(page, 15, w - 15, y0 + len(standings) * rh)
+
+    text(page, 20, h - 20, f"{FOOTER} - Synthetic document for benchmarks", 5)
+    doc.save(filepath)
+
+
+def drivers_championship(filepath: Path, n_drivers: int = 20, n_races: int = 24, seed: int = 0):
+    championship(filepath, n_drivers, n_races, seed, entrant=False)
+
+
+def constructors_championship(filepath: Path, n_teams: int = 10, n_races: int = 24, seed: int = 0):
+    championship(filepath, n_teams, n_races, seed, entrant=True)
+
+
+def scale_document(src: Path, dst: Path, scale: float):
+    """Copy a document with its pages scaled by `scale`, text and lines included"""
+    with fitz.open(src) as doc, fitz.open() as scaled:
+        for i, page in enumerate(doc):
+            new = scaled.new_page(width=page.rect.width * scale, height=page.rect.height * scale)
+            new.show_pdf_page(new.rect, doc, i)
+        scaled.save(dst)
+
+
+def generate_weekend(out_dir: Path, n_drivers: int = 20, n_laps: int = 57, n_races: int = 24,
+                     sprint_laps: int = 19, seed: int = 0) -> dict[str, Path]:
+    """Generate every document of a (sprint) weekend, named like the files of `main.download_files`
+
+    :return: The path of each document, by document name
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    n_teams = len(set(d[4] for d in drivers(n_drivers)))
+    generators = {
+        "race_classification": lambda f: race_final_classification(f, n_drivers, n_laps, seed),
+        "quali_classification": lambda f: quali_final_classification(f, n_drivers, seed),
+        "starting_grid": lambda f: starting_grid(f, n_drivers, seed),
+        "race_history_chart": lambda f: race_history_chart(f, n_drivers, n_laps, seed),
+        "race_lap_chart": lambda f: race_lap_chart(f, n_drivers, n_laps, seed),
+        "race_pit_stops": lambda f: race_pit_stops(f, n_drivers, n_laps, seed),
+        "drivers_championship": lambda f: drivers_championship(f, n_drivers, n_races, seed),
+        "constructors_championship": lambda f: constructors_championship(f, n_teams, n_races, seed),
+        "sprint_classification": lambda f: sprint_final_classification(f, n_drivers, sprint_laps, seed),
+        "sprint_history_chart": lambda f: sprint_history_chart(f, n_drivers, sprint_laps, seed),
+        "sprint_lap_chart": lambda f: sprint_lap_chart(f, n_drivers, sprint_laps, seed),
+    }
+
+    paths = {}
+    for name, generate in generators.items():
+        paths[name] = out_dir / f"{name}.pdf"
+        generate(paths[name])
+    return paths
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Generate FIA-style timing PDFs")
+    arg_parser.add_argument("output_dir", type=Path)
+    arg_parser.add_argument("--drivers", type=int, default=20)
+    arg_parser.add_argument("--laps", type=int, default=57)
+    arg_parser.add_argument("--races", type=int, default=24)
+    arg_parser.add_argument("--sprint-laps", type=int, default=19)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    for name, path in generate_weekend(args.output_dir, args.drivers, args.laps, args.races,
+                                       args.sprint_laps, args.seed).items():
+        print(f"{name}: {path}")
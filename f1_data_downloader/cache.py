@@ -0,0 +1,255 @@
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock, get_ident
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+CACHE_ROOT = Path(".cache")
+DEFAULT_CACHE_DIR = CACHE_ROOT / "documents"
+DEFAULT_EVENT_CACHE_DIR = CACHE_ROOT / "events"
+
+
+def sha256_file(filepath: Path) -> str:
+    """Hash a file without loading it in memory"""
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def tmp_path(filepath: Path) -> Path:
+    """A temporary path next to `filepath`, unique to the current process and thread"""
+    return filepath.with_name(f".{filepath.name}.{os.getpid()}.{get_ident()}.tmp")
+
+
+@contextmanager
+def file_lock(filepath: Path):
+    """Hold an exclusive lock on `filepath`, shared with the other processes and threads
+
+    The lock is taken on `<filepath>.lock`, created if needed, and released when the block exits.
+    """
+    lock_path = filepath.with_name(f"{filepath.name}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        if os.name == "nt":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class DocumentCache:
+    """Persistent, content addressed cache of downloaded documents
+
+    The cache lives in a directory with the following layout:
+
+        index.json              url -> {"sha256", "etag", "last_modified"}
+        objects/<sha256>.pdf    the documents, named after the hash of their content
+
+    The ETag and Last-Modified values returned by the server are kept so a document can be
+    revalidated with a conditional GET: an unchanged document then costs one 304 response and no
+    body transfer. Documents are hard linked to their destination when possible, so a cache hit
+    on a destination that is already up to date does not write anything.
+    """
+
+    def __init__(self, root: Path = DEFAULT_CACHE_DIR):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.index_path = self.root / "index.json"
+        self.lock = Lock()
+
+        self.index = self.read_index()
+        # Urls updated by this instance, see `save`
+        self.updated: set[str] = set()
+
+    def read_index(self) -> dict[str, dict]:
+        if not self.index_path.exists():
+            return {}
+
+        try:
+            return json.loads(self.index_path.read_text())
+        except json.JSONDecodeError:
+            logger.warning("corrupted cache index %s, starting from an empty cache", self.index_path)
+            return {}
+
+    def object_path(self, sha256: str) -> Path:
+        return self.objects / f"{sha256}.pdf"
+
+    def lookup(self, url: str) -> dict | None:
+        """Get the cache entry of `url`, if its document is still in the cache"""
+        with self.lock:
+            entry = self.index.get(url)
+        if entry is None or not self.object_path(entry["sha256"]).exists():
+            return None
+        return entry
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """Headers to revalidate the cached version of `url`"""
+        entry = self.lookup(url)
+        if entry is None:
+            return {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store_file(self, url: str, filepath: Path, sha256: str, headers) -> str:
+        """Move a freshly downloaded document into the cache
+
+        :param url: The url of the document
+        :param filepath: The downloaded file, it is moved to the cache
+        :param sha256: The sha256 of the file content
+        :param headers: The headers of the response
+        :return: The sha256 of the document
+        """
+        obj = self.object_path(sha256)
+        if obj.exists():
+            filepath.unlink()
+        else:
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            tmp = tmp_path(obj)
+            shutil.move(filepath, tmp)
+            os.replace(tmp, obj)
+
+        self.record(url, sha256, headers)
+        return sha256
+
+    def record(self, url: str, sha256: str, headers):
+        """Update the validators of `url`"""
+        with self.lock:
+            self.index[url] = {
+                "sha256": sha256,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+            }
+            self.updated.add(url)
+
+    def materialize(self, url: str, filepath: Path) -> bool:
+        """Make `filepath` hold the cached document of `url`
+
+        :return: True if `filepath` had to be written, False if it was already up to date
+        """
+        entry = self.lookup(url)
+        if entry is None:
+            raise KeyError(f"{url} is not in the cache")
+        obj = self.object_path(entry["sha256"])
+
+        if filepath.exists():
+            if os.path.samefile(filepath, obj):
+                return False
+            if filepath.stat().st_size == obj.stat().st_size and sha256_file(filepath) == entry["sha256"]:
+                return False
+
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        tmp = tmp_path(filepath)
+        tmp.unlink(missing_ok=True)
+        try:
+            os.link(obj, tmp)
+        except OSError:
+            # E.g. the cache and the destination are not on the same file system
+            shutil.copyfile(obj, tmp)
+        os.replace(tmp, filepath)
+        return True
+
+    def save(self):
+        """Write the index to disk
+
+        The cache can be shared by several processes (see `main.py batch`), so the entries updated
+        by this instance are merged into the index currently on disk instead of overwriting it. The
+        merge holds `file_lock`, otherwise two processes saving at the same time would both read
+        the old index and the last one to write would drop the entries of the other.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.index_path), self.lock:
+            index = self.read_index()
+            index.update({url: self.index[url] for url in self.updated})
+            tmp = tmp_path(self.index_path)
+            tmp.write_text(json.dumps(index, indent=2, sort_keys=True))
+            os.replace(tmp, self.index_path)
+
+
+class EventPageCache:
+    """Persistent cache of the documents found on the event timing pages
+
+    For every season and event, the page is saved next to the (header, title, url) list found on
+    it, its sha256 and validators:
+
+        <season>/<event>.html
+        <season>/<event>.json   {"sha256", "etag", "last_modified", "files"}
+
+    An unchanged page (304 response, or same content) does not need to be parsed again.
+    """
+
+    def __init__(self, root: Path = DEFAULT_EVENT_CACHE_DIR):
+        self.root = Path(root)
+
+    def paths(self, season: int, event: str) -> tuple[Path, Path]:
+        base = self.root / str(season) / event
+        return base.with_suffix(".json"), base.with_suffix(".html")
+
+    def load(self, season: int, event: str) -> dict | None:
+        """Get the cache entry of an event, if any"""
+        entry_path, _ = self.paths(season, event)
+        if not entry_path.exists():
+            return None
+
+        try:
+            entry = json.loads(entry_path.read_text())
+        except json.JSONDecodeError:
+            logger.warning("corrupted event cache %s, ignoring it", entry_path)
+            return None
+
+        entry["files"] = {header: [tuple(f) for f in files] for header, files in entry["files"].items()}
+        return entry
+
+    def conditional_headers(self, entry: dict | None) -> dict[str, str]:
+        """Headers to revalidate a cached event page"""
+        if entry is None:
+            return {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, season: int, event: str, html: str, sha256: str, headers, files: dict):
+        """Save an event page and the documents found on it"""
+        entry_path, html_path = self.paths(season, event)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp = tmp_path(html_path)
+        tmp.write_text(html)
+        os.replace(tmp, html_path)
+
+        tmp = tmp_path(entry_path)
+        tmp.write_text(json.dumps({
+            "sha256": sha256,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "files": files,
+        }, indent=2))
+        os.replace(tmp, entry_path)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from f1_data_downloader.cache import sha256_file, tmp_path
+from f1_data_downloader.output import PARQUET, SCHEMAS, import_pyarrow, to_pandas
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = Path(__file__).parent
+
+# The code the tables depend on: the parsers and the transforms of `tables`. Not `main`, the command
+# line and the downloads: a change there does not process every round again
+PARSER_SOURCES = ["parser/*.py", "registry.py", "tables.py", "output.py"]
+
+
+@cache
+def parser_version() -> str:
+    """A hash of the code producing the tables, see `PARSER_SOURCES`
+
+    Any change to the parsers, the csv transforms or the schemas gives a new version, so the rounds
+    processed before the change are processed again.
+    """
+    h = hashlib.sha256()
+    for pattern in PARSER_SOURCES:
+        for filepath in sorted(PACKAGE_DIR.glob(pattern)):
+            h.update(filepath.relative_to(PACKAGE_DIR).as_posix().encode())
+            h.update(filepath.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def hash_inputs(data_dir: Path, names: list[str]) -> dict[str, str]:
+    """The sha256 of the documents `names` found in `data_dir`"""
+    return {
+        name: sha256_file(data_dir / f"{name}.pdf")
+        for name in sorted(names)
+        if (data_dir / f"{name}.pdf").exists()
+    }
+
+
+class SeasonDataset:
+    """Persistent dataset of the tables of every processed round, partitioned by season and round
+
+    The dataset lives in a directory with the following layout:
+
+        <table>/season=<season>/round=<round>/part-0.parquet
+        _manifest/<season>/<round>.json     {"parser_version", "inputs", "tables", "updated"}
+
+    The partitions follow the hive convention, so a reader (`read`, or any tool reading parquet
+    datasets) only opens the files of the seasons and rounds it asks for. Every round has its own
+    manifest file, recording the hash of its input documents and the `parser_version` it was
+    processed with, so the rounds of a batch can be added from several processes at once.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def manifest_path(self, season: int, round_name: str) -> Path:
+        return self.root / "_manifest" / str(season) / f"{round_name}.json"
+
+    def partition(self, table: str, season: int, round_name: str) -> Path:
+        return self.root / table / f"season={season}" / f"round={round_name}"
+
+    def load_entry(self, season: int, round_name: str) -> dict | None:
+        """Get the manifest entry of a round, if it was processed"""
+        path = self.manifest_path(season, round_name)
+        if not path.exists():
+            return None
+
+        try:
+            return json.loads(path.read_text())
+        except json.JSONDecodeError:
+            logger.warning("corrupted manifest %s, the round will be processed again", path)
+            return None
+
+    def manifest(self) -> list[dict]:
+        """The manifest entries of every processed round"""
+        entries = []
+        for path in sorted((self.root / "_manifest").glob("*/*.json")):
+            entry = self.load_entry(int(path.parent.name), path.stem)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    def is_current(self, season: int, round_name: str, inputs: dict[str, str]) -> bool:
+        """Whether the round was processed from the same documents, with the current parsers"""
+        entry = self.load_entry(season, round_name)
+        return (entry is not None
+                and entry["parser_version"] == parser_version()
+                and entry["inputs"] == inputs)
+
+    def add_round(self, season: int, round_name: str, table_dir: Path, tables: list[str],
+                  inputs: dict[str, str]):
+        """Replace the partitions of a round with its freshly written tables
+
+        :param season: The year of the season
+        :param round_name: The name of the round, e.g. "bahrain_grand_prix"
+        :param table_dir: The directory of the parquet files of the round, see `output.TableWriter`
+        :param tables: The tables written for the round, the other partitions of the round are removed
+        :param inputs: The hash of the input documents, see `hash_inputs`
+        """
+        for table in SCHEMAS:
+            partition = self.partition(table, season, round_name)
+            # A table that is not produced anymore should not be read with the new ones
+            shutil.rmtree(partition, ignore_errors=True)
+            if table not in tables:
+                continue
+
+            partition.mkdir(parents=True, exist_ok=True)
+            dst = partition / "part-0.parquet"
+            tmp = tmp_path(dst)
+            shutil.copyfile(table_dir / f"{table}.parquet", tmp)
+            os.replace(tmp, dst)
+
+        # The manifest is written last: a round interrupted before is processed again
+        path = self.manifest_path(season, round_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = tmp_path(path)
+        tmp.write_text(json.dumps({
+            "season": season,
+            "round": round_name,
+            "parser_version": parser_version(),
+            "inputs": inputs,
+            "tables": tables,
+            "updated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }, indent=2))
+        os.replace(tmp, path)
+        logger.info(f"{season} {round_name}: {len(tables)} table(s) added to the dataset {self.root}")
+
+    def read(self, table: str, seasons: list[int] | None = None, rounds: list[str] | None = None,
+             columns: list[str] | None = None) -> pd.DataFrame:
+        """Read a table across rounds, opening only the partitions of the given seasons and rounds
+
+        :param table: The name of the table, see `output.SCHEMAS`
+        :param seasons: Only read these seasons, all by default
+        :param rounds: Only read these rounds, all by default
+        :param columns: Only read these columns, all by default. The "season" and "round" columns
+                        are always added
+        :return: The rows of the selected rounds, with their "season" and "round"
+        """
+        pa = import_pyarrow()
+        import pyarrow.dataset as ds
+
+        partitioning = ds.partitioning(pa.schema([("season", pa.int64()), ("round", pa.string())]),
+                                       flavor="hive")
+        table_dir = self.root / table
+        if not table_dir.exists():
+            raise FileNotFoundError(f"no {table} table in the dataset {self.root}")
+        dataset = ds.dataset(table_dir, format=PARQUET, partitioning=partitioning)
+
+        condition = None
+        if seasons is not None:
+            condition = ds.field("season").isin(seasons)
+        if rounds is not None:
+            in_rounds = ds.field("round").isin(rounds)
+            condition = in_rounds if condition is None else condition & in_rounds
+
+        if columns is not None:
+            columns = list(columns) + [c for c in ["season", "round"] if c not in columns]
+        return to_pandas(dataset.to_table(columns=columns, filter=condition))
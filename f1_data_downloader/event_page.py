@@ -0,0 +1,109 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.element import Tag
+import hashlib
+import logging
+
+from f1_data_downloader.cache import EventPageCache
+from f1_data_downloader.fetcher import DocumentFetcher
+
+logger = logging.getLogger(__name__)
+
+# Headers of the event page sections we download documents from
+EVENT_HEADERS = ["RACE", "SPRINT RACE"]
+
+# Only build the tree of div.content, the rest of the page (menus, footer, scripts, ...) is
+# skipped by the tokenizer
+content_strainer = SoupStrainer("div", class_="content")
+
+
+def find_event_files(html: str) -> dict[str, list[tuple[str, str]]]:
+    """Find the documents listed on the FIA event timing page
+
+    Documents are listed in div.content > div.middle: a <p> holding a bold header ("RACE",
+    "SPRINT RACE", ...) starts a section, and each document of the section is a
+    div.for-documents holding a link and a div.title.
+
+    :param html: The html of the event timing page
+    :return: The (title, url) of the documents found under each header
+    """
+    soup = BeautifulSoup(html, "html.parser", parse_only=content_strainer)
+
+    content = soup.find("div", class_="content")
+
+    if not isinstance(content, Tag):
+        raise ValueError("content not found in the event page")
+
+    middle = content.find("div", class_="middle")
+
+    if not isinstance(middle, Tag):
+        raise ValueError("middle not found in the event page")
+
+    files_url = {header: [] for header in EVENT_HEADERS}
+    current_header = ""
+
+    for tag in middle.find_all(True):
+        if tag.name == "p":
+            header_tag = tag.find("b") or tag.find("strong")
+            if header_tag is not None:
+                header = header_tag.get_text(strip=True)
+                current_header = header if header in files_url else ""
+
+        if current_header == "":
+            continue
+
+        classes = tag.get("class")
+        if not classes or classes[0] != "for-documents":
+            continue
+
+        a = tag.find("a")
+
+        if not isinstance(a, Tag):
+            raise ValueError("a tag not found in the event page")
+
+        title_div = tag.find("div", class_="title")
+
+        if not isinstance(title_div, Tag):
+            raise ValueError("title_div not found in the event page")
+
+        url = a.get("href")
+        title = title_div.text
+
+        logger.info(f"Found: {current_header} - {title}")
+        files_url[current_header].append((title, url))
+
+    return files_url
+
+
+def discover_event_files(fetcher: DocumentFetcher, url: str, season: int, event: str,
+                         cache: EventPageCache | None = None) -> dict[str, list[tuple[str, str]]]:
+    """Fetch the event timing page and find the documents listed on it
+
+    With a cache, the page is revalidated with a conditional GET and is only parsed again when its
+    content changed since the last run.
+
+    :param fetcher: The fetcher used to get the page
+    :param url: The url of the event timing page
+    :param season: The year of the season
+    :param event: The kebab case name of the event
+    :param cache: The event page cache, if any
+    :return: The (title, url) of the documents found under each header
+    """
+    if cache is None:
+        return find_event_files(fetcher.get_page(url).content.decode("utf-8"))
+
+    entry = cache.load(season, event)
+    resp = fetcher.get_page(url, cache.conditional_headers(entry))
+
+    if resp.status_code == 304 and entry is not None:
+        logger.info("Event page not modified, using the cached list of documents")
+        return entry["files"]
+
+    sha256 = hashlib.sha256(resp.content).hexdigest()
+    if entry is not None and entry["sha256"] == sha256:
+        logger.info("Event page unchanged, using the cached list of documents")
+        return entry["files"]
+
+    html = resp.content.decode("utf-8")
+    files_url = find_event_files(html)
+    cache.store(season, event, html, sha256, resp.headers, files_url)
+    return files_url
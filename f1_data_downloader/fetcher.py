@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import TYPE_CHECKING
+
+from f1_data_downloader.cache import DocumentCache
+from f1_data_downloader.tracing import span
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+# Number of documents downloaded at the same time by default
+DEFAULT_WORKERS = 4
+
+# Size of the chunks written to disk while streaming a document
+CHUNK_SIZE = 1 << 16
+
+# Number of times an interrupted download is resumed before giving up
+MAX_RETRIES = 3
+
+# Seconds to wait for the connection and between two chunks
+TIMEOUT = 30
+
+
+class StalePartError(Exception):
+    """The partial file of a download cannot be resumed, it was deleted to start over"""
+
+
+def create_session(pool_size: int = DEFAULT_WORKERS) -> requests.Session:
+    """Create a session keeping one keep-alive connection per worker
+
+    :param pool_size: Max. number of connections kept open per host
+    :return: A `requests.Session` object
+    """
+    # requests is imported when something is downloaded, not with the command line
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class DocumentFetcher:
+    """Download documents concurrently over one pooled HTTP session
+
+    Downloads are queued with `submit` and start right away on a thread pool, so the caller can
+    keep working (e.g. fetch and parse the event page) while they run. `wait` blocks until every
+    queued download is done.
+
+    When a `DocumentCache` is given, documents are revalidated against it with a conditional GET
+    and only downloaded again if they changed on the server.
+
+    Documents are streamed to disk and resumed with Range requests when a transfer is interrupted.
+    With `report`, the size, duration and rate of every transfer is logged.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, cache: DocumentCache | None = None,
+                 report: bool = False):
+        if workers < 1:
+            raise ValueError(f"workers should be at least 1, got {workers}")
+
+        # One more connection for the pages fetched from the calling thread
+        self.session = create_session(workers + 1)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch")
+        self.futures: dict[Path, tuple[str, Future]] = {}
+        self.cache = cache
+        self.report = report
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # Do not start queued downloads if we are leaving because of an error
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.session.close()
+        if self.cache is not None:
+            self.cache.save()
+
+    def get_page(self, url: str, headers: dict[str, str] | None = None) -> requests.Response:
+        """Fetch a page from the calling thread"""
+        with span(url, "fetch"):
+            resp = self.session.get(url, headers=headers, timeout=TIMEOUT)
+        resp.raise_for_status()
+        return resp
+
+    def submit(self, url: str, filepath: Path) -> Future:
+        """Queue the download of `url` to `filepath`"""
+        logger.info(f"Downloading: {url} to {filepath.name}")
+        future = self.executor.submit(self._download, url, filepath)
+        self.futures[filepath] = (url, future)
+        return future
+
+    def wait(self) -> list[str]:
+        """Wait for every queued download
+
+        :return: The urls that could not be downloaded
+        """
+        failed = []
+        for url, future in self.futures.values():
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"could not download: {url} - {e}")
+                failed.append(url)
+        self.futures = {}
+        return failed
+
+    def _download(self, url: str, filepath: Path):
+        import requests
+        from requests.exceptions import ChunkedEncodingError
+
+        with span(filepath.name, "download", url=url):
+            for attempt in range(1, MAX_RETRIES + 2):
+                try:
+                    return self._stream(url, filepath)
+                except (requests.ConnectionError, requests.Timeout, ChunkedEncodingError) as e:
+                    if attempt > MAX_RETRIES:
+                        raise
+                    logger.warning(f"download of {url} interrupted ({e}), resuming "
+                                   f"(attempt {attempt}/{MAX_RETRIES})")
+                except StalePartError as e:
+                    if attempt > MAX_RETRIES:
+                        raise
+                    logger.warning(f"download of {url} cannot be resumed ({e}), restarting "
+                                   f"(attempt {attempt}/{MAX_RETRIES})")
+
+    def _stream(self, url: str, filepath: Path):
+        """Stream `url` to a partial file, then move it to `filepath`
+
+        The partial file is kept when the transfer fails, along with the validators of the
+        response, so the next attempt (or the next run) only asks for the missing bytes with a
+        Range request. If the server cannot serve that range (416, e.g. the partial file is already
+        complete, or another Content-Range), the partial file is deleted and `StalePartError` raised:
+        the next attempt downloads the whole document.
+        """
+        part = filepath.with_name(f".{filepath.name}.part")
+        meta = part.with_name(f"{part.name}.json")
+
+        headers = self.cache.conditional_headers(url) if self.cache is not None else {}
+        offset, validator = resume_point(url, part, meta)
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+
+        start = time.perf_counter()
+        with self.session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as resp:
+            if resp.status_code == 304 and self.cache is not None:
+                part.unlink(missing_ok=True)
+                meta.unlink(missing_ok=True)
+                written = self.cache.materialize(url, filepath)
+                logger.info(f"Not modified: {url} ({'restored from cache' if written else 'up to date'})")
+                return
+
+            if resp.status_code == 200:
+                # Either a new transfer, or the document changed since the partial download
+                offset = 0
+            elif resp.status_code == 416 and offset:
+                part.unlink(missing_ok=True)
+                meta.unlink(missing_ok=True)
+                raise StalePartError(f"range from byte {offset} not satisfiable")
+            elif resp.status_code == 206:
+                if not resp.headers.get("Content-Range", "").startswith(f"bytes {offset}-"):
+                    part.unlink(missing_ok=True)
+                    meta.unlink(missing_ok=True)
+                    raise StalePartError(f"unexpected Content-Range {resp.headers.get('Content-Range')}")
+                logger.info(f"Resuming: {url} from byte {offset}")
+            else:
+                raise RuntimeError(f"status code {resp.status_code}")
+
+            part.parent.mkdir(parents=True, exist_ok=True)
+            meta.write_text(json.dumps({
+                "url": url,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+            }))
+
+            h = sha256_prefix(part, offset)
+            received = 0
+            with open(part, "r+b" if offset else "wb") as f:
+                f.seek(offset)
+                f.truncate()
+                for chunk in resp.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    h.update(chunk)
+                    received += len(chunk)
+
+        if self.cache is None:
+            os.replace(part, filepath)
+        else:
+            self.cache.store_file(url, part, h.hexdigest(), resp.headers)
+            self.cache.materialize(url, filepath)
+        meta.unlink(missing_ok=True)
+
+        if self.report:
+            elapsed = time.perf_counter() - start
+            logger.info(f"Downloaded: {filepath.name} - {received / 1024:.1f} KiB in {elapsed:.2f}s "
+                        f"({received / 1024 / max(elapsed, 1e-6):.1f} KiB/s)")
+
+
+def resume_point(url: str, part: Path, meta: Path) -> tuple[int, str | None]:
+    """Find where an interrupted download of `url` can be resumed from
+
+    :return: The number of bytes already downloaded and the validator to send in `If-Range`. The
+             download cannot be resumed if the offset is 0.
+    """
+    if not part.exists() or not meta.exists():
+        return 0, None
+
+    try:
+        info = json.loads(meta.read_text())
+    except json.JSONDecodeError:
+        return 0, None
+
+    # Without a validator we cannot know the partial file is from the current version
+    validator = info.get("etag") or info.get("last_modified")
+    if info.get("url") != url or validator is None:
+        return 0, None
+
+    return part.stat().st_size, validator
+
+
+def sha256_prefix(filepath: Path, size: int):
+    """Start a sha256 with the first `size` bytes of a file"""
+    h = hashlib.sha256()
+    if size == 0:
+        return h
+
+    with open(filepath, "rb") as f:
+        while size > 0:
+            chunk = f.read(min(size, CHUNK_SIZE))
+            if not chunk:
+                break
+            h.update(chunk)
+            size -= len(chunk)
+    return h
@@ -1,28 +1,32 @@
-from re import sub
-from urllib.request import urlopen
-from bs4 import BeautifulSoup
-from bs4.element import Tag
-import requests
-import pandas as pd
+from __future__ import annotations
 
+from re import search, sub
+
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
+import argparse
+import csv
 import logging
 import json
+import queue
 import sys
+import time
 import traceback
 
-from f1_data_downloader.parser.parse_quali import parse_quali_final_classification
-from f1_data_downloader.parser.parse_driver_championship import parse_driver_championship
-from f1_data_downloader.parser.parse_constructor_championship import parse_constructor_championship
-from f1_data_downloader.parser.parse_race_classification import parse_race_final_classification
-from f1_data_downloader.parser.parse_race_history_chart import parse_race_history_chart
-from f1_data_downloader.parser.parse_race_lap_chart import parse_race_lap_chart
-from f1_data_downloader.parser.parse_race_pit_stops import parse_race_pit_stop
-from f1_data_downloader.parser.parse_starting_grid import parse_starting_grid
+# Only light modules are imported here, so the command line starts fast. pandas, PyMuPDF (through
+# the parsers), requests and bs4 are imported by the functions using them: a download does not load
+# the parsers, and parsing does not load the HTTP stack
+from f1_data_downloader.cache import CACHE_ROOT, DocumentCache, EventPageCache
+from f1_data_downloader.dataset import SeasonDataset, hash_inputs
+from f1_data_downloader.fetcher import DEFAULT_WORKERS, DocumentFetcher
 
-from f1_data_downloader.parser.parse_sprint_history_chart import parse_sprint_history_chart
-from f1_data_downloader.parser.parse_sprint_classification import parse_sprint_final_classification
-from f1_data_downloader.parser.parse_sprint_lap_chart import parse_sprint_lap_chart
+from f1_data_downloader.parser.engines import FIND_TABLES, TABLE_ENGINES
+from f1_data_downloader.output import CSV, FORMATS, PARQUET, TableWriter
+from f1_data_downloader.scheduler import log_schedule, run_stages
+from f1_data_downloader.tables import STREAMED, round_stages
+from f1_data_downloader.tracing import profile, record_trace, span
 
 base = "https://www.fia.com"
 events_endpoint = "/events/fia-formula-one-world-championship"
@@ -75,408 +79,88 @@ events_titles = {
     }
 }
 
-entrant_id_mapping = {
-    "Oracle Red Bull Racing": 9,
-    "McLaren Formula 1 Team": 1,
-    "Mercedes-AMG PETRONAS F1 Team": 131,
-    "Aston Martin Aramco F1 Team": 117,
-    "Scuderia Ferrari HP": 6,
-    "Atlassian Williams Racing": 3,
-    "BWT Alpine F1 Team": 214,
-    "MoneyGram Haas F1 Team": 210,
-    "Visa Cash App Racing Bulls F1 Team": 215,
-    "Stake F1 Team Kick Sauber": 15,
-    "Kick Sauber F1 Team": 15,
-}
-
-driver_mapping = {
-    "L. NORRIS": 846,
-    "M. VERSTAPPEN": 830,
-    "G. RUSSELL": 847,
-    "I. HADJAR": 863,
-    "A. ALBON": 848,
-    "L. STROLL": 840,
-    "N. HULKENBERG": 807,
-    "C. LECLERC": 844,
-    "O. PIASTRI": 857,
-    "L. HAMILTON": 1,
-    "P. GASLY": 842,
-    "Y. TSUNODA": 852,
-    "E. OCON": 839,
-    "O. BEARMAN": 860,
-    "L. LAWSON": 859,
-    "K. ANTONELLI": 864,
-    "F. ALONSO": 4,
-    "C. SAINZ": 832,
-    "J. DOOHAN": 862,
-    "G. BORTOLETO": 865,
-    "F. COLAPINTO": 861,
-}
-
-driver_no_mapping = {
-    4: 846,
-    1: 830,
-    63: 847,
-    6: 863,
-    23: 848,
-    18: 840,
-    27: 807,
-    16: 844,
-    81: 857,
-    44: 1,
-    10: 842,
-    22: 852,
-    31: 839,
-    87: 860,
-    30: 859,
-    12: 864,
-    14: 4,
-    55: 832,
-    7: 862,
-    5: 865,
-    43: 861,
-}
+# Where the documents are downloaded, relative to the output directory. The tables are written to
+# a directory per format, see `output.TableWriter`
+DATA_DIR = Path("data")
+
+# The layouts found in the documents, reused for the documents of the same layout, see
+# `parser.templates.LayoutTemplates`
+LAYOUT_TEMPLATES = CACHE_ROOT / "layout_templates.json"
+
+# The documents taking the longest to parse, slowest first. They are downloaded first, so that their
+# parse starts as early as possible when the documents are parsed while they download
+SLOW_PARSES = [
+    "race_history_chart",
+    "sprint_history_chart",
+    "drivers_championship",
+    "race_lap_chart",
+    "constructors_championship",
+    "sprint_lap_chart",
+]
 
 logger = logging.getLogger(__name__)
 
-def download_files(year: int, kebab_race_name: str, snake_race_name: str, is_sprint: bool):
-    # Format the key to the following format:
-    # year_round_country
-    # Note: the round is a 2 digit number
-    complete_url = base + events_endpoint + f"/season-{year}/{kebab_race_name}/eventtiming-information"
-    logger.info("Event timing url: %s", complete_url)
-    page = urlopen(complete_url)
-    html = page.read().decode("utf-8")
-    soup = BeautifulSoup(html, "html.parser")
-
-    # Select the div.content > div.middle
-    content = soup.find("div", class_="content")
-
-    if not isinstance(content, Tag):
-        logger.error("content not found")
-        exit(1)
-
-    middle = content.find("div", class_="middle")
-
-    if not isinstance(middle, Tag):
-        logger.error("middle not found")
-        exit(1)
-
-    files_url = {
-        "RACE": [],
-        "SPRINT RACE": [],
-    }
-    current_header = ""
-
-    for div in middle.findChildren():
-        if not isinstance(div, Tag):
-            continue
-
-        b_tag = div.find("b")
-        strong_tag = div.find("strong")
-
-        if div.name == "p":
-            if b_tag is not None:
-                current_header = ""
-
-                for header in files_url:
-                    if header == b_tag.getText(strip=True):
-                        current_header = header
+def slowest_first(names: Iterable[str]) -> list[str]:
+    """Sort documents by their parse time, see `SLOW_PARSES`"""
+    return sorted(names, key=lambda name: SLOW_PARSES.index(name) if name in SLOW_PARSES else len(SLOW_PARSES))
+
+def download_files(year: int, kebab_race_name: str, snake_race_name: str, is_sprint: bool,
+                   workers: int = DEFAULT_WORKERS, cache: DocumentCache | None = None,
+                   report: bool = False, event_cache: EventPageCache | None = None,
+                   data_dir: Path = DATA_DIR, on_downloaded: Callable[[Path], None] | None = None):
+    from f1_data_downloader.event_page import discover_event_files
+
+    def submit(url: str, filepath: Path):
+        def done(future: Future):
+            # Called from the download thread, as soon as the document is written
+            if not future.cancelled() and future.exception() is None:
+                on_downloaded(filepath)
+
+        future = fetcher.submit(url, filepath)
+        if on_downloaded is not None:
+            future.add_done_callback(done)
+
+    with DocumentFetcher(workers, cache, report) as fetcher:
+        # The decision documents do not depend on the event page, so start downloading them
+        # while the event page is fetched and parsed
+        decision_document_complete_url = base + decision_documents_endpoint + f"/{year}_{snake_race_name}_-_"
+        for file in decision_documents_files:
+            dl_url = decision_document_complete_url + file.get("fia_filename", "") + ".pdf"
+            filename = file.get("pdf_filename", "")
+            submit(dl_url, data_dir / f"{filename}.pdf")
+
+        # Format the key to the following format:
+        # year_round_country
+        # Note: the round is a 2 digit number
+        complete_url = base + events_endpoint + f"/season-{year}/{kebab_race_name}/eventtiming-information"
+        logger.info("Event timing url: %s", complete_url)
+        files_url = discover_event_files(fetcher, complete_url, year, kebab_race_name, event_cache)
+
+        logger.info("----- Files found -----")
+
+        # When several documents map to the same file, the last one found wins
+        to_download = {}
+        for header in files_url:
+            for files in files_url[header]:
+                fn = None
+
+                for f in events_titles[header]:
+                    if files[0] in events_titles[header][f]:
+                        fn = f
                         break
-            elif strong_tag is not None:
-                current_header = ""
-
-                for header in files_url:
-                    if header == strong_tag.getText(strip=True):
-                        current_header = header
-                        break
-
-        classes = div.get("class")
-
-        if current_header == "":
-            continue
-
-        if classes is None or classes[0] != 'for-documents':
-            continue
-
-        a = div.find("a")
-
-        if not isinstance(a, Tag):
-            logger.error("a tag not found")
-            exit(1)
-
-        title_div = div.find("div", class_="title")
-
-        if not isinstance(title_div, Tag):
-            logger.error("title_div not found")
-            exit(1)
 
-        url = a.get("href")
-        title = title_div.text
+                if fn is None:
+                    logger.info(f"Skipping: {files[0]}")
+                    continue
 
-        logger.info(f"Found: {current_header} - {title}")
-        files_url[current_header].append((title, url))
+                to_download[fn] = files[1]
 
-    logger.info("----- Files found -----")
+        for fn in slowest_first(to_download):
+            submit(to_download[fn], data_dir / f"{fn}.pdf")
 
-    decision_document_complete_url = base + decision_documents_endpoint + f"/{year}_{snake_race_name}_-_"
-    for file in decision_documents_files:
-        dl_url = decision_document_complete_url + file.get("fia_filename", "") + ".pdf"
-        filename = file.get("pdf_filename", "")
-
-        logger.info(f"Downloading: {dl_url} to {filename}.pdf")
-
-        resp = requests.get(dl_url)
-
-        if resp.status_code != 200:
-            logger.error(f"could not download: {dl_url} - {resp.status_code}")
-            exit(1)
-
-        filepath = Path(f"data/{filename}.pdf")
-        filepath.parent.mkdir(parents=True, exist_ok=True)
-        filepath.write_bytes(resp.content)        
-
-    for header in files_url:
-        for files in files_url[header]:
-            fn = None
-
-            for f in events_titles[header]:
-                if files[0] in events_titles[header][f]:
-                    fn = f
-                    break
-
-            if fn is None:
-                logger.info(f"Skipping: {files[0]}")
-                continue
-
-            dl_url = files[1]
-
-            logger.info(f"Downloading: {dl_url} to {fn}.pdf")
-
-            resp = requests.get(dl_url)
-
-            if resp.status_code != 200:
-                logger.error(f"could not download: {dl_url} - {resp.status_code}")
-                exit(1)
-
-            filepath = Path(f"data/{fn}.pdf")
-            filepath.parent.mkdir(parents=True, exist_ok=True)
-            filepath.write_bytes(resp.content)
-
-def create_constructor_results():
-    data = parse_race_final_classification("data/race_classification.pdf")
-    data['constructor_id'] = data['entrant'].map(lambda x: entrant_id_mapping.get(x)).astype(int)
-    data = data[['constructor_id', 'points']]
-    data['points'] = data['points'].astype('Int64')
-    result = data.groupby("constructor_id", as_index=False)["points"].sum()
-    result.to_csv("csv/constructor_results.csv", index=False)
-
-    logger.info("----- CSV file created for constructor results -----")
-
-def create_constructor_standings():
-    data = parse_constructor_championship("data/constructors_championship.pdf")
-    data['position'] = data['pos']
-    data['position_text'] = data['pos']
-    data['points'] = data['total']
-    data['constructor_id'] = data['entrant'].map(lambda x: entrant_id_mapping.get(x)).astype(int)
-
-    data = data[['constructor_id', 'points', 'position', 'position_text', 'wins']]
-
-    data.to_csv("csv/constructor_standings.csv", index=False)
-
-    logger.info("----- CSV file created for constructor standings -----")
-
-def to_ms_safe(t: str):
-    if pd.isna(t) or t == "" or t is None:
-        return None
-    t_str = str(t).strip()
-    # If it has 0 colon, assume SS.sss    → prepend 0:0:
-    # If it has 1 colon, assume MM:SS.sss → prepend 0:
-    if t_str.count(":") == 0:
-        t_str = "0:0:" + t_str
-    elif t_str.count(":") == 1:
-        t_str = "0:" + t_str
-        
-    td = pd.to_timedelta(t_str, errors="coerce")
-    return None if pd.isna(td) else int(td.total_seconds()) * 1000
-
-def create_results():
-    data = parse_race_final_classification("data/race_classification.pdf")
-    grid_data = parse_starting_grid("data/starting_grid.pdf")
-
-    data = data.reset_index(drop=True)
-    data['driver_id'] = data['driver_no'].map(lambda x: driver_no_mapping.get(int(x)))
-    data['driver_number'] = data['driver_no'].astype(int)
-    data['constructor_id'] = data['entrant'].map(lambda x: entrant_id_mapping.get(x)).astype(int)
-    data['position'] = data.index + 1
-
-    data['position_text'] = data['position'].astype(str)
-    is_dnf = data["gap"].astype(str).str.strip().eq("DNF")
-    data.loc[is_dnf, "position_text"] = "R"
-
-    data['position_order'] = data['position']
-    data["milliseconds"] = data['time'].apply(to_ms_safe).astype('Int64')
-    data.loc[1:, "time"] = data.loc[1:, "gap"]
-
-    data['fastest_lap'] = data['on']
-    data['fastest_lap_time'] = data['fastest']
-    data['fastest_lap_speed'] = data['km/h']
-    data['fastest_ms'] = data['fastest'].apply(to_ms_safe)
-    data['rank'] = data["fastest_ms"].rank(method="min", ascending=True).astype('Int64')
-
-    data = data[[
-        'driver_id',
-        'constructor_id',
-        'driver_number',
-        'position',
-        'position_text',
-        'position_order',
-        'points',
-        'laps',
-        'time',
-        'milliseconds',
-        'fastest_lap',
-        'fastest_lap_time',
-        'rank',
-        'fastest_lap_speed',
-    ]]
-
-    grid_data = grid_data.reset_index().rename(columns={"index": "grid"})
-    grid_data['grid'] = grid_data['grid'] + 1
-
-    data = data.merge(grid_data[['car', 'grid']], left_on='driver_number', right_on='car', how='left').drop(columns=['car'])
-
-    data.to_csv("csv/results.csv", index=False)
-
-    logger.info("----- CSV file created for results -----")
-
-def create_driver_standings():
-    data = parse_driver_championship("data/drivers_championship.pdf")
-
-    data = data.reset_index(drop=True)
-    data['points'] = data['total']
-    data['driver_id'] = data['driver'].map(lambda x: driver_mapping.get(x))
-    data['position'] = data.index + 1
-    data['position_text'] = data['position']
-   
-    data = data[[
-        'driver_id',
-        'points',
-        'position',
-        'position_text',
-        'wins'
-    ]]
-
-    data.to_csv("csv/driver_standings.csv", index=False)
-    logger.info("----- CSV file created for driver standings -----")
-
-
-def create_lap_times(is_sprint: bool):
-    data = parse_race_history_chart("data/race_history_chart.pdf")
-    data = data.reset_index(drop=True)
-
-    data['driver_id'] = data['driver_no'].map(lambda x: driver_no_mapping.get(int(x)))
-    data['milliseconds'] = data['time'].apply(to_ms_safe).astype('Int64')
-
-    data = data[[
-        'driver_id',
-        'lap',
-        'position',
-        'time',
-        'milliseconds'
-    ]]
-
-    data.to_csv("csv/lap_times.csv", index=False)
-    logger.info("----- CSV file created for lap times -----")
-
-def create_pit_stops():
-    data = parse_race_pit_stop("data/race_pit_stops.pdf")
-    data = data.reset_index(drop=True)
-
-    data['driver_id'] = data['driver_no'].map(lambda x: driver_no_mapping.get(int(x)))
-    data['stop'] = data['no']
-    data['time'] = data['local_time']
-    data['milliseconds'] = data['duration'].apply(to_ms_safe).astype('Int64')
-
-    data = data[[
-        'driver_id',
-        'stop',
-        'lap',
-        'time',
-        'duration',
-        'milliseconds'
-    ]]
-
-    data.to_csv("csv/pit_stops.csv", index=False)
-    logger.info("----- CSV file created for pit stops -----")
-
-def create_qualifying():
-    data = parse_quali_final_classification("data/quali_classification.pdf")
-    data = data.reset_index(drop=True)
-
-    data['driver_id'] = data['no'].map(lambda x: driver_no_mapping.get(int(x)))
-    data['constructor_id'] = data['entrant'].map(lambda x: entrant_id_mapping.get(x)).astype('Int64')
-    data['number'] = data['no']
-    data['position'] = data.index + 1
-
-    data = data[[
-        'driver_id',
-        'constructor_id',
-        'number',
-        'position',
-        'q1',
-        'q2',
-        'q3'
-    ]]
-
-    data.to_csv("csv/qualifying.csv", index=False)
-    logger.info("----- CSV file created for qualifying -----")
-
-def create_sprint_results():
-    data = parse_sprint_final_classification("data/sprint_classification.pdf")
-    
-    data = data.reset_index(drop=True)
-    data['driver_id'] = data['driver_no'].map(lambda x: driver_no_mapping.get(int(x)))
-    data['constructor_id'] = data['entrant'].map(lambda x: entrant_id_mapping.get(x))
-    data['position'] = data.index + 1
-
-    data['position_text'] = data['position']
-    is_dnf = data["gap"].astype(str).str.strip().eq("DNF")
-    data.loc[is_dnf, "position_text"] = "R"
-
-    data['position_order'] = data['position']
-    data["milliseconds"] = data['time'].apply(to_ms_safe).astype('Int64')
-    data.loc[1:, "time"] = data.loc[1:, "gap"]
-
-    data['fastest_lap'] = data['on']
-    data['fastest_lap_time'] = data['fastest']
-
-    data = data[[
-        'driver_id',
-        'constructor_id',
-        'driver_no',
-        'position',
-        'position_text',
-        'position_order',
-        'points',
-        'laps',
-        'time',
-        'milliseconds',
-        'fastest_lap',
-        'fastest_lap_time',
-    ]]
-
-    data.to_csv("csv/sprint_results.csv", index=False)
-
-    logger.info("----- CSV file created for sprint results -----")
-
-
-def create_sprint_classification():
-    data = parse_sprint_final_classification("data/sprint_classification.pdf")
-    data.to_csv("csv/sprint_classification.csv", index=False)
-
-    logger.info("----- CSV file created for sprint classification -----")
-    return
+        failed = fetcher.wait()
+        if failed:
+            raise RuntimeError(f"could not download {len(failed)} document(s)")
 
 def snake_case(s: str) -> str:
     return '_'.join(
@@ -491,49 +175,482 @@ def kebab_case(s: str) -> str:
     lambda mo: ' ' + mo.group(0).lower(), s)).split())
 
 
-if __name__ == "__main__":
-    # Configure logger
-    logging.basicConfig(format='%(levelname)s: %(message)s', level=logging.INFO)
-    # Get season, race_name and is_sprint from stdin
-    season = sys.argv[1]
-    race_name = sys.argv[2]
-
-    # Load grand prix file and change race name to FIA race name
+def fia_race_name(race_name: str) -> str:
+    """Get the FIA name of a grand prix from grand_prix.json"""
     with open('grand_prix.json', 'r') as gp_file:
         gp = json.load(gp_file)
-        if race_name in gp:
-            race_name = gp[race_name]
-        else:
-            logger.warning("unable to find key %s in grand prix list", sys.argv[2])
-            logger.warning("trying to perform action still...")
+
+    if race_name in gp:
+        return gp[race_name]
+
+    logger.warning("unable to find key %s in grand prix list", race_name)
+    logger.warning("trying to perform action still...")
+    return race_name
+
+def run_round(season: int, race_name: str, is_sprint: bool, out_dir: Path = Path("."),
+              workers: int = DEFAULT_WORKERS, cache_dir: Path | None = CACHE_ROOT, report: bool = False,
+              page_processes: int | None = None, table_engine: str = FIND_TABLES,
+              formats: list[str] | None = None, trace_file: Path | None = None,
+              dataset_dir: Path | None = None, stage_processes: int | None = None,
+              pipeline: bool = False, templates: Path | None = None, stage_threads: bool = False,
+              stream: bool = False):
+    """Download and parse the documents of a grand prix
+
+    :param season: The year of the season
+    :param race_name: The grand prix name, as given in grand_prix.json or by the FIA
+    :param is_sprint: Whether it is a sprint weekend
+    :param out_dir: The documents are downloaded to `out_dir/data` and the tables written to
+                    `out_dir/<format>`, e.g. `out_dir/csv`
+    :param workers: Number of documents downloaded concurrently
+    :param cache_dir: Directory of the documents and event pages cache, None to disable it
+    :param report: Log the size, duration and rate of every download
+    :param page_processes: Split the pages of the multi-page documents across this many worker
+                           processes, see `registry.PAGE_PARALLEL`
+    :param table_engine: The table engine of the documents supporting it, see `registry.TABLE_ENGINE`
+    :param formats: The formats of the tables, see `output.FORMATS`. Defaults to csv
+    :param trace_file: Write the timing spans of the downloads, parsers and csv files to this JSON
+                       trace file, see `tracing.span`
+    :param dataset_dir: Add the tables to the season dataset in this directory, see
+                        `dataset.SeasonDataset`. The round is not parsed again if it is already in the
+                        dataset with the same documents and parsers
+    :param stage_processes: Number of documents parsed at the same time, by default the number of
+                            CPUs, see `scheduler.run_stages`
+    :param pipeline: Parse every document as soon as it is downloaded, while the others are still
+                     downloading, see `pipeline_round`. With a dataset, the round is downloaded
+                     first anyway, to know if its documents changed
+    :param templates: Reuse the layout of the documents read before, kept in this file, see
+                      `parser.templates.LayoutTemplates`
+    :param stage_threads: Parse the documents in threads of this process instead of worker
+                          processes, see `scheduler.run_stages`
+    :param stream: Parse and write the multi-page documents page by page, without holding them
+                   whole (`STREAMED`). The rows of the lap times are then in the order of the
+                   history chart
+    """
+    with record_trace(trace_file) if trace_file is not None else nullcontext():
+        # Check the output before downloading anything
+        writer, dataset = round_output(out_dir, formats, dataset_dir)
+        if pipeline and dataset is None:
+            pipeline_round(season, race_name, is_sprint, out_dir, writer, workers, cache_dir, report,
+                           page_processes, table_engine, stage_processes, templates, stage_threads, stream)
+            return
+
+        download_round(season, race_name, is_sprint, out_dir, workers, cache_dir, report)
+        parse_round(season, race_name, is_sprint, out_dir, writer, dataset, page_processes, table_engine,
+                    stage_processes, templates=templates, stage_threads=stage_threads, stream=stream)
+
+def pipeline_round(season: int, race_name: str, is_sprint: bool, out_dir: Path, writer: TableWriter,
+                   workers: int = DEFAULT_WORKERS, cache_dir: Path | None = CACHE_ROOT,
+                   report: bool = False, page_processes: int | None = None,
+                   table_engine: str = FIND_TABLES, stage_processes: int | None = None,
+                   templates: Path | None = None, stage_threads: bool = False, stream: bool = False):
+    """Download and parse a grand prix at the same time, see `run_round`
+
+    The downloads run in a background thread. Every document is parsed as soon as it is written,
+    and every table is created as soon as its documents are parsed, so the network and the parsers
+    overlap instead of adding up.
+    """
+    arrivals = queue.SimpleQueue()
+
+    def download():
+        try:
+            download_round(season, race_name, is_sprint, out_dir, workers, cache_dir, report,
+                           on_downloaded=lambda filepath: arrivals.put(filepath.stem))
+        finally:
+            arrivals.put(None)
+
+    def downloaded() -> Iterator[str]:
+        # The names of the documents as they are downloaded, then the download error, if any
+        while (name := arrivals.get()) is not None:
+            yield name
+        downloading.result()
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="download") as executor:
+        downloading = executor.submit(download)
+        parse_round(season, race_name, is_sprint, out_dir, writer, None, page_processes, table_engine,
+                    stage_processes, downloaded(), templates, stage_threads, stream)
+
+def round_output(out_dir: Path, formats: list[str] | None,
+                 dataset_dir: Path | None) -> tuple[TableWriter, SeasonDataset | None]:
+    """The writer of the tables of a round, and the season dataset they are added to, if any"""
+    dataset = None
+    if dataset_dir is not None:
+        dataset = SeasonDataset(dataset_dir)
+        # The dataset is filled from the parquet files of the round
+        formats = list(formats or [CSV])
+        if PARQUET not in formats:
+            formats.append(PARQUET)
+
+    return TableWriter(out_dir, formats), dataset
+
+def download_round(season: int, race_name: str, is_sprint: bool, out_dir: Path = Path("."),
+                   workers: int = DEFAULT_WORKERS, cache_dir: Path | None = CACHE_ROOT,
+                   report: bool = False, on_downloaded: Callable[[Path], None] | None = None):
+    """Download the documents of a grand prix to `out_dir/data`, see `run_round`
+
+    :param on_downloaded: Called with the path of every document as soon as it is written, from
+                          the download threads
+    """
+    race_name = fia_race_name(race_name)
 
     # Transform race name to kebab case and snake case
     snake_race_name = snake_case(race_name)
     kebab_race_name = kebab_case(race_name)
 
-    is_sprint = sys.argv[3] == "true"
-
-    try :
-        download_files(int(season), kebab_race_name, snake_race_name, is_sprint)
+    cache = None if cache_dir is None else DocumentCache(cache_dir / "documents")
+    event_cache = None if cache_dir is None else EventPageCache(cache_dir / "events")
+
+    with span("download_files", "download"):
+        download_files(season, kebab_race_name, snake_race_name, is_sprint, workers, cache, report,
+                       event_cache, out_dir / DATA_DIR, on_downloaded)
+
+def parse_round(season: int, race_name: str, is_sprint: bool, out_dir: Path = Path("."),
+                writer: TableWriter | None = None, dataset: SeasonDataset | None = None,
+                page_processes: int | None = None, table_engine: str = FIND_TABLES,
+                stage_processes: int | None = None, arrivals: Iterable[str] | None = None,
+                templates: Path | None = None, stage_threads: bool = False, stream: bool = False):
+    """Parse the documents of a grand prix found in `out_dir/data`, see `run_round`
+
+    :param writer: The writer of the tables, by default the csv files are written to `out_dir/csv`
+    :param dataset: The season dataset the tables are added to, see `round_output`
+    :param arrivals: The names of the documents as they are downloaded, when they are parsed while
+                     they download, see `pipeline_round`. The dataset needs every document first
+    """
+    from f1_data_downloader.registry import PARSERS, DocumentRegistry
+
+    snake_race_name = snake_case(fia_race_name(race_name))
+    data_dir = out_dir / DATA_DIR
+    if writer is None:
+        writer = TableWriter(out_dir)
+
+    if dataset is not None:
+        documents = [name for name in PARSERS if is_sprint or not name.startswith("sprint_")]
+        inputs = hash_inputs(data_dir, documents)
+        if dataset.is_current(season, snake_race_name, inputs):
+            logger.info(f"{season} {snake_race_name} is up to date in the dataset {dataset.root}, "
+                        f"not parsed again")
+            return
+
+    logger.info("----- Parsing file -----")
+
+    # Every document is parsed once, even if several csv files are created from it, and the stages
+    # run as soon as their documents are parsed
+    registry = DocumentRegistry(data_dir, page_processes=page_processes, table_engine=table_engine,
+                                templates=templates)
+    schedule = run_stages(round_stages(is_sprint, stream), registry, writer, stage_processes, arrivals,
+                          threads=stage_threads, streamed=STREAMED if stream else ())
+
+    registry.log_report()
+    log_schedule(schedule)
+
+    if dataset is not None:
+        dataset.add_round(season, snake_race_name, out_dir / PARQUET, writer.written, inputs)
+
+def run_batch_round(season: int, race_name: str, is_sprint: bool, out_dir: Path,
+                    workers: int, cache_dir: Path | None, report: bool,
+                    page_processes: int | None = None, table_engine: str = FIND_TABLES,
+                    formats: list[str] | None = None, dataset_dir: Path | None = None,
+                    stage_processes: int | None = None, pipeline: bool = False,
+                    templates: Path | None = None, stage_threads: bool = False,
+                    stream: bool = False) -> dict:
+    """Run a round in a batch worker, errors are reported in the summary instead of raised"""
+    summary = round_summary(season, race_name, is_sprint, out_dir)
+    round_dir = Path(summary["output"])
+
+    start = time.perf_counter()
+    try:
+        run_round(season, race_name, is_sprint, round_dir, workers, cache_dir, report, page_processes,
+                  table_engine, formats, dataset_dir=dataset_dir, stage_processes=stage_processes,
+                  pipeline=pipeline, templates=templates, stage_threads=stage_threads, stream=stream)
+    except Exception as e:
+        logger.error(f"{season} {race_name} failed: {e}")
+        logger.error(traceback.format_exc())
+        summary["status"] = "failed"
+        summary["error"] = f"{type(e).__name__}: {e}"
+    summary["seconds"] = round(time.perf_counter() - start, 2)
+    return summary
+
+def round_summary(season: int, race_name: str, is_sprint: bool, out_dir: Path) -> dict:
+    """The summary of a round of a batch, before it runs"""
+    return {
+        "season": season,
+        "grand_prix": race_name,
+        "is_sprint": is_sprint,
+        "output": str(out_dir / str(season) / snake_case(fia_race_name(race_name))),
+        "status": "ok",
+        "error": None,
+    }
 
-        logger.info("----- Parsing file -----")
+def run_batch(rounds: list[tuple[int, str, bool]], out_dir: Path, processes: int | None = None,
+              workers: int = DEFAULT_WORKERS, cache_dir: Path | None = CACHE_ROOT,
+              report: bool = False, page_processes: int | None = None,
+              table_engine: str = FIND_TABLES, formats: list[str] | None = None,
+              dataset_dir: Path | None = None, stage_processes: int | None = 1,
+              pipeline: bool = False, templates: Path | None = None,
+              stage_threads: bool = False, stream: bool = False) -> list[dict]:
+    """Process several rounds in parallel worker processes
+
+    Each round is written to `out_dir/<season>/<race_name>/` and a failing round does not stop the
+    others. A summary of every round is written to `out_dir/summary.json`, a failed one too when its
+    worker process died: its seconds are then counted from the start of the batch.
+
+    :param rounds: The (season, grand prix name, is_sprint) of every round
+    :param out_dir: The output directory
+    :param processes: Number of rounds processed at the same time, defaults to the number of CPUs
+    :param stage_processes: Number of documents of a round parsed at the same time. The rounds
+                            already run in parallel, so it defaults to 1
+    :return: The summary of every round, in the order of `rounds`
+    """
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(run_batch_round, season, race_name, is_sprint, out_dir, workers, cache_dir,
+                            report, page_processes, table_engine, formats, dataset_dir, stage_processes,
+                            pipeline, templates, stage_threads, stream)
+            for season, race_name, is_sprint in rounds
+        ]
+        summaries = []
+        for (season, race_name, is_sprint), future in zip(rounds, futures):
+            try:
+                summaries.append(future.result())
+            except Exception as e:
+                # The worker died (segfault, killed, ...), and the pool with it
+                logger.error(f"{season} {race_name} failed: {e}")
+                summary = round_summary(season, race_name, is_sprint, out_dir)
+                summary["status"] = "failed"
+                summary["error"] = f"{type(e).__name__}: {e}"
+                summary["seconds"] = round(time.perf_counter() - start, 2)
+                summaries.append(summary)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "summary.json").write_text(json.dumps(summaries, indent=2))
+
+    logger.info("----- Batch summary -----")
+    for summary in summaries:
+        status = "OK" if summary["status"] == "ok" else f"FAILED ({summary['error']})"
+        logger.info(f"{summary['season']} {summary['grand_prix']}: {status} in {summary['seconds']}s")
+
+    return summaries
+
+def read_rounds_file(filepath: Path) -> list[tuple[int, str, bool]]:
+    """Read a file of rounds, one `season,grand prix[,true]` line per round
+
+    Empty lines and lines starting with "#" are ignored.
+    """
+    rounds = []
+    with open(filepath, newline="") as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip() or row[0].lstrip().startswith("#"):
+                continue
+            if len(row) < 2:
+                raise ValueError(f"expected `season,grand prix[,is_sprint]`, got {','.join(row)}")
+            is_sprint = len(row) > 2 and row[2].strip() == "true"
+            rounds.append((int(row[0]), row[1].strip(), is_sprint))
+    return rounds
 
-        # Ensures csv folder exists
-        filepath = Path(f"csv")
-        filepath.mkdir(parents=True, exist_ok=True)
+def season_rounds(season: int, sprints: list[str]) -> list[tuple[int, str, bool]]:
+    """The rounds of the grand prix of grand_prix.json whose name has the year of `season`
 
-        create_constructor_results()
-        create_constructor_standings()
-        create_results()
-        create_driver_standings()
-        create_lap_times(is_sprint)
-        create_pit_stops()
-        create_qualifying()
+    :param sprints: The grand prix that are sprint weekends
+    """
+    with open('grand_prix.json', 'r') as gp_file:
+        race_names = [race_name for race_name in json.load(gp_file) if search(rf"\b{season}\b", race_name)]
+    if not race_names:
+        raise ValueError(f"no grand prix of {season} in grand_prix.json, use --rounds")
+    return [(season, race_name, race_name in sprints) for race_name in race_names]
+
+def add_download_arguments(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                            help="Number of documents downloaded concurrently")
+    arg_parser.add_argument("--cache-dir", type=Path, default=CACHE_ROOT,
+                            help="Directory of the documents and event pages cache")
+    arg_parser.add_argument("--no-cache", action="store_true", help="Always download every document")
+    arg_parser.add_argument("--report-transfers", action="store_true",
+                            help="Log the size, duration and rate of every download")
+
+def add_parse_arguments(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument("--page-processes", type=int, default=None,
+                            help="Split the pages of the history charts, lap charts and championships "
+                                 "across this many worker processes")
+    arg_parser.add_argument("--table-engine", choices=TABLE_ENGINES, default=FIND_TABLES,
+                            help="How the tables of the classifications and history charts are read: "
+                                 "PyMuPDF's find_tables, or the faster bucketing of the words, which "
+                                 "falls back to find_tables for a table it cannot read")
+    arg_parser.add_argument("--format", dest="formats", choices=FORMATS, action="append", default=None,
+                            help="Format of the tables, csv (default), parquet or arrow, written to a "
+                                 "directory of the same name. Repeat it for several formats. parquet and "
+                                 "arrow need pyarrow, the arrow extra of the package")
+    arg_parser.add_argument("--dataset", type=Path, default=None, metavar="DIR",
+                            help="Also add the tables to the season dataset in DIR, partitioned by season "
+                                 "and round. A round already there with the same documents and parsers "
+                                 "is not parsed again. Needs pyarrow, the arrow extra of the package")
+    arg_parser.add_argument("--stage-processes", type=int, default=None,
+                            help="Number of documents parsed at the same time in worker processes, the "
+                                 "tables are created as soon as their documents are parsed (default: "
+                                 "number of CPUs, 1 in a batch)")
+    arg_parser.add_argument("--stage-threads", action="store_true",
+                            help="Parse the documents in threads of the main process instead of worker "
+                                 "processes, the calls to PyMuPDF taking turns")
+    arg_parser.add_argument("--stream", action="store_true",
+                            help="Parse and write the history charts and championships page by page, "
+                                 "without holding them whole. The lap times are then in the order of the "
+                                 "history chart instead of sorted by driver")
+    arg_parser.add_argument("--layout-templates", type=Path, default=LAYOUT_TEMPLATES, metavar="FILE",
+                            help="File of the layouts found in the classifications and history charts, "
+                                 "reused for the documents of the same layout instead of searching their "
+                                 "headers again")
+    arg_parser.add_argument("--no-layout-templates", action="store_true",
+                            help="Find the layout of every document")
+
+def layout_templates(args: argparse.Namespace) -> Path | None:
+    """The layout templates file of the command line, None with --no-layout-templates"""
+    return None if args.no_layout_templates else args.layout_templates
+
+def add_pipeline_argument(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument("--pipeline", action="store_true",
+                            help="Parse every document as soon as it is downloaded, while the others are "
+                                 "still downloading (not with --dataset)")
+
+def batch_main(argv: list[str]):
+    arg_parser = argparse.ArgumentParser(prog="main.py batch",
+                                         description="Download and parse several grand prix in parallel")
+    source = arg_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--season", type=int,
+                        help="Process every grand prix of grand_prix.json whose name has this year")
+    source.add_argument("--rounds", type=Path, help="File of `season,grand prix[,true]` lines")
+    arg_parser.add_argument("--sprint", action="append", default=[],
+                            help="With --season, a grand prix that is a sprint weekend (repeatable)")
+    arg_parser.add_argument("--output-dir", type=Path, default=Path("out"),
+                            help="Every round is written to OUTPUT_DIR/<season>/<grand prix>/")
+    arg_parser.add_argument("--processes", type=int, default=None,
+                            help="Number of rounds processed at the same time (default: number of CPUs)")
+    add_download_arguments(arg_parser)
+    add_parse_arguments(arg_parser)
+    add_pipeline_argument(arg_parser)
+    args = arg_parser.parse_args(argv)
+
+    if args.rounds is not None:
+        rounds = read_rounds_file(args.rounds)
+    else:
+        try:
+            rounds = season_rounds(args.season, args.sprint)
+        except ValueError as e:
+            arg_parser.error(str(e))
+
+    summaries = run_batch(rounds, args.output_dir, args.processes, args.workers,
+                          None if args.no_cache else args.cache_dir, args.report_transfers,
+                          args.page_processes, args.table_engine, args.formats, args.dataset,
+                          args.stage_processes or 1, args.pipeline, layout_templates(args),
+                          args.stage_threads, args.stream)
+
+    if any(summary["status"] != "ok" for summary in summaries):
+        exit(1)
 
-        if is_sprint:
-            logger.info("----- Handling sprint weekend -----")
-            
+def add_round_arguments(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument("season", type=int, help="The year of the season")
+    arg_parser.add_argument("race_name", help="The grand prix name")
+    arg_parser.add_argument("is_sprint", nargs="?", default="false", help="\"true\" for a sprint weekend")
+    arg_parser.add_argument("--output-dir", type=Path, default=Path("."),
+                            help="The documents are in OUTPUT_DIR/data and the tables in OUTPUT_DIR/<format>")
+
+def add_run_arguments(arg_parser: argparse.ArgumentParser):
+    arg_parser.add_argument("--trace", type=Path, default=None, metavar="FILE",
+                            help="Write the timing spans of the downloads, parsers and csv files to "
+                                 "this JSON trace file (chrome://tracing, Perfetto)")
+    arg_parser.add_argument("--profile", type=Path, default=None, metavar="PREFIX",
+                            help="Profile the run with cProfile, writing PREFIX.pstats and the "
+                                 "collapsed stacks for flame graphs to PREFIX.collapsed. The documents "
+                                 "are then parsed in the main thread, one after another")
+
+def run_command(args: argparse.Namespace, command, *command_args):
+    """Run a command with the --trace and --profile options, exit with 1 if it fails"""
+    try :
+        with (profile(args.profile) if args.profile is not None else nullcontext(),
+              record_trace(args.trace) if args.trace is not None else nullcontext()):
+            command(*command_args)
     except Exception as e:
         logger.error(e)
-        logger.error(traceback.format_exc()) 
+        logger.error(traceback.format_exc())
         exit(1)
+
+def parse_in_main_thread(args: argparse.Namespace):
+    """With --profile, parse the documents one after another in the main thread
+
+    cProfile only sees the thread that enabled it: the parsers running in worker processes or
+    threads would be missing from the profile.
+    """
+    if args.profile is None:
+        return
+    if args.stage_processes != 1 or args.stage_threads or (args.page_processes or 1) > 1:
+        logger.info("--profile: parsing the documents in the main thread, without workers")
+    args.stage_processes, args.stage_threads, args.page_processes = 1, False, None
+
+def round_main(argv: list[str]):
+    # Get season, race_name and is_sprint from the command line
+    arg_parser = argparse.ArgumentParser(description="Download and parse the FIA documents of a grand prix",
+                                         epilog="Use `main.py batch --help` to process several grand prix, "
+                                                "`main.py download --help` and `main.py parse --help` to "
+                                                "only download or only parse a grand prix")
+    add_round_arguments(arg_parser)
+    add_download_arguments(arg_parser)
+    add_parse_arguments(arg_parser)
+    add_pipeline_argument(arg_parser)
+    add_run_arguments(arg_parser)
+    args = arg_parser.parse_args(argv)
+    parse_in_main_thread(args)
+
+    run_command(args, run_round, args.season, args.race_name, args.is_sprint == "true", args.output_dir,
+                args.workers, None if args.no_cache else args.cache_dir, args.report_transfers,
+                args.page_processes, args.table_engine, args.formats, None, args.dataset,
+                args.stage_processes, args.pipeline, layout_templates(args), args.stage_threads, args.stream)
+
+def download_main(argv: list[str]):
+    arg_parser = argparse.ArgumentParser(prog="main.py download",
+                                         description="Download the FIA documents of a grand prix to "
+                                                     "OUTPUT_DIR/data, without parsing them")
+    add_round_arguments(arg_parser)
+    add_download_arguments(arg_parser)
+    add_run_arguments(arg_parser)
+    args = arg_parser.parse_args(argv)
+
+    run_command(args, download_round, args.season, args.race_name, args.is_sprint == "true",
+                args.output_dir, args.workers, None if args.no_cache else args.cache_dir,
+                args.report_transfers)
+
+def parse_main(argv: list[str]):
+    arg_parser = argparse.ArgumentParser(prog="main.py parse",
+                                         description="Parse the FIA documents of a grand prix already in "
+                                                     "OUTPUT_DIR/data, e.g. by `main.py download`")
+    add_round_arguments(arg_parser)
+    add_parse_arguments(arg_parser)
+    add_run_arguments(arg_parser)
+    args = arg_parser.parse_args(argv)
+    parse_in_main_thread(args)
+
+    def parse():
+        writer, dataset = round_output(args.output_dir, args.formats, args.dataset)
+        parse_round(args.season, args.race_name, args.is_sprint == "true", args.output_dir, writer,
+                    dataset, args.page_processes, args.table_engine, args.stage_processes,
+                    templates=layout_templates(args), stage_threads=args.stage_threads, stream=args.stream)
+
+    run_command(args, parse)
+
+# Subcommands, the default is to download and parse a grand prix (`round_main`)
+COMMANDS = {
+    "batch": batch_main,
+    "download": download_main,
+    "parse": parse_main,
+}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        # Configure logger, the rounds are logged from several processes
+        logging.basicConfig(format='%(processName)s %(levelname)s: %(message)s', level=logging.INFO)
+        batch_main(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        logging.basicConfig(format='%(levelname)s: %(message)s', level=logging.INFO)
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+    else:
+        # Configure logger
+        logging.basicConfig(format='%(levelname)s: %(message)s', level=logging.INFO)
+        round_main(sys.argv[1:])
@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+from contextlib import ExitStack
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+import logging
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Output formats, each written to its own directory of the round, e.g. `csv/results.csv`
+CSV = "csv"
+PARQUET = "parquet"
+ARROW = "arrow"  # Arrow IPC file, a.k.a. Feather v2
+FORMATS = [CSV, PARQUET, ARROW]
+
+EXTENSIONS = {CSV: "csv", PARQUET: "parquet", ARROW: "arrow"}
+
+# The columns of every table and their dtype. "Int64", "Float64" and "boolean" are the nullable
+# pandas dtypes, stored as int64, float64 and bool columns with nulls in Parquet/Arrow
+SCHEMAS: dict[str, dict[str, str]] = {
+    "results": {
+        "driver_id": "Int64",
+        "constructor_id": "Int64",
+        "driver_number": "Int64",
+        "position": "Int64",
+        "position_text": "string",
+        "position_order": "Int64",
+        "points": "Float64",
+        "laps": "Int64",
+        "time": "string",
+        "milliseconds": "Int64",
+        "fastest_lap": "Int64",
+        "fastest_lap_time": "string",
+        "rank": "Int64",
+        "fastest_lap_speed": "Float64",
+        "grid": "Int64",
+    },
+    "lap_times": {
+        "driver_id": "Int64",
+        "lap": "Int64",
+        "position": "Int64",
+        "time": "string",
+        "milliseconds": "Int64",
+        "gap_ms": "Int64",
+        "laps_down": "Int64",
+        "in_pit": "boolean",
+    },
+    "sprint_lap_times": {
+        "driver_id": "Int64",
+        "lap": "Int64",
+        "position": "Int64",
+        "time": "string",
+        "milliseconds": "Int64",
+        "gap_ms": "Int64",
+        "laps_down": "Int64",
+        "in_pit": "boolean",
+    },
+    "pit_stops": {
+        "driver_id": "Int64",
+        "stop": "Int64",
+        "lap": "Int64",
+        "time": "string",
+        "duration": "string",
+        "milliseconds": "Int64",
+    },
+    "qualifying": {
+        "driver_id": "Int64",
+        "constructor_id": "Int64",
+        "number": "Int64",
+        "position": "Int64",
+        "q1": "string",
+        "q2": "string",
+        "q3": "string",
+    },
+    "driver_standings": {
+        "driver_id": "Int64",
+        "points": "Float64",
+        "position": "Int64",
+        "position_text": "string",
+        "wins": "Int64",
+    },
+    "constructor_standings": {
+        "constructor_id": "Int64",
+        "points": "Float64",
+        "position": "Int64",
+        "position_text": "string",
+        "wins": "Int64",
+    },
+    "constructor_results": {
+        "constructor_id": "Int64",
+        "points": "Float64",
+    },
+    "sprint_results": {
+        "driver_id": "Int64",
+        "constructor_id": "Int64",
+        "driver_no": "Int64",
+        "position": "Int64",
+        "position_text": "string",
+        "position_order": "Int64",
+        "points": "Float64",
+        "laps": "Int64",
+        "time": "string",
+        "milliseconds": "Int64",
+        "fastest_lap": "Int64",
+        "fastest_lap_time": "string",
+    },
+    "sprint_classification": {
+        "driver_no": "Int64",
+        "laps": "Int64",
+        "time": "string",
+        "gap": "string",
+        "fastest": "string",
+        "on": "Int64",
+        "points": "Float64",
+    },
+}
+
+
+def import_pyarrow():
+    """Import pyarrow, which is only needed for the Parquet and Arrow formats"""
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The parquet and arrow formats and the dataset need pyarrow, install the "
+                          "arrow extra: `pip install f1-data-downloader[arrow]`") from e
+    return pyarrow
+
+
+def arrow_schema(name: str):
+    """The `pyarrow.Schema` of the table `name`, see `SCHEMAS`"""
+    pa = import_pyarrow()
+    types = {"Int64": pa.int64(), "Float64": pa.float64(), "boolean": pa.bool_(), "string": pa.string()}
+    return pa.schema([(column, types[dtype]) for column, dtype in SCHEMAS[name].items()])
+
+
+def apply_schema(data: pd.DataFrame, name: str) -> pd.DataFrame:
+    """Cast the columns of the table `name` to the dtypes of its schema
+
+    The parsers give strings for most columns. Empty strings become nulls, and so do the values
+    that are not numbers in a numeric column, with a warning.
+
+    :param data: The table, with the columns of the schema in any order
+    :param name: The name of the table, see `SCHEMAS`
+    :return: The typed table, with the columns in the order of the schema
+    """
+    import pandas as pd
+
+    schema = SCHEMAS[name]
+    missing = [column for column in schema if column not in data.columns]
+    if missing:
+        raise ValueError(f"{name} has no column {', '.join(missing)}")
+
+    columns = {}
+    for column, dtype in schema.items():
+        values = data[column]
+        if dtype == "string":
+            values = values.astype("string")
+        elif values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            text = values.astype("string").str.strip().replace("", pd.NA)
+            values = pd.to_numeric(text, errors="coerce")
+            invalid = values.isna() & text.notna()
+            if invalid.any():
+                logger.warning(f"{name}.{column}: {invalid.sum()} value(s) are not numbers, e.g. "
+                               f"{text[invalid].iloc[0]!r}, they are written as nulls")
+        columns[column] = values.astype(dtype)
+    return pd.DataFrame(columns, index=data.index).reset_index(drop=True)
+
+
+def write_csv(data: pd.DataFrame, filepath: Path, name: str):
+    data.to_csv(filepath, index=False)
+
+
+def write_parquet(data: pd.DataFrame, filepath: Path, name: str):
+    pa = import_pyarrow()
+    table = pa.Table.from_pandas(apply_schema(data, name), schema=arrow_schema(name), preserve_index=False)
+    pa.parquet.write_table(table, filepath)
+
+
+def write_arrow(data: pd.DataFrame, filepath: Path, name: str):
+    pa = import_pyarrow()
+    table = pa.Table.from_pandas(apply_schema(data, name), schema=arrow_schema(name), preserve_index=False)
+    pa.feather.write_feather(table, filepath, compression="uncompressed")
+
+
+WRITERS = {CSV: write_csv, PARQUET: write_parquet, ARROW: write_arrow}
+
+
+def batch_schema(data: pd.DataFrame):
+    """The `pyarrow.Schema` of a batch of a parsed document, the categories stored as strings
+
+    Every batch has its own categories, the Parquet and Arrow files hold one schema.
+    """
+    pa = import_pyarrow()
+    schema = pa.Schema.from_pandas(data, preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_dictionary(field.type):
+            schema = schema.set(i, field.with_type(field.type.value_type))
+    return schema
+
+
+class BatchFile:
+    """A file written one batch of rows at a time, only one batch is held at a time
+
+    With the `name` of a table, the Parquet and Arrow files have the schema of the table
+    (`SCHEMAS`), as written by `TableWriter`. Otherwise the columns of the file are those of the
+    first batch (`batch_schema`). The CSV files are written as they are, the index is not written.
+
+    The file is written by the `with` block:
+
+        with BatchFile(filepath, PARQUET, "lap_times") as file:
+            for data in batches:
+                file.write(data)
+    """
+
+    def __init__(self, filepath: Path, fmt: str = CSV, name: str | None = None):
+        if fmt not in WRITERS:
+            raise ValueError(f"unknown output format {fmt}, expected one of {FORMATS}")
+
+        self.filepath = Path(filepath)
+        self.fmt = fmt
+        self.name = name
+        self.rows = 0
+        # The open csv file, or the pyarrow writer, once the first batch is written
+        self.file = None
+        self.schema = None
+
+    def __enter__(self) -> "BatchFile":
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        if self.fmt == CSV:
+            self.file = open(self.filepath, "w", newline="")
+        return self
+
+    def __exit__(self, *exc):
+        if self.file is None and self.name is not None:
+            # No batch, the table is empty
+            self.open_arrow(arrow_schema(self.name))
+        if self.file is not None:
+            self.file.close()
+
+    def open_arrow(self, schema):
+        pa = import_pyarrow()
+        self.schema = schema
+        self.file = (pa.parquet.ParquetWriter(self.filepath, schema) if self.fmt == PARQUET
+                     else pa.ipc.new_file(self.filepath, schema))
+
+    def write(self, data: pd.DataFrame):
+        """Write the next rows, with the same columns as the others"""
+        if self.fmt == CSV:
+            data.to_csv(self.file, header=self.rows == 0, index=False)
+        else:
+            pa = import_pyarrow()
+            if self.schema is not None:
+                schema = self.schema
+            elif self.name is not None:
+                schema = arrow_schema(self.name)
+            else:
+                schema = batch_schema(data)
+            if self.name is not None:
+                data = apply_schema(data, self.name)
+            table = pa.Table.from_pandas(data, schema=schema, preserve_index=False)
+            if self.file is None:
+                # With the pandas metadata of the table, as in the files of `TableWriter.write`
+                self.open_arrow(table.schema)
+            self.file.write_table(table)
+        self.rows += len(data)
+
+
+def write_batches(batches: Iterable[pd.DataFrame], filepath: Path, fmt: str = CSV) -> int:
+    """Write a parsed document batch by batch, e.g. the pages of `iter_race_history_chart`
+
+    :param batches: The dataframes, with the same columns
+    :param filepath: The file to write
+    :param fmt: `CSV`, `PARQUET` or `ARROW`
+    :return: The number of rows written
+    """
+    with BatchFile(filepath, fmt) as file:
+        for data in batches:
+            file.write(data)
+    return file.rows
+
+
+class TableWriter:
+    """Write the tables of a round in one or more formats
+
+    Every format goes to its own directory under `out_dir`: `csv/results.csv`,
+    `parquet/results.parquet`, `arrow/results.arrow`. The CSV files are written as they are, the
+    Parquet and Arrow files with the schema of the table (`SCHEMAS`).
+    """
+
+    def __init__(self, out_dir: Path, formats: list[str] | None = None):
+        self.out_dir = Path(out_dir)
+        self.formats = [CSV] if formats is None else list(formats)
+
+        unknown = [fmt for fmt in self.formats if fmt not in WRITERS]
+        if unknown:
+            raise ValueError(f"unknown output format {', '.join(unknown)}, expected one of {FORMATS}")
+        if any(fmt != CSV for fmt in self.formats):
+            # Fail before anything is downloaded or parsed
+            import_pyarrow()
+
+        # The tables written by this writer, in order
+        self.written: list[str] = []
+
+    def path(self, name: str, fmt: str) -> Path:
+        return self.out_dir / fmt / f"{name}.{EXTENSIONS[fmt]}"
+
+    def write(self, name: str, data: pd.DataFrame):
+        """Write the table `name` in every format"""
+        for fmt in self.formats:
+            filepath = self.path(name, fmt)
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            WRITERS[fmt](data, filepath, name)
+        if name not in self.written:
+            self.written.append(name)
+
+    def write_batches(self, name: str, batches: Iterable[pd.DataFrame]):
+        """Write the table `name` in every format, one batch of rows at a time, see `BatchFile`
+
+        The batches are written to every format as they come, so the table is never held whole.
+        """
+        with ExitStack() as stack:
+            files = [stack.enter_context(BatchFile(self.path(name, fmt), fmt, name)) for fmt in self.formats]
+            for data in batches:
+                for file in files:
+                    file.write(data)
+        if name not in self.written:
+            self.written.append(name)
+
+
+def to_pandas(table) -> pd.DataFrame:
+    """Convert a `pyarrow.Table` of a schema to a dataframe with the dtypes of `SCHEMAS`"""
+    import pandas as pd
+
+    pa = import_pyarrow()
+    types = {pa.int64(): pd.Int64Dtype(), pa.float64(): pd.Float64Dtype(), pa.bool_(): pd.BooleanDtype(),
+             pa.string(): pd.StringDtype()}
+    return table.to_pandas(types_mapper=types.get)
+
+
+def read_arrow_table(filepath: Path):
+    """Read a Parquet or Arrow file written by `TableWriter` as a `pyarrow.Table`"""
+    pa = import_pyarrow()
+    if Path(filepath).suffix == f".{EXTENSIONS[ARROW]}":
+        return pa.feather.read_table(filepath)
+    return pa.parquet.read_table(filepath)
+
+
+def read_table(filepath: Path) -> pd.DataFrame:
+    """Read a Parquet or Arrow file written by `TableWriter`, with the dtypes of its schema"""
+    return to_pandas(read_arrow_table(filepath))
+
+
+def read_rounds(round_dirs: list[Path], name: str, fmt: str = PARQUET) -> pd.DataFrame:
+    """Read the table `name` of several rounds into one dataframe, e.g. the lap times of a season
+
+    The columnar files are read as they are, nothing is parsed or inferred.
+
+    :param round_dirs: The output directories of the rounds, e.g. the `<season>/<grand prix>`
+                       directories of a batch. The rounds without the table are skipped
+    :param name: The name of the table, see `SCHEMAS`
+    :param fmt: `PARQUET` or `ARROW`
+    :return: The rows of every round, with a "round" column holding the name of its directory
+    """
+    pa = import_pyarrow()
+    tables = []
+    for round_dir in map(Path, round_dirs):
+        filepath = round_dir / fmt / f"{name}.{EXTENSIONS[fmt]}"
+        if filepath.exists():
+            table = read_arrow_table(filepath)
+            tables.append(table.append_column("round", pa.array([round_dir.name] * len(table), pa.string())))
+
+    if not tables:
+        raise FileNotFoundError(f"no {fmt} file of {name} in the {len(round_dirs)} round(s)")
+    return to_pandas(pa.concat_tables(tables))
@@ -0,0 +1,153 @@
+import re
+import statistics
+
+import pymupdf as fitz
+import pandas as pd
+
+from f1_data_downloader.parser.engines import BUCKETS, FIND_TABLES, TABLE_ENGINES  # noqa: F401
+from f1_data_downloader.parser.page_text import Word
+
+CAR_NO = re.compile(r"^\d{1,3}$")
+LAP_TIME = re.compile(r"^(\d+:)?\d{1,2}:\d{2}\.\d{3}$")
+GAP = re.compile(r"^(|PIT|\d+ LAPS?|(\d+:)?\d+\.\d{3})$")
+
+
+class BucketError(ValueError):
+    """The words could not be bucketed into a table that passes the validation"""
+
+
+def center_in(w: Word, clip: fitz.Rect) -> bool:
+    x, y = (w[0] + w[2]) / 2, (w[1] + w[3]) / 2
+    return clip.x0 <= x < clip.x1 and clip.y0 <= y < clip.y1
+
+
+def bucket_rows(words: list[Word]) -> list[list[Word]]:
+    """Group words into rows, by their vertical center
+
+    A word starts a new row when its vertical center is more than half a line height below the
+    center of the current row.
+
+    :return: The rows, from top to bottom, each with its words from left to right
+    """
+    if not words:
+        return []
+
+    tolerance = statistics.median(w[3] - w[1] for w in words) / 2
+
+    rows = []
+    center = None
+    for w in sorted(words, key=lambda w: (w[1] + w[3]) / 2):
+        y = (w[1] + w[3]) / 2
+        if center is None or y - center > tolerance:
+            rows.append([])
+            center = y
+        rows[-1].append(w)
+    return [sorted(row, key=lambda w: w[0]) for row in rows]
+
+
+def bucket_cells(row: list[Word], edges: list[float]) -> list[str]:
+    """Put the words of a row in the columns delimited by `edges`, by their horizontal center
+
+    :return: The text of every cell, the words of a cell are joined with a space
+    """
+    cells = [[] for _ in range(len(edges) - 1)]
+    for w in row:
+        x = (w[0] + w[2]) / 2
+        for i in range(len(edges) - 1):
+            if edges[i] <= x < edges[i + 1]:
+                cells[i].append(w[4])
+                break
+    return [" ".join(cell) for cell in cells]
+
+
+def bucket_table(words: list[Word], edges: list[float], clip: fitz.Rect | tuple | None = None) -> list[list[str]]:
+    """Bucket words into the cells of a fixed-column grid
+
+    FIA tables are grids whose columns are known from the positions of their headers, so there is
+    no need to look for the ruling lines of the page like `find_tables` does: every word goes to
+    the column its horizontal center falls into, and to the row of the words on the same line.
+
+    :param words: The words of the page, see `PageText.words`
+    :param edges: The x-positions delimiting the columns, from left to right. n + 1 edges give n
+                  columns
+    :param clip: Only use the words whose center is in this rectangle
+    :return: The text of every cell, row by row. An empty cell is ""
+    """
+    if clip is not None:
+        clip = fitz.Rect(clip)
+        words = [w for w in words if center_in(w, clip)]
+
+    table = [bucket_cells(row, edges) for row in bucket_rows(words)]
+    return [cells for cells in table if any(cells)]
+
+
+def bucket_classification(words: list[Word], edges: list[float], clip: fitz.Rect,
+                          columns: list[str]) -> pd.DataFrame:
+    """Bucket a classification table (race, sprint)
+
+    The first row should be the header row, i.e. hold exactly `columns`, and every other row a car
+    No. in its first column. The "NOT CLASSIFIED" title row is skipped.
+
+    :param words: The words of the page
+    :param edges: The x-positions delimiting the columns, see `bucket_table`
+    :param clip: The table area
+    :param columns: The column names
+    :return: A dataframe of `columns`, one row per car
+    """
+    table = bucket_table(words, edges, clip)
+    if not table or [cell.upper() for cell in table[0]] != [c.upper() for c in columns]:
+        raise BucketError(f"expected a {columns} header, got {table[0] if table else 'no text'}")
+
+    rows = []
+    for cells in table[1:]:
+        if CAR_NO.match(cells[0]):
+            rows.append(cells)
+        elif " ".join(cells).strip().upper().startswith("NOT CLASSIFIED"):
+            continue
+        else:
+            # E.g. a name on two lines, that `find_tables` keeps in one cell
+            raise BucketError(f"unexpected row {cells}")
+
+    if not rows:
+        raise BucketError("no car found")
+    return pd.DataFrame(rows, columns=columns)
+
+
+def bucket_lap_table(words: list[Word], clip: fitz.Rect) -> tuple[list[str], list[list[str]]]:
+    """Bucket a lap table of a history chart: a "LAP x", "GAP", "TIME" header above the cars
+
+    The columns are split halfway between the headers. The table ends at the first row that is not
+    a car, e.g. the footer of the page.
+
+    :param words: The words of the page
+    :param clip: The area of the lap table, from its header to the bottom of the page
+    :return: The header cells, and the [driver No., gap, time] cells of the cars in their order
+    """
+    clip = fitz.Rect(clip)
+    rows = bucket_rows([w for w in words if center_in(w, clip)])
+    if not rows:
+        raise BucketError("no text in the lap table")
+
+    header = rows[0]
+    names = [w[4].upper() for w in header]
+    if "GAP" not in names or "TIME" not in names or names.index("GAP") == 0:
+        raise BucketError(f"expected a LAP x, GAP, TIME header, got {names}")
+    gap = header[names.index("GAP")]
+    time = header[names.index("TIME")]
+    lap = header[names.index("GAP") - 1]
+    edges = [clip.x0, (lap[2] + gap[0]) / 2, (gap[2] + time[0]) / 2, clip.x1]
+
+    cars = []
+    table = [bucket_cells(row, edges) for row in rows]
+    end = len(table)
+    for i, cells in enumerate(table[1:], start=1):
+        if not (CAR_NO.match(cells[0]) and GAP.match(cells[1]) and LAP_TIME.match(cells[2])):
+            end = i
+            break
+        cars.append(cells)
+
+    if not cars:
+        raise BucketError("no car found in the lap table")
+    if any(CAR_NO.match(cells[0]) for cells in table[end:]):
+        raise BucketError(f"unexpected row {table[end]} in the lap table")
+    return table[0], cars
@@ -0,0 +1,69 @@
+import pandas as pd
+
+# The dtypes of the columns of the parsed documents. The numbers found in the documents are small:
+# a lap is below 32767, a position, a car number or a count of pit stops or wins below 127. The
+# nullable dtypes are for the columns that may be empty, e.g. the fastest lap of a car that did not
+# set a lap time. A time in milliseconds, e.g. a gap to the leader, is below 2^31 (about 24 days)
+LAP = "int16"
+SMALL = "int8"
+NULLABLE_LAP = "Int16"
+NULLABLE_SMALL = "Int8"
+NULLABLE_MS = "Int32"
+INTEGERS = [LAP, SMALL, NULLABLE_LAP, NULLABLE_SMALL, NULLABLE_MS]
+# The names repeated on every row: drivers, entrants
+CATEGORY = "category"
+BOOL = "bool"
+# Text, see `string_dtype`
+STRING = "string"
+
+
+def string_dtype() -> pd.StringDtype:
+    """Strings stored in Arrow arrays if pyarrow is installed, Python strings otherwise
+
+    The text columns of the documents (times, gaps, points, ...) are kept as they are written, so
+    "25" stays "25" and the csv files do not change.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return pd.StringDtype("python")
+    return pd.StringDtype("pyarrow")
+
+
+def to_int(values: pd.Series, dtype: str) -> pd.Series:
+    """Convert a column of numbers to a small integer dtype
+
+    The empty strings become nulls, which is only possible with a nullable dtype. Any other text
+    raises a ValueError.
+    """
+    if values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+        values = pd.to_numeric(values.astype(str).str.strip().replace("", None))
+    return values.astype(dtype)
+
+
+def compact(df: pd.DataFrame, dtypes: dict[str, str]) -> pd.DataFrame:
+    """Give the columns of a parsed document compact dtypes
+
+    :param df: The parsed document, every column must have a dtype
+    :param dtypes: The dtype of every column: `LAP`, `SMALL`, their nullable versions, `CATEGORY`,
+                   `BOOL` or `STRING`
+    :return: The typed dataframe, with the same columns, index and attrs
+    """
+    missing = [column for column in df.columns if column not in dtypes]
+    if missing:
+        raise ValueError(f"no dtype for the column(s) {', '.join(missing)}")
+
+    string = string_dtype()
+    columns = {}
+    for column in df.columns:
+        dtype = dtypes[column]
+        if dtype == STRING:
+            columns[column] = df[column].astype(string)
+        elif dtype in INTEGERS:
+            columns[column] = to_int(df[column], dtype)
+        else:
+            columns[column] = df[column].astype(dtype)
+
+    typed = pd.DataFrame(columns, index=df.index)
+    typed.attrs = dict(df.attrs)
+    return typed
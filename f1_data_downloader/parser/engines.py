@@ -0,0 +1,5 @@
+# Table engines a parser can be asked to use, see `parser.buckets`. They are kept apart from the
+# engines themselves so the command line can list them without importing PyMuPDF
+FIND_TABLES = "find_tables"  # `fitz.Page.find_tables`, the line and edge analysis of PyMuPDF
+BUCKETS = "buckets"  # The words bucketed into a grid, falling back to `find_tables` if it fails
+TABLE_ENGINES = [FIND_TABLES, BUCKETS]
@@ -0,0 +1,223 @@
+from typing import Iterable, Iterator
+import logging
+
+import numpy as np
+import pandas as pd
+import pymupdf as fitz
+
+from f1_data_downloader.parser.dtypes import compact
+from f1_data_downloader.parser.page_text import PageText
+from f1_data_downloader.parser.times import to_ms
+
+logger = logging.getLogger(__name__)
+
+# The columns of the rows of the lap tables
+COLUMNS = ["position", "driver_no", "gap", "time", "lap"]
+# The columns decoded from the gap, see `decode_gaps`
+GAP_COLUMNS = ["gap_ms", "laps_down", "in_pit"]
+
+# A car of a lap table: (position, driver No., gap, lap time, lap No.)
+LapRow = tuple[int, str, str, str, int]
+
+
+def lap_tables(text: PageText, word: str, clip: fitz.Rect | tuple, width: float) -> dict:
+    """Detect the lap tables of a history chart page from their "LAP x" headers
+
+    :param text: The `PageText` of the page
+    :param word: The "LAP" of the headers, as written in the document
+    :param clip: The area of the headers, from the title to the header row
+    :param width: The page width
+    :return: {"tables": the [left, right] boundaries of every lap table, from left to right}
+    """
+    headers = text.search(word, clip=clip)
+    tables = []
+    for i, lap in enumerate(headers):
+        """
+        The left boundary of the table is the leftmost of the "Lap x" text, and the right boundary
+        is the leftmost of the next "Lap x" text. If it's the last lap, i.e. no next table, then
+        the right boundary can be determined by left boundary plus table width, which is roughly
+        one-fifth of the page width. We add 5% extra buffer to the right boundary
+        """
+        left_boundary = lap.x0
+        right_boundary = headers[i + 1].x0 if i + 1 < len(headers) else (left_boundary + width / 5) * 1.05
+        tables.append([left_boundary, right_boundary])
+    return {"tables": tables}
+
+
+def lap_rows(cells: list[list[str]], lap_no: int) -> list[LapRow]:
+    """The cars of a lap table, given its [driver No., gap, time] rows in the order of the cars
+
+    The position of a car is its row, the empty rows found below the cars are dropped.
+    """
+    return [(i, driver_no, gap, time, lap_no)
+            for i, (driver_no, gap, time) in enumerate(cells, start=1)
+            if driver_no != '']
+
+
+def laps_down(gaps: pd.Series) -> np.ndarray:
+    """The number of laps a car is down, from its gap: "1 LAP" --> 1, "2 LAPS" --> 2, else 0"""
+    lapped = gaps.str.contains('LAP', regex=False).to_numpy(dtype=bool)
+    down = np.zeros(len(gaps), np.int64)
+    if lapped.any():
+        down[lapped] = gaps[lapped].str.extract(r'(\d+)', expand=False).astype(np.int64).to_numpy()
+    return down
+
+
+def decode_gaps(df: pd.DataFrame) -> pd.DataFrame:
+    """Add the gap to the leader as numbers: `gap_ms`, `laps_down` and `in_pit`
+
+    "1.234" --> 1234 ms, "1:02.345" --> 62345 ms, "" (the leader) --> 0 ms. "1 LAP" or "2 LAPS"
+    give the laps down and "PIT" sets `in_pit`, both without a `gap_ms`. A lapped car in the pit
+    shows "PIT" alone, so it is 0 laps down.
+
+    :param df: The rows of the lap tables, see `COLUMNS`
+    :return: `df` with the `GAP_COLUMNS` added
+    """
+    gaps = df['gap'].astype(str)
+    df['gap_ms'] = to_ms(gaps).mask(gaps == '', 0)
+    df['laps_down'] = laps_down(gaps)
+    df['in_pit'] = (gaps == 'PIT').to_numpy()
+    return df
+
+
+def fix_lapped_laps(df: pd.DataFrame) -> pd.DataFrame:
+    """Correct the lap No. of the lapped cars, see `parse_race_history_chart`
+
+    The rows are sorted by driver No. as text ("1", "10", "11", "2", ...), lap No. and their order
+    in the document, with integer sort keys.
+
+    :param df: The rows of every lap table, in the order of the document, with a default index and
+               the decoded gaps, see `decode_gaps`
+    :return: The sorted rows with the corrected lap No., the index is their row in `df`
+    """
+    driver_no = df['driver_no'].astype(str).to_numpy()
+    # The rank of every driver No. as text
+    numbers, driver_key = np.unique(driver_no, return_inverse=True)
+    lap = df['lap'].to_numpy(np.int64) - df['laps_down'].to_numpy(np.int64)
+
+    order = np.lexsort((np.arange(len(df)), lap, driver_key))
+    driver_key = driver_key[order]
+    lap = lap[order]
+
+    # A car pitting after being lapped gets the lap No. of the next lap: shift the first one down
+    same_car = driver_key[:-1] == driver_key[1:]
+    lap[:-1][same_car & (lap[:-1] == lap[1:])] -= 1
+    # And the laps it skipped
+    skipped = np.zeros(len(lap), bool)
+    skipped[1:] = same_car & (lap[1:] == lap[:-1] + 2)
+    lap[skipped] -= 1
+
+    df = df.take(order)
+    df['lap'] = lap
+    return df
+
+
+class LappedLaps:
+    """The correction of `fix_lapped_laps`, one batch of rows at a time, e.g. one page
+
+    The lap No. of a row depends on the rows of the same car just before and after it, sorted by
+    lap No. minus laps down, which may be on another page. So a row is held until its place in this
+    order cannot change anymore, and neither can the row after it.
+
+    A car completes at most one lap per lap of the leader, so the laps it completed (the lap No.
+    minus the laps down) never decrease. Only the rows with a gap tell them: "PIT" hides the laps
+    down. The rows of a car up to its laps completed on the last row with a gap are in their final
+    order, and those followed by such a row get their corrected lap No.
+
+    The rows are given in the order of the document, but a held row comes in a later batch than the
+    rows after it. `pd.concat` of every batch then `sort_index` gives the rows of `fix_lapped_laps`.
+    """
+
+    def __init__(self):
+        # The rows not given yet
+        self.held: pd.DataFrame | None = None
+        # By driver No.: the lap No. minus laps down of its last row given, and the laps completed
+        # on its last row with a gap
+        self.last: dict[str, int] = {}
+        self.completed: dict[str, int] = {}
+
+    def add(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add the next rows, see `fix_lapped_laps`
+
+        :param df: The rows of the lap tables, in the order of the document, with the decoded gaps,
+                   the index is their row in the whole document
+        :return: The rows whose lap No. is corrected, in the order of the document
+        """
+        with_gap = df[~df['in_pit'].to_numpy(dtype=bool)]
+        completed = (with_gap['lap'] - with_gap['laps_down']).groupby(with_gap['driver_no'].astype(str)).max()
+        for driver_no, laps in completed.items():
+            self.completed[driver_no] = max(laps, self.completed.get(driver_no, laps))
+
+        if self.held is not None:
+            df = pd.concat([self.held, df])
+        return self.settle(df, final=False)
+
+    def flush(self) -> pd.DataFrame | None:
+        """The rows still held, after the last batch"""
+        if self.held is None:
+            return None
+        return self.settle(self.held, final=True)
+
+    def settle(self, df: pd.DataFrame, final: bool) -> pd.DataFrame:
+        driver_no = df['driver_no'].astype(str).to_numpy()
+        lap = df['lap'].to_numpy(np.int64) - df['laps_down'].to_numpy(np.int64)
+
+        order = np.lexsort((df.index.to_numpy(), lap, driver_no))
+        driver_no = driver_no[order]
+        lap = lap[order]
+        n = len(lap)
+
+        same_next = np.zeros(n, bool)
+        same_next[:-1] = driver_no[:-1] == driver_no[1:]
+        same_prev = np.zeros(n, bool)
+        same_prev[1:] = same_next[:-1]
+        # The last row given of the car, for the first row of every car
+        last = np.array([self.last.get(d, np.iinfo(np.int64).min) for d in driver_no], np.int64)
+        if np.any(~same_prev & (lap < last)):
+            logger.warning("A car completed fewer laps than on a previous page, the lap No. of the "
+                           "streamed rows may differ from the parsed document")
+
+        next_lap = np.zeros(n, np.int64)
+        next_lap[:-1] = lap[1:]
+        if final:
+            settled = np.ones(n, bool)
+        else:
+            # The row after must be in its final place too, no later row can come between them
+            completed = np.array([self.completed.get(d, np.iinfo(np.int64).min) for d in driver_no], np.int64)
+            settled = same_next & (next_lap <= completed)
+
+        # Same as `fix_lapped_laps`, with the row before the first one of a car given earlier
+        shifted = lap - (same_next & (lap == next_lap))
+        before = np.where(same_prev, np.roll(shifted, 1), last - (last == lap))
+        has_before = same_prev | (last != np.iinfo(np.int64).min)
+        fixed = shifted - (has_before & (shifted == before + 2))
+
+        self.last.update(zip(driver_no[settled], lap[settled]))
+        self.held = df.iloc[order[~settled]] if not final and not settled.all() else None
+
+        rows = df.iloc[order[settled]].copy()
+        rows['lap'] = fixed[settled]
+        return rows.sort_index()
+
+
+def history_batches(pages: Iterable[list[LapRow]], dtypes: dict[str, str]) -> Iterator[pd.DataFrame]:
+    """The rows of a history chart, with the gaps decoded and the lap No. corrected, page by page
+
+    :param pages: The rows of every page, in the order of the document
+    :param dtypes: The dtypes of the parsed document, see `parser.dtypes`
+    :return: One dataframe per page with the rows whose lap No. is corrected, see `LappedLaps`, and
+             the rows still held after the last page. The index is the row in the document
+    """
+    lapped = LappedLaps()
+    start = 0
+    for rows in pages:
+        df = pd.DataFrame.from_records(rows, columns=COLUMNS)
+        df.index = pd.RangeIndex(start, start + len(df))
+        start += len(df)
+        batch = lapped.add(decode_gaps(df))
+        if len(batch):
+            yield compact(batch, dtypes)
+
+    batch = lapped.flush()
+    if batch is not None and len(batch):
+        yield compact(batch, dtypes)
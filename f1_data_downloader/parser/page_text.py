@@ -0,0 +1,142 @@
+import threading
+
+import pymupdf as fitz
+
+# One text extraction serves the searches, the words and the text of a page. The search flags are
+# used: ligatures are expanded and hyphenated words joined, like `fitz.Page.search_for` does
+TEXT_FLAGS = fitz.TEXTFLAGS_SEARCH
+
+Word = tuple[float, float, float, float, str, int, int, int]
+
+# `fitz.Page.find_tables` changes options of the whole process while it runs (the glyph heights, ...),
+# and the words and hits of a TextPage are measured with these options when they are read: a page read
+# by one thread while another finds tables comes out garbled ("1:32 .882" for "1:32.882"). The calls
+# to PyMuPDF of the parsers hold this lock, the dataframes are built outside it
+FITZ_LOCK = threading.RLock()
+
+
+def overlaps(a: fitz.Rect, b: fitz.Rect) -> bool:
+    """Whether two rectangles share some area, the test PyMuPDF uses to clip the text"""
+    return a.x0 < b.x1 and a.y0 < b.y1 and a.x1 > b.x0 and a.y1 > b.y0
+
+
+def find_tables(page: fitz.Page, **kwargs) -> list[fitz.table.Table]:
+    """Same as `fitz.Page.find_tables(**kwargs).tables`, holding `FITZ_LOCK`
+
+    A table keeps the characters of the page, it is read (`to_pandas`, ...) without the lock.
+    """
+    with FITZ_LOCK:
+        return page.find_tables(**kwargs).tables
+
+
+class PageText:
+    """The text of a page, extracted once and then searched and read from memory
+
+    `fitz.Page.search_for` and `fitz.Page.get_text` extract the text of the page again on every
+    call, and so does a clipped call. Here the TextPage and the word list are built on first use,
+    the results of a search are memoized, and clipped lookups filter the words or hits of the whole
+    page the way PyMuPDF filters characters: what overlaps the clip is kept.
+
+    A clipped read keeps whole words, where PyMuPDF would cut a word crossing the clip.
+    """
+
+    def __init__(self, page: fitz.Page):
+        self.page = page
+        self._textpage: fitz.TextPage | None = None
+        self._words: list[Word] | None = None
+        self._hits: dict[str, list[fitz.Rect]] = {}
+        # Number of text extractions done for this page
+        self.extractions = 0
+
+    @property
+    def textpage(self) -> fitz.TextPage:
+        if self._textpage is None:
+            with FITZ_LOCK:
+                self._textpage = self.page.get_textpage(flags=TEXT_FLAGS)
+            self.extractions += 1
+        return self._textpage
+
+    @property
+    def words(self) -> list[Word]:
+        """(x0, y0, x1, y1, word, block No., line No., word No.) of every word, in reading order"""
+        if self._words is None:
+            with FITZ_LOCK:
+                self._words = self.textpage.extractWORDS()
+        return self._words
+
+    def search(self, needle: str, clip: fitz.Rect | tuple | None = None) -> list[fitz.Rect]:
+        """Same as `fitz.Page.search_for(needle, clip=clip)`
+
+        :param needle: The text to find, case insensitive
+        :param clip: Only keep the hits overlapping this rectangle
+        :return: The rectangle of every hit, in reading order
+        """
+        if needle not in self._hits:
+            with FITZ_LOCK:
+                self._hits[needle] = self.textpage.search(needle, quads=False)
+        hits = self._hits[needle]
+        if clip is None:
+            return list(hits)
+
+        clip = fitz.Rect(clip)
+        return [hit for hit in hits if overlaps(hit, clip)]
+
+    def words_in(self, clip: fitz.Rect | tuple | None = None) -> list[Word]:
+        """Same as `fitz.Page.get_text("words", clip=clip)`"""
+        if clip is None:
+            return list(self.words)
+
+        # `overlaps` on the coordinates, without a `fitz.Rect` per word
+        x0, y0, x1, y1 = fitz.Rect(clip)
+        return [w for w in self.words if w[0] < x1 and w[1] < y1 and w[2] > x0 and w[3] > y0]
+
+    def text(self, clip: fitz.Rect | tuple | None = None) -> str:
+        """Same as `fitz.Page.get_text("text", clip=clip)`: one line of text per line of the page
+
+        The words of a line are joined with a single space.
+        """
+        if clip is None:
+            with FITZ_LOCK:
+                return self.textpage.extractText()
+
+        lines: dict[tuple[int, int], list[str]] = {}
+        for w in self.words_in(clip):
+            lines.setdefault((w[5], w[6]), []).append(w[4])
+        return "".join(" ".join(words) + "\n" for words in lines.values())
+
+    def blocks(self) -> list[tuple]:
+        """Same as `fitz.Page.get_text("blocks")`"""
+        with FITZ_LOCK:
+            return self.textpage.extractBLOCKS()
+
+
+class DocumentText:
+    """The `PageText` of every page of a document, built when a page is first used"""
+
+    def __init__(self, doc: fitz.Document):
+        self.doc = doc
+        self.pages: dict[int, PageText] = {}
+        # Text extractions of the pages released, see `release`
+        self.released_extractions = 0
+
+    def __len__(self) -> int:
+        return len(self.doc)
+
+    def __getitem__(self, i: int) -> PageText:
+        if i not in self.pages:
+            self.pages[i] = PageText(self.doc[i])
+        return self.pages[i]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def release(self, i: int):
+        """Forget the text of the page `i`, once it is parsed. It is extracted again if used again"""
+        page = self.pages.pop(i, None)
+        if page is not None:
+            self.released_extractions += page.extractions
+
+    @property
+    def extractions(self) -> int:
+        """Number of text extractions done for the document"""
+        return self.released_extractions + sum(page.extractions for page in self.pages.values())
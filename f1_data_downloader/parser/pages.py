@@ -0,0 +1,136 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterator
+
+import pymupdf as fitz
+import pandas as pd
+
+from f1_data_downloader.parser.page_text import DocumentText, PageText
+from f1_data_downloader.tracing import add_spans, span, start_trace, stop_trace, tracing
+
+
+def split_pages(n_pages: int, n_chunks: int) -> list[range]:
+    """Split `range(n_pages)` in at most `n_chunks` contiguous ranges of about the same size"""
+    n_chunks = max(1, min(n_chunks, n_pages))
+    size, extra = divmod(n_pages, n_chunks)
+
+    chunks = []
+    start = 0
+    for i in range(n_chunks):
+        stop = start + size + (1 if i < extra else 0)
+        chunks.append(range(start, stop))
+        start = stop
+    return chunks
+
+
+def parse_each_page(parse_page: Callable[..., pd.DataFrame | list], text: DocumentText, pages: range,
+                    *args) -> list[pd.DataFrame | list]:
+    """Parse the pages one after another, each in a "page" span of the trace
+
+    :param parse_page: The function parsing a page, called with the `PageText` of the page and `args`
+    :param text: The text of the document
+    :param pages: The page numbers
+    :return: The dataframe, or rows, of every page
+    """
+    return list(iter_each_page(parse_page, text, pages, *args))
+
+
+def iter_each_page(parse_page: Callable[..., pd.DataFrame | list], text: DocumentText, pages: range,
+                   *args) -> Iterator[pd.DataFrame | list]:
+    """Same as `parse_each_page`, giving the result of every page as soon as it is parsed
+
+    The text of a page is released once it is parsed, so only one page is held in memory.
+    """
+    document = Path(text.doc.name).stem
+    for i in pages:
+        with span(document, "page", page=i + 1):
+            table = parse_page(text[i], *args)
+        text.release(i)
+        yield table
+
+
+class DocumentParser(ABC):
+    """The parser of the pages of a document, holding the geometry of the document
+
+    The width, height and number of pages of the document are read once, when the parser is
+    created, and kept on the parser instead of module globals: the parsers of several documents can
+    be used at the same time in one process, e.g. their page by page iterators, or the threads of
+    `scheduler.run_stages`. The options of a parser (table engine, ...) are its attributes too, so
+    `parse_page` only takes the text of the page.
+
+    A parser holds no fitz object, every method opens the document itself: it can be sent to worker
+    processes, see `parse_pages`.
+
+    A page gives a dataframe, or the rows of its tables, see `parser.history`.
+    """
+
+    def __init__(self, file: str | Path):
+        self.file = str(file)
+        with fitz.open(self.file) as doc:
+            self.n_pages = len(doc)
+            # Page width and height
+            self.width, self.height = doc[0].bound()[2:]
+
+    @abstractmethod
+    def parse_page(self, text: PageText) -> pd.DataFrame | list:
+        """Parse a page, see `parse_each_page`"""
+
+    def parse_range(self, pages: range) -> tuple[list[pd.DataFrame | list], int]:
+        """Parse some pages
+
+        :param pages: The page numbers
+        :return: The dataframe, or rows, of every page and the number of text extractions
+        """
+        with fitz.open(self.file) as doc:
+            text = DocumentText(doc)
+            return parse_each_page(self.parse_page, text, pages), text.extractions
+
+    def iter_pages(self) -> Iterator[pd.DataFrame | list]:
+        """Parse the pages one after another, see `iter_each_page`"""
+        with fitz.open(self.file) as doc:
+            yield from iter_each_page(self.parse_page, DocumentText(doc), range(len(doc)))
+
+
+def traced_range(parser: DocumentParser,
+                 pages: range) -> tuple[tuple[list[pd.DataFrame | list], int], list[dict]]:
+    """Parse some pages in a worker process, recording the spans to send them back"""
+    start_trace()
+    try:
+        result = parser.parse_range(pages)
+    finally:
+        spans = stop_trace()
+    return result, spans
+
+
+def parse_pages(parser: DocumentParser,
+                processes: int | None = None) -> tuple[list[pd.DataFrame | list], int]:
+    """Parse every page of a document, optionally splitting the pages across worker processes
+
+    fitz objects cannot be shared between processes, so the parser is sent to the workers and opens
+    the file itself. The pages are split in contiguous ranges, one per process, and the dataframes
+    are returned in page order whatever the order the workers finish in.
+
+    :param parser: The parser of the document
+    :param processes: Number of worker processes. By default, or with 1, the pages are parsed in the
+                      calling process
+    :return: The dataframe of every page, in page order, and the number of text extractions
+    """
+    chunks = split_pages(parser.n_pages, processes or 1)
+
+    if len(chunks) == 1:
+        return parser.parse_range(chunks[0])
+
+    with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+        # `map` gives the results in the order of the chunks
+        if tracing():
+            results = []
+            for result, spans in executor.map(partial(traced_range, parser), chunks):
+                results.append(result)
+                add_spans(spans)
+        else:
+            results = list(executor.map(parser.parse_range, chunks))
+
+    tables = [df for chunk_tables, _ in results for df in chunk_tables]
+    return tables, sum(extractions for _, extractions in results)
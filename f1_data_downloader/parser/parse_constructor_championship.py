@@ -1,82 +1,95 @@
 # -*- coding: utf-8 -*-
+from typing import Iterator
+
 import pymupdf as fitz
 import pandas as pd
 
-from parser.utils import clean_row
+from f1_data_downloader.parser.page_text import PageText, find_tables
+from f1_data_downloader.parser.pages import DocumentParser, parse_pages
+from f1_data_downloader.parser.utils import championship_standings, table_cells
+from f1_data_downloader.parser.dtypes import CATEGORY, SMALL, STRING, compact
 
 
-def parse_constructor_championship_page(page: fitz.Page) -> pd.DataFrame:
-    """Get the table from a given page in "Constructors' Championship" PDF
+# The dtype of every column of the parsed document, see `parser.dtypes`
+DTYPES = {"pos": STRING, "entrant": CATEGORY, "total": STRING, "wins": SMALL}
 
-    :param page: A `fitz.Page` object
-    :return: A dataframe of [pos, entrant, total, wins]
-    """
 
-    # Get the position of "ENTRANT" the table is located beneath it
-    t = page.search_for("ENTRANT")[0].y0
-    bh = page.search_for("ENTRANT")[0].y1
-    b = page.search_for("Formula One World Championship Limited")[0].y0
+class ConstructorChampionshipParser(DocumentParser):
+    """The parser of "Constructors' Championship" PDF, see `pages.DocumentParser`"""
+
+    def __init__(self, file: str, minimal: bool = False):
+        """
+        :param file: Path to PDF file
+        :param minimal: Only build the pos, entrant and total columns, not a dataframe of every race
+                        cell, see `utils.championship_standings`
+        """
+        super().__init__(file)
+        self.minimal = minimal
 
-    # Page width and height
-    w = page.bound()[2]
+    def parse_page(self, text: PageText) -> pd.DataFrame:
+        """Get the table from a given page in "Constructors' Championship" PDF
 
-    # Extract headers
-    header_words = page.get_text("words", clip=fitz.Rect(0, t, w, bh))
+        :param text: The `PageText` of a page
+        :return: A dataframe of [pos, entrant, total, wins]
+        """
 
-    # Sort the header words from left to right
-    header_words.sort(key=lambda w: w[0])
-    header_words = [w[4].lower() for w in header_words]
+        # Get the position of "ENTRANT" the table is located beneath it
+        page = text.page
+        t = text.search("ENTRANT")[0].y0
+        bh = text.search("ENTRANT")[0].y1
+        b = text.search("Formula One World Championship Limited")[0].y0
 
-    df = page.find_tables(clip=fitz.Rect(0, t, w, b))[0].to_pandas()
+        # Page width
+        w = self.width
 
-    # Trick to retrieve the first row
-    first_row = df.columns
-    df.columns = ["pos"] + header_words
-    df.loc[-1] = first_row  # add as first row
-    df.index = df.index + 1  # shift index
-    df = df.sort_index()  # re-sort by index
+        # Extract headers
+        header_words = text.words_in(fitz.Rect(0, t, w, bh))
 
-    df['entrant'] = df['entrant'].str.replace("\n", " ")
-    df = df.apply(clean_row, axis=1)
-    df['wins'] = [count_wins(row) for row in df.iloc[:, 3:].values]
+        # Sort the header words from left to right
+        header_words.sort(key=lambda w: w[0])
+        header_words = [w[4].lower() for w in header_words]
 
-    return df[["pos", "entrant", "total", "wins"]]
+        table = find_tables(page, clip=fitz.Rect(0, t, w, b))[0]
 
+        # Trick to retrieve the first row: it is read as the header of the table
+        first_row, rows = table_cells(table)
+        df = championship_standings(["pos"] + header_words, [first_row] + rows, "entrant", self.minimal)
+        df['entrant'] = df['entrant'].str.replace("\n", " ")
+        return df
 
-def parse_constructor_championship(file: str) -> pd.DataFrame:
+
+def parse_constructor_championship(file: str, processes: int | None = None,
+                                   minimal: bool = False) -> pd.DataFrame:
     """
     Parse "Constructors' Championship" PDF
 
     :param file: Path to PDF file
+    :param processes: Split the pages across this many worker processes, see
+                      `parser.pages.parse_pages`. By default the pages are parsed one after another
+    :param minimal: Only read the pos, entrant, total and wins of every row, see
+                    `utils.championship_standings`. The output is the same
     :return: The output dataframe will be [pos, entrant, total, wins]
     """
-    # Get page width and height
-    doc = fitz.open(file)
-    page = doc[0]
-    global W
-    W = page.bound()[2]
-
     # Parse all pages
-    tables = []
-    for page in doc:
-        tables.append(parse_constructor_championship_page(page))
+    tables, extractions = parse_pages(ConstructorChampionshipParser(file, minimal), processes)
     df = pd.concat(tables, ignore_index=True)
+    df.attrs['text_extractions'] = extractions
+
+    return compact(df, DTYPES)
 
-    return df
-
-# Count the number of wins for a given row
-def count_wins(row):
-    result = 0
-    for i in range(len(row)):
-        if len(row[i].split("\n")) < 2:
-            continue
-        else:
-            pos = row[i].split("\n")[1]
-            if pos == "1" or pos == "1F":
-                result += 1
-            else:
-                continue
-    return result
+
+def iter_constructor_championship(file: str, minimal: bool = False) -> Iterator[pd.DataFrame]:
+    """
+    Parse "Constructors' Championship" PDF page by page, e.g. to write it without holding the whole
+    document, see `output.write_batches`
+
+    :param file: Path to PDF file
+    :param minimal: See `parse_constructor_championship`
+    :return: The rows of `parse_constructor_championship` of every page, as a typed dataframe. The
+             categories of the entrant column are those of the page
+    """
+    for df in ConstructorChampionshipParser(file, minimal).iter_pages():
+        yield compact(df, DTYPES)
 
 if __name__ == '__main__':
     pass
@@ -4,24 +4,53 @@ import pandas as pd
 import re
 import logging
 
+from f1_data_downloader.parser.page_text import DocumentText, PageText, find_tables
+from f1_data_downloader.parser.templates import page_layout
 from f1_data_downloader.parser.utils import get_image_header
+from f1_data_downloader.parser.dtypes import CATEGORY, NULLABLE_SMALL, SMALL, STRING, compact
+
+# The dtype of every column of the parsed document, see `parser.dtypes`
+DTYPES = {
+    "no": SMALL,
+    "driver": CATEGORY,
+    "entrant": CATEGORY,
+    "q1": STRING,
+    "q1_laps": NULLABLE_SMALL,
+    "q1_time": STRING,
+    "q2": STRING,
+    "q2_laps": NULLABLE_SMALL,
+    "q2_time": STRING,
+    "q3": STRING,
+    "q3_laps": NULLABLE_SMALL,
+    "q3_time": STRING,
+}
+
+# The document type of the layout templates, see `templates.LayoutTemplates`
+DOCUMENT = "quali_classification"
 
 logger = logging.getLogger(__name__)
 
-def parse_quali_final_classification(file: str) -> pd.DataFrame:
-    """Parse "Qualifying Session Final Classification" PDF"""
+def parse_quali_final_classification(file: str, templates: str | None = None) -> pd.DataFrame:
+    """Parse "Qualifying Session Final Classification" PDF
+
+    :param file: Path to PDF file
+    :param templates: Reuse the column tolerance found in a document of the same layout, from this
+                      templates file, see `templates.LayoutTemplates`
+    """
     # Find the page with "Qualifying Session Final Classification"
     doc = fitz.open(file)
+    doc_text = DocumentText(doc)
     found = []
     page = None
     for i in range(len(doc)):
-        page = doc[i]
-        if '.pdf' in page.get_text():  # This is the front page. Skip
+        text = doc_text[i]
+        page = text.page
+        if '.pdf' in text.text():  # This is the front page. Skip
             continue
-        found = page.search_for('Final Classification')
+        found = text.search('Final Classification')
         if found:
             break
-        found = page.search_for('Provisional Classification')
+        found = text.search('Provisional Classification')
         if found:
             logger.warning('Found and using provisional classification, not the final one')
             break
@@ -44,16 +73,16 @@ def parse_quali_final_classification(file: str) -> pd.DataFrame:
     y = found[0].y1
 
     # y-position of "NOT CLASSIFIED - " or "POLE POSITION LAP"
-    not_classified = page.search_for('NOT CLASSIFIED - ')
+    not_classified = text.search('NOT CLASSIFIED - ')
     b = None
     if len(not_classified) > 0:
         b = not_classified[0].y0
-    elif len(page.search_for('POLE POSITION LAP')) > 0:
-        b = page.search_for('POLE POSITION LAP')[0].y0
-    elif len(page.search_for('FASTEST LAP')) > 0:
-        b = page.search_for('FASTEST LAP')[0].y0
-    elif len(page.search_for('Formula One World Championship')[0]) > 0:
-        b = page.search_for('Formula One World Championship')[0].y0
+    elif len(text.search('POLE POSITION LAP')) > 0:
+        b = text.search('POLE POSITION LAP')[0].y0
+    elif len(text.search('FASTEST LAP')) > 0:
+        b = text.search('FASTEST LAP')[0].y0
+    elif len(text.search('Formula One World Championship')[0]) > 0:
+        b = text.search('Formula One World Championship')[0].y0
     else:
         raise ValueError(f'not able to find the bottom of quali. result in `{file}`')
     if b is None:
@@ -62,13 +91,9 @@ def parse_quali_final_classification(file: str) -> pd.DataFrame:
     # Table bounding box
     bbox = fitz.Rect(0, y, w, b)
 
-    # Dist. between "NAT" and "ENTRANT"
-    nat = page.search_for('NAT')[0]
-    entrant = page.search_for('ENTRANT')[0]
-    snap_x_tolerance = (entrant.x0 - nat.x1) * 1.2  # 20% buffer
-
-    # Parse
-    df = page.find_tables(clip=bbox, snap_x_tolerance=snap_x_tolerance)[0].to_pandas()
+    # Parse, the tolerance comes from the headers or a template of the same layout
+    layout = page_layout(templates, DOCUMENT, text, bbox, lambda: quali_layout(text))
+    df = find_tables(page, clip=bbox, snap_x_tolerance=layout["snap_x_tolerance"])[0].to_pandas()
     first_row = [format_col(c) for c in df.columns]
     # Insert the new column names
     if len(df.columns) == 14:
@@ -82,7 +107,14 @@ def parse_quali_final_classification(file: str) -> pd.DataFrame:
     df = df[df['_'] != '']
     df.drop(columns=['_', 'nat'], inplace=True)
     df = df[df['no'] != '']
-    return df
+    df.attrs['text_extractions'] = doc_text.extractions
+    return compact(df, DTYPES)
+
+def quali_layout(text: PageText) -> dict:
+    """Detect the `find_tables` tolerance of the columns, from the distance between NAT and ENTRANT"""
+    nat = text.search('NAT')[0]
+    entrant = text.search('ENTRANT')[0]
+    return {"snap_x_tolerance": (entrant.x0 - nat.x1) * 1.2}  # 20% buffer
 
 # Format the first line elements
 def format_col(c: str) -> str:
@@ -1,91 +1,122 @@
 # -*- coding: utf-8 -*-
-import datetime
-import re
-import warnings
+from itertools import chain
+from typing import Iterator
 
 import pymupdf as fitz
 import pandas as pd
+import logging
 
-W: float  # Page width and height
-H: float
+from f1_data_downloader.parser.buckets import BUCKETS, FIND_TABLES, BucketError, bucket_lap_table
+from f1_data_downloader.parser.page_text import PageText, find_tables
+from f1_data_downloader.parser.pages import DocumentParser, parse_pages
+from f1_data_downloader.parser.dtypes import BOOL, LAP, NULLABLE_MS, SMALL, STRING, compact
+from f1_data_downloader.parser.history import (COLUMNS, LapRow, decode_gaps, fix_lapped_laps,
+                                               history_batches, lap_rows, lap_tables)
+from f1_data_downloader.parser.templates import page_layout
+from f1_data_downloader.parser.utils import table_cells
 
+# The dtype of every column of the parsed document, see `parser.dtypes`
+DTYPES = {"position": SMALL, "driver_no": SMALL, "gap": STRING, "time": STRING, "lap": LAP,
+          "gap_ms": NULLABLE_MS, "laps_down": SMALL, "in_pit": BOOL}
 
-def parse_race_history_chart_page(page: fitz.Page) -> pd.DataFrame:
-    """
-    Get the table(s) from a given page in "Race History Chart" PDF. There are multiple tables in a
-    page, each of which correspond to a lap No. We concat all tables into one single dataframe
-
-    See `notebook/demo.ipynb` for the detailed explanation of the table structure.
+# The document type of the layout templates, see `templates.LayoutTemplates`
+DOCUMENT = "race_history_chart"
 
-    :param page: A `fitz.Page` object
-    :return: A dataframe of [driver No., lap No., gap to leader, lap time]
+logger = logging.getLogger(__name__)
 
-    TODO: probably use better type hint using pandera later
-    """
 
-    # Get the position of "Lap x"
-    t = page.search_for('Race History Chart')[0].y1
-    b = page.search_for('TIME')[0].y1
-    headers = page.search_for('LAP', clip=(0, t, W, b))
+class RaceHistoryChartParser(DocumentParser):
+    """The parser of "Race History Chart" PDF, see `pages.DocumentParser`"""
 
-    # Iterate through the tables for each lap
-    tables = []
-    for i, lap in enumerate(headers):
+    def __init__(self, file: str, engine: str = FIND_TABLES, templates: str | None = None):
         """
-        The left boundary of the table is the leftmost of the "Lap x" text, and the right boundary
-        is the leftmost of the next "Lap x" text. If it's the last lap, i.e. no next table, then
-        the right boundary can be determined by left boundary plus table width, which is roughly
-        one-fifth of the page width. We add 5% extra buffer to the right boundary
+        :param file: Path to PDF file
+        :param engine: The table engine, `buckets.FIND_TABLES` or `buckets.BUCKETS`
+        :param templates: Reuse the table boundaries found on a page of the same layout, from this
+                          templates file, see `templates.LayoutTemplates`
         """
-        left_boundary  = lap.x0
-        right_boundary  = headers[i + 1].x0 if i + 1 < len(headers) else (left_boundary + W / 5) * 1.05
-        temp = page.find_tables(clip=fitz.Rect(left_boundary, t, right_boundary, H),
-                                strategy='lines',
-                                add_lines=[((left_boundary, 0), (left_boundary, H))])[0].to_pandas()
-
-        # Three columns: "LAP x", "GAP", "TIME". "LAP x" is the column for driver No. So add a new
-        # column for lap No. with value "x", and rename the columns
-        lap_no = int(page.get_text("text", clip=fitz.Rect(left_boundary, t, right_boundary, b)).split("\n")[0].split(' ')[1])
-
-        first_row = list(temp.columns)
-
-        # If the current leader is not in the pit then he has no gap ahead since he is the leader
-        if first_row[1] != 'PIT':
-            first_row[1] = ''
-
-        temp.columns = ['driver_no', 'gap', 'time']
-        temp.loc[-1] = first_row  # add as first row
-        temp.index = temp.index + 1  # shift index
-        temp = temp.sort_index()  # re-sort by index
+        super().__init__(file)
+        self.engine = engine
+        self.templates = templates
 
+    def parse_page(self, text: PageText) -> list[LapRow]:
+        """
+        Get the table(s) from a given page in "Race History Chart" PDF. There are multiple tables
+        in a page, each of which correspond to a lap No. The cells of all tables are collected as
+        rows, the dataframe is built once for the whole document, see `parse_race_history_chart`
 
-        temp['lap'] = lap_no
-        temp = temp[temp['driver_no'] != '']  # Sometimes we will get one additional empty row
+        See `notebook/demo.ipynb` for the detailed explanation of the table structure.
 
-        # The row order/index is meaningful: it's the order/positions of the cars
-        # TODO: is this true for all cases? E.g. retirements?
-        temp.reset_index(drop=False, names=['position'], inplace=True)
-        temp['position'] += 1  # 1-indexed
-        tables.append(temp)
-    return pd.concat(tables, ignore_index=True)
+        :param text: The `PageText` of a page
+        :return: The rows of [position, driver No., gap to leader, lap time, lap No.], see
+                 `history.COLUMNS`
 
+        TODO: probably use better type hint using pandera later
+        """
 
-def parse_race_history_chart(file: str) -> pd.DataFrame:
+        # Get the position of "Lap x"
+        page = text.page
+        w, h = self.width, self.height
+        t = text.search('Race History Chart')[0].y1
+        time_header = text.search('TIME')[0]
+        b = time_header.y1
+
+        # The boundaries of the tables, from their headers or a template of the same layout. The
+        # header row is the row of "TIME"
+        layout = page_layout(self.templates, DOCUMENT, text, (0, time_header.y0, w, time_header.y1),
+                             lambda: lap_tables(text, 'LAP', (0, t, w, b), w))
+
+        # Iterate through the tables for each lap
+        rows = []
+        for left_boundary, right_boundary in layout["tables"]:
+            # Three columns: "LAP x", "GAP", "TIME". "LAP x" is the column for driver No. So add a new
+            # column for lap No. with value "x"
+            header = text.text(fitz.Rect(left_boundary, t, right_boundary, b))
+            lap_no = int(header.split("\n")[0].split(' ')[1])
+
+            cells = None
+            if self.engine == BUCKETS:
+                try:
+                    _, cells = bucket_lap_table(text.words, fitz.Rect(left_boundary, t, right_boundary, h))
+                except BucketError as e:
+                    logger.warning(f'Could not bucket the table of lap {lap_no}, using find_tables: {e}')
+
+            if cells is None:
+                table = find_tables(page, clip=fitz.Rect(left_boundary, t, right_boundary, h),
+                                    strategy='lines',
+                                    add_lines=[((left_boundary, 0), (left_boundary, h))])[0]
+                # The leader is read as the header of the table: add him as first row
+                first_row, cells = table_cells(table)
+                cells = [first_row] + cells
+
+            # If the current leader is not in the pit then he has no gap ahead since he is the leader
+            if cells[0][1] != 'PIT':
+                cells[0] = [cells[0][0], '', cells[0][2]]
+
+            # The row order is meaningful: it's the order/positions of the cars. Sometimes we will get
+            # one additional empty row
+            # TODO: is this true for all cases? E.g. retirements?
+            rows.extend(lap_rows(cells, lap_no))
+        return rows
+
+
+def parse_race_history_chart(file: str, processes: int | None = None, engine: str = FIND_TABLES,
+                             templates: str | None = None) -> pd.DataFrame:
     """
     Parse "Race History Chart" PDF
 
     :param file: Path to PDF file
-    :return: The output dataframe will be [driver No., lap No., gap to leader, lap time]
+    :param processes: Split the pages across this many worker processes, see
+                      `parser.pages.parse_pages`. By default the pages are parsed one after another
+    :param engine: The table engine, `buckets.FIND_TABLES` or `buckets.BUCKETS`
+    :param templates: Reuse the table boundaries found on a page of the same layout, from this
+                      templates file, see `templates.LayoutTemplates`
+    :return: The output dataframe will be [driver No., lap No., gap to leader, lap time], and the gap
+             decoded, see `history.decode_gaps`
     """
-    # Get page width and height
-    doc = fitz.open(file)
-    page = doc[0]
-    global W, H
-    W = page.bound()[2]
-    H = page.bound()[3]
-
-    # Parse all pages
-    df = pd.concat([parse_race_history_chart_page(page) for page in doc], ignore_index=True)
+    # Parse all pages, and build the dataframe once from the rows of every lap table
+    pages, extractions = parse_pages(RaceHistoryChartParser(file, engine, templates), processes)
+    df = pd.DataFrame.from_records(list(chain.from_iterable(pages)), columns=COLUMNS)
 
     # Clean up
     """
@@ -121,53 +152,29 @@ def parse_race_history_chart(file: str) -> pd.DataFrame:
 
     TODO: is this really mathematically correct? Can a lapped car pits and then gets unlapped?
     """
-    df['lap'] = df['lap'] - df['gap'].apply(lambda x: int(re.findall(r'\d+', x)[0]) if 'LAP' in x
-                                                      else 0)
-    df.reset_index(drop=False, inplace=True)
-    df.sort_values(by=['driver_no', 'lap', 'index'], inplace=True)
-    df.loc[(df['driver_no'] == df['driver_no'].shift(-1)) & (df['lap'] == df['lap'].shift(-1)),
-           'lap'] -= 1
-    df.loc[(df['driver_no'] == df['driver_no'].shift(1)) & (df['lap'] == df['lap'].shift(1) + 2),
-           'lap'] -= 1
-    del df['index']
+    df = fix_lapped_laps(decode_gaps(df))
 
     # TODO: Perez "retired and rejoined" in 2023 Japanese... Maybe just mechanically assign lap No.
     #       as 1, 2, 3, ...?
-    return df
+    df.attrs['text_extractions'] = extractions
+    return compact(df, DTYPES)
 
 
-def to_timedelta(s: str) -> datetime.timedelta:
+def iter_race_history_chart(file: str, engine: str = FIND_TABLES,
+                            templates: str | None = None) -> Iterator[pd.DataFrame]:
     """
-    Covert a time string to a timedelta object, e.g. "1:32.190" -->
-    datetime.timedelta(seconds=92, microseconds=190000)
+    Parse "Race History Chart" PDF page by page, e.g. to write it without holding the whole
+    document, see `output.write_batches`
+
+    :param file: Path to PDF file
+    :param engine: The table engine, `buckets.FIND_TABLES` or `buckets.BUCKETS`
+    :param templates: The layout templates, see `RaceHistoryChartParser`
+    :return: The rows of `parse_race_history_chart` as typed dataframes, about one per page, see
+             `history.history_batches`. Their index is the row in the document
     """
-    # Parse by ":" and "."
-    n_colons = s.count(':')
-    h, m, sec, ms = 0, 0, 0, 0
-    match n_colons:
-        case 1:  # "1:32.190"
-            m, sec = s.split(':')
-            sec, ms = sec.split('.')
-        case 2:  # "1:32:19.190"
-            warnings.warn(f'''got an unusual time: {s}. Assuming it's "hh:mm:ss.ms"''')
-            h, m, sec = s.split(':')
-            sec, ms = sec.split('.')
-        case 0:  # "19.190"
-            warnings.warn(f'''got an unusual time: {s}. Assuming it's "ss.ms"''')
-            sec, ms = s.split('.')
-        case _:  # Weird case
-            raise ValueError(f'''got an unexpected time: {s}''')
-
-    # Check if the time is valid
-    assert 0 <= int(h) < 24, f'''hour should be in [0, 24), got {h} in {s}'''
-    assert 0 <= int(m) < 60, f'''minute should be in [0, 60), got {m} in {s}'''
-    assert 0 <= int(sec) < 60, f'''second should be in [0, 60), got {sec} in {s}'''
-    assert 0 <= int(ms) < 1000, f'''millisecond should be in [0, 1000), got {ms} in {s}'''
-
-    t = datetime.timedelta(hours=int(h), minutes=int(m), seconds=int(sec), milliseconds=int(ms))
-    if t == datetime.timedelta(0):
-        raise ValueError(f'''got an invalid time: {s}''')
-    return t
+    parser = RaceHistoryChartParser(file, engine, templates)
+    return history_batches(parser.iter_pages(), DTYPES)
+
 
 if __name__ == '__main__':
     pass
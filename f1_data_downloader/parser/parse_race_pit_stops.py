@@ -2,6 +2,19 @@
 import pymupdf as fitz
 import pandas as pd
 
+from f1_data_downloader.parser.page_text import PageText, find_tables
+from f1_data_downloader.parser.dtypes import LAP, SMALL, STRING, compact
+
+
+# The dtype of every column of the parsed document, see `parser.dtypes`
+DTYPES = {
+    "driver_no": SMALL,
+    "lap": LAP,
+    "local_time": STRING,
+    "no": SMALL,
+    "duration": STRING,
+}
+
 
 def parse_race_pit_stop(file: str) -> pd.DataFrame:
     """Parse the table from "Pit Stop Summary" PDF
@@ -12,23 +25,24 @@ def parse_race_pit_stop(file: str) -> pd.DataFrame:
 
     doc = fitz.open(file)
     page = doc[0]
+    text = PageText(page)
     # TODO: definitely have PDFs containing multiple pages
 
     # Get the position of the table
-    t = page.search_for('DRIVER')[0].y0      # "DRIVER" gives the top of the table
-    bh = page.search_for('DRIVER')[0].y1     # "DRIVER" gives the bottom of the header
+    t = text.search('DRIVER')[0].y0      # "DRIVER" gives the top of the table
+    bh = text.search('DRIVER')[0].y1     # "DRIVER" gives the bottom of the header
     w, h = page.bound()[2], page.bound()[3]  # Page width and height
     bbox = fitz.Rect(0, t, w, h)
 
     # Extract headers
-    header_words = page.get_text("text", clip=fitz.Rect(0, t, w, bh))
+    header_words = text.text(fitz.Rect(0, t, w, bh))
 
     # Sort the header words from left to right
     # Take all except the last one as it is empty
     header_words = [w.lower() for w in header_words.split("\n")[:-1]]
 
     # Parse
-    df = page.find_tables(clip=bbox)[0].to_pandas()
+    df = find_tables(page, clip=bbox)[0].to_pandas()
 
     first_row = [s.split("-")[1] for s in list(df.columns)]
     df.columns = header_words
@@ -47,7 +61,8 @@ def parse_race_pit_stop(file: str) -> pd.DataFrame:
         'stop': 'no',
         'duration': 'duration'
     }, inplace=True)
-    return df
+    df.attrs['text_extractions'] = text.extractions
+    return compact(df, DTYPES)
 
 if __name__ == '__main__':
     pass
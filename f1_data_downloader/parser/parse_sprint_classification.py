@@ -1,25 +1,54 @@
 # -*- coding: utf-8 -*-
 import pymupdf as fitz
 import pandas as pd
+import logging
 
+from f1_data_downloader.parser.buckets import BUCKETS, FIND_TABLES, BucketError, bucket_classification
+from f1_data_downloader.parser.page_text import DocumentText, find_tables
+from f1_data_downloader.parser.templates import CLASSIFICATION_COLUMNS, classification_layout, page_layout
+from f1_data_downloader.parser.dtypes import CATEGORY, NULLABLE_LAP, SMALL, STRING, compact
 
-def parse_sprint_final_classification(file: str) -> pd.DataFrame:
+# The dtype of every column of the parsed document, see `parser.dtypes`
+DTYPES = {
+    "driver_no": SMALL,
+    "entrant": CATEGORY,
+    "laps": NULLABLE_LAP,
+    "time": STRING,
+    "gap": STRING,
+    "fastest": STRING,
+    "on": NULLABLE_LAP,
+    "points": STRING,
+}
+
+# The document type of the layout templates, see `templates.LayoutTemplates`
+DOCUMENT = "sprint_classification"
+
+logger = logging.getLogger(__name__)
+
+
+def parse_sprint_final_classification(file: str, engine: str = FIND_TABLES,
+                                      templates: str | None = None) -> pd.DataFrame:
     """Parse "Sprint Final Classification" PDF
 
     :param file: Path to PDF file
-    :return: The output dataframe will be [driver No., laps completed, total time,
+    :param engine: The table engine, `buckets.FIND_TABLES` or `buckets.BUCKETS`
+    :param templates: Reuse the columns found in a document of the same layout, from this
+                      templates file, see `templates.LayoutTemplates`
+    :return: The output dataframe will be [driver No., entrant, laps completed, total time,
                                            finishing position, finishing status, fastest lap time,
                                            fastest lap speed, fastest lap No., points]
     """
     # Find the page with "Race Final Classification"
     doc = fitz.open(file)
+    doc_text = DocumentText(doc)
     for i in range(len(doc)):
-        page = doc[i]
-        found = page.search_for('Sprint Final Classification')
+        text = doc_text[i]
+        page = text.page
+        found = text.search('Sprint Final Classification')
         if len(found) > 0:
             break
-        elif len(page.search_for('Sprint Provisional Classification')) > 0:
-            found = page.search_for('Sprint Provisional Classification')
+        elif len(text.search('Sprint Provisional Classification')) > 0:
+            found = text.search('Sprint Provisional Classification')
             break
 
     # Width and height of the page
@@ -29,50 +58,41 @@ def parse_sprint_final_classification(file: str) -> pd.DataFrame:
     y = found[0].y1
 
     # Position of "FASTEST LAP"
-    b = page.search_for('FASTEST LAP')[0].y0
+    b = text.search('FASTEST LAP')[0].y0
 
     # Table bounding box
     bbox = fitz.Rect(0, y, w, b)
 
-    # Positions of table headers/column names
-    pos = {}
-    for col in ['NO', 'DRIVER', 'NAT', 'ENTRANT', 'LAPS', 'TIME', 'GAP', 'INT', 'KM/H', 'FASTEST',
-                'ON', 'PTS']:
-        pos[col] = {
-            'left': page.search_for(col, clip=bbox)[0].x0,
-            'right': page.search_for(col, clip=bbox)[0].x1
-        }
-
-    # Lines separating the columns
-    aux_lines = [
-        pos['NO']['left'],
-        (pos['NO']['right'] + pos['DRIVER']['left']) / 2,
-        pos['NAT']['left'],
-        pos['NAT']['right'],
-        pos['LAPS']['left'],
-        pos['LAPS']['right'],
-        (pos['TIME']['right'] + pos['GAP']['left']) / 2,
-        (pos['GAP']['right'] + pos['INT']['left']) / 2,
-        (pos['INT']['right'] + pos['KM/H']['left']) / 2,
-        pos['FASTEST']['left'],
-        pos['FASTEST']['right'],
-        pos['PTS']['left'],
-        pos['PTS']['right']
-    ]
+    # Positions of the columns, from the headers or a template of the same layout
+    layout = page_layout(templates, DOCUMENT, text, bbox, lambda: classification_layout(text, bbox))
+    left, aux_lines = layout["left"], layout["aux_lines"]
 
     # Find the table below "Race Final Classification"
-    df = page.find_tables(
-        clip=fitz.Rect(pos['NO']['left'], y, w, b),
-        strategy='lines',
-        vertical_lines=aux_lines,
-        snap_x_tolerance=pos['ON']['left'] - pos['FASTEST']['right']
-    )[0].to_pandas()
-    df = df[df['NO'] != '']  # May get some empty rows at the bottom
+    df = None
+    if engine == BUCKETS:
+        # The columns are known, bucket the words directly. The table goes up to the page width,
+        # like the clip of `find_tables`
+        try:
+            df = bucket_classification(text.words, aux_lines[:-1] + [w], fitz.Rect(left, y, w, b),
+                                       CLASSIFICATION_COLUMNS)
+        except BucketError as e:
+            logger.warning(f'Could not bucket the classification, using find_tables: {e}')
+
+    if df is None:
+        df = find_tables(
+            page,
+            clip=fitz.Rect(left, y, w, b),
+            strategy='lines',
+            vertical_lines=aux_lines,
+            snap_x_tolerance=layout["snap_x_tolerance"]
+        )[0].to_pandas()
+        df = df[df['NO'] != '']  # May get some empty rows at the bottom
 
     # Clean a bit
-    df.drop(columns=['DRIVER', 'NAT', 'ENTRANT', 'INT', 'KM/H'], inplace=True)
-    df.columns = ['driver_no', 'laps', 'time', 'gap', 'fastest', 'on', 'points'] # [NO,LAPS,TIME,GAP,FASTEST,ON,PTS]
-    return df
+    df.drop(columns=['DRIVER', 'NAT', 'INT', 'KM/H'], inplace=True)
+    df.columns = ['driver_no', 'entrant', 'laps', 'time', 'gap', 'fastest', 'on', 'points'] # [NO,ENTRANT,LAPS,TIME,GAP,FASTEST,ON,PTS]
+    df.attrs['text_extractions'] = doc_text.extractions
+    return compact(df, DTYPES)
 
 
 if __name__ == '__main__':
@@ -1,80 +1,95 @@
 # -*- coding: utf-8 -*-
+from typing import Iterator
+
 import pymupdf as fitz
 import pandas as pd
 
-W: float  # Page width
+from f1_data_downloader.parser.page_text import PageText, find_tables
+from f1_data_downloader.parser.pages import DocumentParser, parse_pages
+from f1_data_downloader.parser.dtypes import LAP, SMALL, compact
+from f1_data_downloader.parser.utils import lap_chart_positions
 
+# The dtype of every column of the parsed document, see `parser.dtypes`
+DTYPES = {"lap": LAP, "position": SMALL, "driver_no": SMALL}
 
-def parse_sprint_lap_chart_page(page: fitz.Page) -> pd.DataFrame:
-    """Get the table from a given page in "Sprint Lap Chart" PDF
 
-    :param page: A `fitz.Page` object
-    :return: A dataframe of [lap No., position, driver No.]
+class SprintLapChartParser(DocumentParser):
+    """The parser of "Sprint Lap Chart" PDF, see `pages.DocumentParser`"""
 
-    TODO: probably use better type hint using pandera later
-    """
+    def parse_page(self, text: PageText) -> pd.DataFrame:
+        """Get the table from a given page in "Sprint Lap Chart" PDF
 
-    # Get the position of "POS" and "Page", between which the table is located vertically
-    # TODO: Probably need to use some other text as reference point. If the race name has "POS" in
-    #       it, then the current method will fail
-    t = page.search_for('POS')[0].y0
-    b = page.search_for('Formula One World Championship')[0].y0
+        :param text: The `PageText` of a page
+        :return: A dataframe of [lap No., position, driver No.]
 
-    df = page.find_tables(clip=fitz.Rect(0, t, W, b), strategy='text')[0].to_pandas()
+        TODO: probably use better type hint using pandera later
+        """
 
-    """
-    The parsing is not always successful. We may have one of the following situations:
+        # Get the position of "POS" and "Page", between which the table is located vertically
+        # TODO: Probably need to use some other text as reference point. If the race name has "POS" in
+        #       it, then the current method will fail
+        page = text.page
+        t = text.search('POS')[0].y0
+        b = text.search('Formula One World Championship')[0].y0
 
-    1. we do have the columns correct
-    2. the "POS" column somehow is separated into "P" and "OS" column
+        df = find_tables(page, clip=fitz.Rect(0, t, self.width, b), strategy='text')[0].to_pandas()
+
+        """
+        The parsing is not always successful. We may have one of the following situations:
+
+        1. we do have the columns correct
+        2. the "POS" column somehow is separated into "P" and "OS" column
+
+        Additionally, we many have an empty row as the first row. See `notebook/demo.ipynb` for the
+        detailed explanation
+        """
+
+        # Clean the lap No. col.
+        df.replace('', None, inplace=True)
+        df.dropna(how='all', inplace=True)
+        if 'POS' in df.columns:
+            df = df[df['POS'] != 'GRID']  # Probably need this row later as the "actual" starting grid
+            df['POS'] = df['POS'].str.extract(r'(\d+)')[0].astype(int)
+        elif 'P' in df.columns and 'OS' in df.columns:
+            del df['P']
+            df.rename(columns={'OS': 'POS'}, inplace=True)
+        else:
+            raise ValueError('Failed to parse the table. Check the PDF file')
+        df.rename(columns={'POS': 'lap'}, inplace=True)
+        # Drop the last row as it contains no useful information
+        df.drop(df.tail(1).index,inplace=True)
+        return df
 
-    Additionally, we many have an empty row as the first row. See `notebook/demo.ipynb` for the
-    detailed explanation
-    """
 
-    # Clean the lap No. col.
-    df.replace('', None, inplace=True)
-    df.dropna(how='all', inplace=True)
-    if 'POS' in df.columns:
-        df = df[df['POS'] != 'GRID']  # Probably need this row later as the "actual" starting grid
-        df['POS'] = df['POS'].str.extract(r'(\d+)')[0].astype(int)
-    elif 'P' in df.columns and 'OS' in df.columns:
-        del df['P']
-        df.rename(columns={'OS': 'POS'}, inplace=True)
-    else:
-        raise ValueError('Failed to parse the table. Check the PDF file')
-    df.rename(columns={'POS': 'lap'}, inplace=True)
-    # Drop the last row as it contains no useful information
-    df.drop(df.tail(1).index,inplace=True)
-    return df
-
-
-def parse_sprint_lap_chart(file: str) -> pd.DataFrame:
+def parse_sprint_lap_chart(file: str, processes: int | None = None) -> pd.DataFrame:
     """
     Parse "Sprint Lap Chart" PDF
 
     :param file: Path to PDF file
+    :param processes: Split the pages across this many worker processes, see
+                      `parser.pages.parse_pages`. By default the pages are parsed one after another
     :return: The output dataframe will be [lap No., position, driver No.]
     """
-    # Get page width and height
-    doc = fitz.open(file)
-    page = doc[0]
-    global W
-    W = page.bound()[2]
-
     # Parse all pages
-    tables = []
-    for page in doc:
-        tables.append(parse_sprint_lap_chart_page(page))
+    tables, extractions = parse_pages(SprintLapChartParser(file), processes)
     df = pd.concat(tables, ignore_index=True)
 
     # Reshape the table to long format, i.e. to lap-position level
-    df.set_index('lap', inplace=True)
-    df = df.stack().reset_index()
-    df.columns = ['lap', 'position', 'driver_no']
-    for col in ['lap', 'position', 'driver_no']:
-        df[col] = df[col].astype(int)
-    return df
+    df = lap_chart_positions(df)
+    df.attrs['text_extractions'] = extractions
+    return compact(df, DTYPES)
+
+
+def iter_sprint_lap_chart(file: str) -> Iterator[pd.DataFrame]:
+    """
+    Parse "Sprint Lap Chart" PDF page by page, e.g. to write it without holding the whole document,
+    see `output.write_batches`
+
+    :param file: Path to PDF file
+    :return: The rows of `parse_sprint_lap_chart` of every page, as a typed dataframe
+    """
+    for df in SprintLapChartParser(file).iter_pages():
+        yield compact(lap_chart_positions(df), DTYPES)
 
 if __name__ == '__main__':
     pass
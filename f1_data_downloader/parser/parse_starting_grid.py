@@ -2,6 +2,17 @@ import fitz
 import pandas as pd
 import re
 
+from f1_data_downloader.parser.page_text import DocumentText
+from f1_data_downloader.parser.dtypes import BOOL, CATEGORY, NULLABLE_SMALL, SMALL, compact
+
+# The dtype of every column of the parsed document, see `parser.dtypes`
+DTYPES = {
+    "position": NULLABLE_SMALL,
+    "car": SMALL,
+    "driver": CATEGORY,
+    "pit_lane": BOOL,
+}
+
 
 def parse_starting_grid(pdf_path: str) -> pd.DataFrame:
     """
@@ -23,7 +34,8 @@ def parse_starting_grid(pdf_path: str) -> pd.DataFrame:
     pd.DataFrame
     """
 
-    blocks = load_blocks(pdf_path)
+    doc_text = DocumentText(fitz.open(pdf_path))
+    blocks = load_blocks(doc_text)
     lines = clean_blocks(blocks)
 
     grid = parse_grid(lines)
@@ -37,18 +49,18 @@ def parse_starting_grid(pdf_path: str) -> pd.DataFrame:
         ascending=[True, True],
         na_position="last"
     ).reset_index(drop=True)
+    df.attrs["text_extractions"] = doc_text.extractions
 
-    return df
+    return compact(df, DTYPES)
 
 # -------------------------------------------------------
 # Helpers
 # -------------------------------------------------------
 
-def load_blocks(path):
-    doc = fitz.open(path)
+def load_blocks(doc_text):
     blocks = []
-    for page in doc:
-        for b in page.get_text("blocks"):
+    for text in doc_text:
+        for b in text.blocks():
             blocks.append(b[4])  # block text
     return blocks
 
@@ -0,0 +1,207 @@
+from pathlib import Path
+from threading import Lock
+from typing import Callable
+import hashlib
+import json
+import logging
+import os
+import re
+
+import pymupdf as fitz
+
+from f1_data_downloader.cache import file_lock, tmp_path
+from f1_data_downloader.parser.page_text import PageText, Word
+
+logger = logging.getLogger(__name__)
+
+# A layout is only reused if its anchor words moved less than this, in points
+TOLERANCE = 1.0
+# Number of header words checked before reusing a layout
+N_ANCHORS = 3
+
+# The headers of the columns of a race or sprint classification
+CLASSIFICATION_COLUMNS = ['NO', 'DRIVER', 'NAT', 'ENTRANT', 'LAPS', 'TIME', 'GAP', 'INT', 'KM/H', 'FASTEST',
+                          'ON', 'PTS']
+
+# The cache of every file, see `load_templates`
+_loaded: dict[Path, "LayoutTemplates"] = {}
+_loaded_lock = Lock()
+
+
+def header_row(text: PageText, clip: fitz.Rect | tuple) -> list[Word]:
+    """The words of the topmost line of text in `clip`, from left to right"""
+    words = text.words_in(clip)
+    if not words:
+        return []
+    top = min(words, key=lambda w: w[1])
+    y = (top[1] + top[3]) / 2
+    return sorted((w for w in words if w[1] <= y <= w[3]), key=lambda w: w[0])
+
+
+def fingerprint(header: list[Word]) -> str:
+    """A hash of the text of a header row
+
+    The numbers are left out, so the pages of a history chart, with "LAP 1" to "LAP 5" or "LAP 6" to
+    "LAP 10" in their header, share their layout.
+    """
+    text = " ".join(re.sub(r"\d+", "#", w[4]) for w in header)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def anchors(header: list[Word]) -> list[list]:
+    """The [word, x0] of the first, last and a few middle words of a header row, see `N_ANCHORS`"""
+    if len(header) <= N_ANCHORS:
+        picked = header
+    else:
+        step = (len(header) - 1) / (N_ANCHORS - 1)
+        picked = [header[round(i * step)] for i in range(N_ANCHORS)]
+    return [[w[4], w[0]] for w in picked]
+
+
+def anchors_match(expected: list[list], header: list[Word]) -> bool:
+    """Whether every anchor word is found in the header row, within `TOLERANCE` of its x0"""
+    return all(any(w[4] == word and abs(w[0] - x0) <= TOLERANCE for w in header) for word, x0 in expected)
+
+
+class LayoutTemplates:
+    """Persistent cache of the layout of the pages: the column boundaries, clip rectangles, ...
+
+    FIA layouts are stable within a season, so the geometry a parser detects on a page, by searching
+    the headers of its table, is kept and reused for the pages of the same layout. A layout is
+    identified by the document type, the page size and the fingerprint of the header row of its
+    table (`fingerprint`). It is reused only if a few anchor words of the header row are still where
+    they were (`anchors`), otherwise it is detected again and replaced.
+
+    The templates are kept in a JSON file:
+
+        {"<document>/<width>x<height>/<fingerprint>": {"anchors": [[word, x0], ...], "layout": {...}}}
+
+    The layouts are the JSON objects of the parsers, they must only hold numbers, strings and lists.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.lock = Lock()
+        self.templates = self.read()
+        self.hits = 0
+        self.misses = 0
+
+    def read(self) -> dict[str, dict]:
+        if not self.path.exists():
+            return {}
+
+        try:
+            return json.loads(self.path.read_text())
+        except json.JSONDecodeError:
+            logger.warning(f"corrupted layout templates {self.path}, detecting every layout again")
+            return {}
+
+    @staticmethod
+    def key(document: str, page: fitz.Page, header: list[Word]) -> str:
+        return f"{document}/{page.rect.width:.0f}x{page.rect.height:.0f}/{fingerprint(header)}"
+
+    def lookup(self, document: str, page: fitz.Page, header: list[Word]) -> dict | None:
+        """Get the layout of a page, if a template of its document type, size and header matches"""
+        with self.lock:
+            template = self.templates.get(self.key(document, page, header))
+            if template is not None and anchors_match(template["anchors"], header):
+                self.hits += 1
+                return template["layout"]
+            self.misses += 1
+            return None
+
+    def store(self, document: str, page: fitz.Page, header: list[Word], layout: dict):
+        """Keep the layout detected on a page, and write it to disk"""
+        key = self.key(document, page, header)
+        with self.lock:
+            self.templates[key] = {"anchors": anchors(header), "layout": layout}
+            self.save(key)
+        logger.debug(f"New layout template {key} in {self.path}")
+
+    def save(self, key: str):
+        """Write the template `key` to disk
+
+        The file can be shared by several processes (the page and stage workers, the rounds of a
+        batch), so the template is merged into the file currently on disk instead of overwriting it,
+        holding `cache.file_lock`.
+        """
+        with file_lock(self.path):
+            on_disk = self.read()
+            on_disk[key] = self.templates[key]
+            tmp = tmp_path(self.path)
+            tmp.write_text(json.dumps(on_disk, indent=2))
+            os.replace(tmp, self.path)
+        self.templates = {**on_disk, **self.templates}
+
+
+def load_templates(path: str | Path) -> LayoutTemplates:
+    """The templates of the file `path`, read once per process"""
+    path = Path(path)
+    with _loaded_lock:
+        if path not in _loaded:
+            _loaded[path] = LayoutTemplates(path)
+        return _loaded[path]
+
+
+def page_layout(templates: str | Path | None, document: str, text: PageText, clip: fitz.Rect | tuple,
+                detect: Callable[[], dict]) -> dict:
+    """The layout of a page, from its template if there is one, else detected and kept
+
+    :param templates: The templates file, see `LayoutTemplates`. None to always detect the layout
+    :param document: The document type, e.g. "race_classification"
+    :param text: The `PageText` of the page
+    :param clip: The area of the table, its first line of text is the header row
+    :param detect: The detection of the layout, on a miss
+    :return: The layout, a dict of numbers and lists
+    """
+    if templates is None:
+        return detect()
+
+    cache = load_templates(templates)
+    header = header_row(text, clip)
+    layout = cache.lookup(document, text.page, header)
+    if layout is None:
+        layout = detect()
+        if header:
+            cache.store(document, text.page, header, layout)
+    return layout
+
+
+def classification_layout(text: PageText, bbox: fitz.Rect) -> dict:
+    """Detect the columns of a race or sprint classification from the positions of its headers
+
+    :param text: The `PageText` of the page
+    :param bbox: The area of the table
+    :return: {"left": the left of the table, "aux_lines": the x of the lines separating the columns,
+              "snap_x_tolerance": the `find_tables` tolerance}
+    """
+    # Positions of table headers/column names
+    pos = {}
+    for col in CLASSIFICATION_COLUMNS:
+        header = text.search(col, clip=bbox)[0]
+        pos[col] = {
+            'left': header.x0,
+            'right': header.x1
+        }
+
+    # Lines separating the columns
+    aux_lines = [
+        pos['NO']['left'],
+        (pos['NO']['right'] + pos['DRIVER']['left']) / 2,
+        pos['NAT']['left'],
+        pos['NAT']['right'],
+        pos['LAPS']['left'],
+        pos['LAPS']['right'],
+        (pos['TIME']['right'] + pos['GAP']['left']) / 2,
+        (pos['GAP']['right'] + pos['INT']['left']) / 2,
+        (pos['INT']['right'] + pos['KM/H']['left']) / 2,
+        pos['FASTEST']['left'],
+        pos['FASTEST']['right'],
+        pos['PTS']['left'],
+        pos['PTS']['right']
+    ]
+    return {
+        "left": pos['NO']['left'],
+        "aux_lines": aux_lines,
+        "snap_x_tolerance": pos['ON']['left'] - pos['FASTEST']['right'],
+    }
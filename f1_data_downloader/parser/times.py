@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+# Code points of the characters found in a time string
+ZERO, NINE, COLON, DOT, SPACE, END = ord("0"), ord("9"), ord(":"), ord("."), ord(" "), 0
+
+
+def to_ms(times: pd.Series) -> pd.Series:
+    """Convert a series of time strings to milliseconds, in one pass over the whole series
+
+    "1:32.190" --> 92190, "19.190" --> 19190, "1:32:19.190" --> 5539190
+
+    The fraction of a second is optional and has up to three digits ("1:32.19" is 1:32.190).
+    Anything else ("", None, "DNF", "1 LAP", "PIT", ...) as well as out of range minutes or
+    seconds (e.g. "1:75.000") gives <NA>.
+
+    The strings are laid out as a (rows x characters) array of code points, which is read one
+    character column at a time for all the rows at once.
+
+    :param times: The time strings
+    :return: A nullable "Int64" series of milliseconds, with the same index as `times`
+    """
+    strings = np.asarray(times.where(times.notna(), "").astype(str), dtype=str)
+    n = len(strings)
+    width = strings.dtype.itemsize // 4
+    # One more column of END so every string is terminated
+    chars = np.zeros((n, width + 1), np.uint32)
+    if width:
+        chars[:, :width] = strings.view(np.uint32).reshape(n, width)
+
+    seconds = np.zeros(n, np.int64)  # h, then h * 60 + m, then the total seconds
+    field = np.zeros(n, np.int64)  # The field being read
+    field_digits = np.zeros(n, np.int64)
+    frac = np.zeros(n, np.int64)
+    frac_digits = np.zeros(n, np.int64)
+    colons = np.zeros(n, np.int64)
+    in_frac = np.zeros(n, bool)
+    started = np.zeros(n, bool)
+    done = np.zeros(n, bool)
+    valid = np.ones(n, bool)
+
+    for c in chars.T:
+        reading = ~done
+        is_space = c == SPACE
+        is_digit = reading & (c >= ZERO) & (c <= NINE)
+        is_colon = reading & (c == COLON)
+        is_dot = reading & (c == DOT)
+        is_end = reading & ((c == END) | (is_space & started))
+
+        # Leading spaces are skipped, only spaces may follow the end
+        valid &= is_digit | is_colon | is_dot | is_end | is_space | (c == END)
+
+        digit = c.astype(np.int64) - ZERO
+        field = np.where(is_digit & ~in_frac, field * 10 + digit, field)
+        field_digits += is_digit & ~in_frac
+        frac = np.where(is_digit & in_frac, frac * 10 + digit, frac)
+        frac_digits += is_digit & in_frac
+        started |= is_digit | is_colon | is_dot
+
+        # A colon or the dot ends a field, so does the end of the string if there is no fraction
+        closing = is_colon | is_dot | (is_end & ~in_frac)
+        valid &= ~(closing & in_frac)
+        valid &= ~(closing & (field_digits == 0))
+        # A minute or second field following a colon should be below 60
+        valid &= ~(closing & (colons > 0) & (field >= 60))
+        seconds = np.where(closing & ~in_frac, seconds * 60 + field, seconds)
+        field = np.where(closing, 0, field)
+        field_digits = np.where(closing, 0, field_digits)
+
+        colons += is_colon
+        in_frac |= is_dot
+        done |= is_end
+
+    valid &= started & (colons <= 2) & (frac_digits <= 3)
+    # A dot should be followed by digits
+    valid &= ~in_frac | (frac_digits > 0)
+
+    # "1:32.19" is 190 ms
+    frac = frac * 10 ** np.clip(3 - frac_digits, 0, 3)
+    ms = np.where(valid, seconds * 1000 + frac, 0)
+    return pd.Series(pd.arrays.IntegerArray(ms, ~valid), index=times.index, name=times.name)
+
+
+def to_timedelta(times: pd.Series) -> pd.Series:
+    """Convert a series of time strings to timedeltas, see `to_ms` for the accepted formats"""
+    return pd.to_timedelta(to_ms(times), unit="ms")
@@ -1,10 +1,114 @@
 import pymupdf as fitz
 import numpy as np
+import pandas as pd
+
+# A championship result cell: the points, then the finishing position on the next line, a win is
+# "1", or "1F" with the fastest lap
+WIN = r"[^\n]*\n1F?(?:\n|$)"
+# The same cell, with the first two characters to drop, see `clean_rows`
+CUT_WIN = r"(?s:..)" + WIN
+
+
+def cut_rows(pos: pd.Series) -> np.ndarray:
+    """The rows whose "pos" has a "-", their cells have two extra characters in front"""
+    return pos.astype(str).str.contains('-', regex=False).to_numpy(dtype=bool)
+
+
+def clean_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop the first two characters of every cell of the rows whose "pos" has a "-"
+
+    All such rows are cut at once, as one series of strings.
+    """
+    cut = cut_rows(df['pos'])
+    if not cut.any():
+        return df
+    block = df.to_numpy(dtype=object)
+    cells = pd.Series(block[cut].ravel(), dtype=object).astype(str).str[2:]
+    block[cut] = cells.to_numpy(dtype=object).reshape(-1, block.shape[1])
+    return pd.DataFrame(block, index=df.index, columns=df.columns)
+
+
+def count_wins(cells: np.ndarray, cut: np.ndarray | None = None) -> np.ndarray:
+    """Count the wins of every row of the result cells of a championship, see `WIN`
+
+    :param cells: The result cells, one row per driver or entrant
+    :param cut: The rows whose cells still have the two characters to drop, see `cut_rows`. By
+                default the cells are clean
+    :return: The number of wins of every row
+    """
+    cells = np.asarray(cells, dtype=object)
+    cut = np.zeros(len(cells), bool) if cut is None else cut
+    wins = np.zeros(cells.shape, bool)
+    for rows, pattern in [(~cut, WIN), (cut, CUT_WIN)]:
+        if rows.any():
+            matched = pd.Series(cells[rows].ravel(), dtype=object).str.match(pattern, na=False)
+            wins[rows] = matched.to_numpy(dtype=bool).reshape(-1, cells.shape[1])
+    return wins.sum(axis=1)
+
+
+def championship_standings(columns: list[str], rows: list[list[str]], name: str,
+                           minimal: bool = False) -> pd.DataFrame:
+    """The standings of the grid of a championship page
+
+    The rows whose "pos" has a "-" lose the first two characters of every cell, see `clean_rows`.
+    The wins are counted in the cells from the fourth column on, see `count_wins`.
+
+    :param columns: The column names: "pos", then the header words of the page
+    :param rows: The cells of every row
+    :param name: The name column, "driver" or "entrant"
+    :param minimal: Only build and clean the pos, name and total columns, the wins are matched in
+                    the result cells as they are read. By default a dataframe of the whole grid is
+                    built and cleaned. Both give the same standings
+    :return: A dataframe of [pos, <name>, total, wins]
+    """
+    if not minimal:
+        df = clean_rows(pd.DataFrame(rows, columns=columns))
+        df['wins'] = count_wins(df.iloc[:, 3:].to_numpy())
+        return df[["pos", name, "total", "wins"]]
+
+    grid = np.empty((len(rows), len(columns)), dtype=object)
+    grid[:] = rows
+    keep = [columns.index(column) for column in ["pos", name, "total"]]
+    df = pd.DataFrame(grid[:, keep], columns=["pos", name, "total"])
+    cut = cut_rows(df['pos'])
+    df = clean_rows(df)
+    df['wins'] = count_wins(grid[:, 3:], cut)
+    return df
+
+
+def lap_chart_positions(df: pd.DataFrame) -> pd.DataFrame:
+    """Reshape the tables of a lap chart to long format, i.e. to lap-position level
+
+    :param df: The tables of one or more pages: a "lap" column, then a column per position holding
+               the driver No.
+    :return: A dataframe of [lap No., position, driver No.]
+    """
+    df = df.set_index('lap')
+    df = df.stack().reset_index()
+    df.columns = ['lap', 'position', 'driver_no']
+    for col in ['lap', 'position', 'driver_no']:
+        df[col] = df[col].astype(int)
+    return df
+
+
+def table_cells(table) -> tuple[list[str], list[list[str]]]:
+    """The column names and the rows of a `find_tables` table, read as `Table.to_pandas` reads them
+
+    The names are the header cells, an empty one is named "Col<i>" and a repeated one "<i>-<name>".
+    Unlike `to_pandas`, no dataframe is built.
+
+    :return: The column names and the cells of every row below the header
+    """
+    names = list(table.header.names)
+    names = [name or f"Col{i}" for i, name in enumerate(names)]
+    if len(set(names)) != len(names):
+        names = [name if name == f"Col{i}" else f"{i}-{name}" for i, name in enumerate(names)]
+
+    rows = table.extract()
+    if not table.header.external:
+        rows = rows[1:]
+    return names, [row[:len(names)] for row in rows]
 
-def clean_row(row):
-    if "-" in str(row['pos']):
-        row = row.map(lambda x: str(x)[2:])
-    return row
 
 def get_image_header(page: fitz.Page) -> fitz.Rect | None:
         """Find if any image is the header. See #26.
@@ -0,0 +1,227 @@
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Callable, Iterator
+import logging
+import time
+
+import pandas as pd
+
+from f1_data_downloader.parser.engines import FIND_TABLES
+from f1_data_downloader.tracing import span
+from f1_data_downloader.parser.parse_quali import parse_quali_final_classification
+from f1_data_downloader.parser.parse_driver_championship import (iter_driver_championship,
+                                                                 parse_driver_championship)
+from f1_data_downloader.parser.parse_constructor_championship import (iter_constructor_championship,
+                                                                      parse_constructor_championship)
+from f1_data_downloader.parser.parse_race_classification import parse_race_final_classification
+from f1_data_downloader.parser.parse_race_history_chart import (iter_race_history_chart,
+                                                                parse_race_history_chart)
+from f1_data_downloader.parser.parse_race_lap_chart import iter_race_lap_chart, parse_race_lap_chart
+from f1_data_downloader.parser.parse_race_pit_stops import parse_race_pit_stop
+from f1_data_downloader.parser.parse_starting_grid import parse_starting_grid
+
+from f1_data_downloader.parser.parse_sprint_history_chart import (iter_sprint_history_chart,
+                                                                  parse_sprint_history_chart)
+from f1_data_downloader.parser.parse_sprint_classification import parse_sprint_final_classification
+from f1_data_downloader.parser.parse_sprint_lap_chart import iter_sprint_lap_chart, parse_sprint_lap_chart
+
+logger = logging.getLogger(__name__)
+
+# Parser of every document, by the name of its file (without the .pdf extension)
+PARSERS: dict[str, Callable[[Path], pd.DataFrame]] = {
+    "race_classification": parse_race_final_classification,
+    "quali_classification": parse_quali_final_classification,
+    "starting_grid": parse_starting_grid,
+    "race_lap_chart": parse_race_lap_chart,
+    "drivers_championship": parse_driver_championship,
+    "constructors_championship": parse_constructor_championship,
+    "race_pit_stops": parse_race_pit_stop,
+    "race_history_chart": parse_race_history_chart,
+    "sprint_classification": parse_sprint_final_classification,
+    "sprint_lap_chart": parse_sprint_lap_chart,
+    "sprint_history_chart": parse_sprint_history_chart,
+}
+
+# The multi-page documents that can be parsed page by page, see `output.write_batches`. They take
+# the options of their parser, but the page processes
+ITERATORS: dict[str, Callable[..., Iterator[pd.DataFrame]]] = {
+    "race_lap_chart": iter_race_lap_chart,
+    "drivers_championship": iter_driver_championship,
+    "constructors_championship": iter_constructor_championship,
+    "race_history_chart": iter_race_history_chart,
+    "sprint_lap_chart": iter_sprint_lap_chart,
+    "sprint_history_chart": iter_sprint_history_chart,
+}
+
+# Documents whose pages can be parsed in parallel worker processes, see `parser.pages.parse_pages`
+PAGE_PARALLEL = {
+    "race_history_chart",
+    "sprint_history_chart",
+    "race_lap_chart",
+    "sprint_lap_chart",
+    "drivers_championship",
+    "constructors_championship",
+}
+
+# Documents whose tables can be read by another table engine, see `parser.buckets`
+TABLE_ENGINE = {
+    "race_classification",
+    "sprint_classification",
+    "race_history_chart",
+    "sprint_history_chart",
+}
+
+# Documents whose layout can be reused from a template, see `parser.templates`
+TEMPLATES = {
+    "race_classification",
+    "sprint_classification",
+    "quali_classification",
+    "race_history_chart",
+    "sprint_history_chart",
+}
+
+# Documents of which only the standings are used: their parser skips the race cells, see
+# `parser.utils.championship_standings`
+STANDINGS = {
+    "drivers_championship",
+    "constructors_championship",
+}
+
+
+def parse_document(parser: Callable[..., pd.DataFrame], file: Path, kwargs: dict) -> pd.DataFrame:
+    """Parse a document in a "parse" span of the trace, named after the document"""
+    with span(Path(file).stem, "parse", **kwargs):
+        return parser(file, **kwargs)
+
+
+class DocumentRegistry:
+    """The documents of a round, each parsed at most once
+
+    A document is parsed the first time it is requested and the dataframe is kept for the rest of
+    the run. Every request gets its own copy, so a consumer can modify it without affecting the
+    others.
+
+    The number of parses and requests, the time spent parsing and the number of text extractions of
+    every document are recorded, see `log_report`.
+
+    With `page_processes`, the pages of the multi-page documents (`PAGE_PARALLEL`) are split across
+    that many worker processes. `table_engine` is the table engine of the documents supporting it
+    (`TABLE_ENGINE`). The championships are read in their minimal mode (`STANDINGS`). With
+    `templates`, the documents supporting it (`TEMPLATES`) reuse the layout of the documents read
+    before, see `parser.templates.LayoutTemplates`.
+    """
+
+    def __init__(self, data_dir: Path, parsers: dict[str, Callable[[Path], pd.DataFrame]] | None = None,
+                 page_processes: int | None = None, table_engine: str = FIND_TABLES,
+                 templates: Path | None = None):
+        self.data_dir = Path(data_dir)
+        self.parsers = PARSERS if parsers is None else parsers
+        self.page_processes = page_processes
+        self.table_engine = table_engine
+        self.templates = templates
+
+        self.frames: dict[str, pd.DataFrame] = {}
+        self.parse_counts: Counter[str] = Counter()
+        self.request_counts: Counter[str] = Counter()
+        self.parse_seconds: defaultdict[str, float] = defaultdict(float)
+        # Text extractions reported by the parsers, see `parser.page_text`
+        self.text_extractions: dict[str, int | None] = {}
+
+    def path(self, name: str) -> Path:
+        return self.data_dir / f"{name}.pdf"
+
+    def get(self, name: str) -> pd.DataFrame:
+        """Get the parsed document `name`, parsing it if this is the first request
+
+        :param name: The name of the document, e.g. "race_classification"
+        :return: A copy of the parsed dataframe
+        """
+        if name not in self.parsers:
+            raise KeyError(f"no parser for the document {name}")
+
+        self.request_counts[name] += 1
+        if name not in self.frames:
+            start = time.perf_counter()
+            df = parse_document(self.parsers[name], self.path(name), self.parse_kwargs(name))
+            self.add(name, df, time.perf_counter() - start)
+
+        return self.frames[name].copy()
+
+    def iter_batches(self, name: str) -> Iterator[pd.DataFrame]:
+        """Parse the document `name` page by page, see `ITERATORS`
+
+        The batches are not kept, so the document is never held whole, and it is parsed again by
+        every call. A document already parsed is given as one batch.
+
+        :param name: The name of the document, e.g. "race_history_chart"
+        :return: The dataframe of every page, see the iterator of the document
+        """
+        if name not in ITERATORS:
+            raise KeyError(f"no page by page parser for the document {name}")
+
+        self.request_counts[name] += 1
+        if name in self.frames:
+            yield self.frames[name].copy()
+            return
+
+        # The pages are parsed one after another
+        kwargs = {key: value for key, value in self.parse_kwargs(name).items() if key != "processes"}
+        batches = ITERATORS[name](self.path(name), **kwargs)
+        seconds = 0.0
+        while True:
+            start = time.perf_counter()
+            df = next(batches, None)
+            seconds += time.perf_counter() - start
+            if df is None:
+                break
+            yield df
+        self.parse_seconds[name] += seconds
+        self.parse_counts[name] += 1
+        self.text_extractions[name] = None
+
+    def parse_kwargs(self, name: str) -> dict:
+        """The options of the parser of the document `name`: its page processes, table engine,
+        minimal mode and layout templates"""
+        kwargs = {}
+        if self.page_processes is not None and name in PAGE_PARALLEL:
+            kwargs["processes"] = self.page_processes
+        if self.table_engine != FIND_TABLES and name in TABLE_ENGINE:
+            kwargs["engine"] = self.table_engine
+        if name in STANDINGS:
+            kwargs["minimal"] = True
+        if self.templates is not None and name in TEMPLATES:
+            # A string, the options are shown in the trace
+            kwargs["templates"] = str(self.templates)
+        return kwargs
+
+    def add(self, name: str, df: pd.DataFrame, seconds: float):
+        """Add the document `name`, parsed elsewhere in `seconds`, e.g. by a worker process"""
+        self.frames[name] = df
+        self.parse_seconds[name] += seconds
+        self.parse_counts[name] += 1
+        self.text_extractions[name] = df.attrs.get("text_extractions")
+
+    def clear(self):
+        """Forget the parsed documents, e.g. after the files were downloaded again"""
+        self.frames = {}
+
+    def report(self) -> list[dict]:
+        """The parse count, request count, parse time and text extractions of every requested document"""
+        return [
+            {
+                "document": name,
+                "parses": self.parse_counts[name],
+                "requests": self.request_counts[name],
+                "seconds": round(self.parse_seconds[name], 3),
+                "text_extractions": self.text_extractions.get(name),
+            }
+            for name in self.request_counts
+        ]
+
+    def log_report(self):
+        logger.info("----- Parsed documents -----")
+        for row in self.report():
+            logger.info(f"{row['document']}: parsed {row['parses']} time(s) in {row['seconds']:.3f}s, "
+                        f"{row['text_extractions']} text extraction(s), requested {row['requests']} time(s)")
+        total = sum(self.parse_seconds.values())
+        logger.info(f"Total parse time: {total:.3f}s")
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable
+import logging
+import os
+import queue
+import threading
+import time
+
+from f1_data_downloader.tracing import add_spans, span, start_trace, stop_trace, tracing
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from f1_data_downloader.output import TableWriter
+    from f1_data_downloader.registry import DocumentRegistry
+
+logger = logging.getLogger(__name__)
+
+# A stage creates a table from parsed documents: (registry, writer) -> None, see `tables.create_*`
+Stage = Callable[["DocumentRegistry", "TableWriter"], None]
+
+def parse_in_worker(parser: Callable[..., pd.DataFrame], file: Path, kwargs: dict,
+                    traced: bool) -> tuple[pd.DataFrame, float, float, list[dict]]:
+    """Parse a document in a worker process, or a thread, see `run_stages`
+
+    :return: The dataframe, the start and end of the parse (`time.perf_counter`, the same clock in
+             every process) and the spans recorded if `traced`
+    """
+    from f1_data_downloader.registry import parse_document
+
+    if traced:
+        start_trace()
+    start = time.perf_counter()
+    try:
+        df = parse_document(parser, file, kwargs)
+    finally:
+        end = time.perf_counter()
+        spans = stop_trace() if traced else []
+    return df, start, end, spans
+
+
+def critical_path(durations: dict[str, float], dependencies: dict[str, list[str]]) -> tuple[list[str], float]:
+    """The longest chain of the graph, weighted by the duration of its nodes
+
+    No schedule can finish before the nodes of this chain ran one after another, whatever the
+    number of processes.
+
+    :param durations: The seconds of every node
+    :param dependencies: The nodes every node waits for, the graph must not have cycles. The nodes
+                         without a duration are ignored
+    :return: The nodes of the chain, in order, and its seconds
+    """
+    finish: dict[str, tuple[float, list[str]]] = {}
+
+    def longest(node: str) -> tuple[float, list[str]]:
+        if node not in finish:
+            before = max((longest(dependency) for dependency in dependencies.get(node, [])
+                          if dependency in durations), default=(0.0, []))
+            finish[node] = (before[0] + durations[node], before[1] + [node])
+        return finish[node]
+
+    seconds, path = max((longest(node) for node in durations), default=(0.0, []))
+    return path, seconds
+
+
+def run_stages(stages: dict[str, tuple[Stage, list[str]]], registry: DocumentRegistry,
+               writer: TableWriter, processes: int | None = None,
+               arrivals: Iterable[str] | None = None, threads: bool = False,
+               streamed: Iterable[str] = ()) -> list[dict]:
+    """Run the stages of a round, every one as soon as the documents it needs are parsed
+
+    The stages and their documents form a graph: every document is parsed once, whatever the
+    number of stages needing it, and the documents are parsed in parallel worker processes. A
+    stage only transforms the dataframes and writes its table, so it runs in this process as soon
+    as its last document is parsed, while the other documents are still being parsed. The
+    documents already in the registry are not parsed again.
+
+    :param stages: The function of every stage and the names of the documents it needs, by name
+    :param registry: The registry the parsed documents are added to
+    :param writer: The writer of the tables
+    :param processes: Number of documents parsed at the same time, by default the number of CPUs.
+                      With 1, the documents are parsed one after another in this process
+    :param arrivals: The names of the documents as they land in the data directory, e.g. while they
+                     are downloaded: every document is parsed as soon as it arrives. By default,
+                     every document is already there. The stages whose documents never arrived run
+                     at the end, and parse what they find
+    :param threads: Parse the documents in threads of this process instead of worker processes. The
+                    parsers keep no state between documents, see `parser.pages.DocumentParser`.
+                    There is no process to start and no dataframe to send back, and what the
+                    parsers load once (the layout templates, ...) is shared. The calls to PyMuPDF
+                    take turns, see `parser.page_text.FITZ_LOCK`: the dataframes of a document are
+                    built while another document is read
+    :param streamed: The documents the stages read page by page themselves, see
+                     `registry.DocumentRegistry.iter_batches`. They are not parsed by the workers: a
+                     stage needing one runs in this process as soon as it arrived
+    :return: The start and end of every document and stage, in seconds since the start of the run,
+             see `log_schedule`
+    """
+    documents = list(dict.fromkeys(document for _, needs in stages.values() for document in needs))
+    streamed = set(streamed)
+    # The streamed documents arrived, ready for their stages
+    arrived = set()
+    parsed_documents = [document for document in documents if document not in streamed]
+    processes = min(processes or os.cpu_count() or 1, len(parsed_documents) or 1)
+
+    origin = time.perf_counter()
+    schedule = []
+    waiting = dict(stages)
+
+    def parsed(name: str, df: pd.DataFrame, start: float, end: float):
+        registry.add(name, df, end - start)
+        schedule.append({"name": name, "kind": "parse", "start": start - origin, "end": end - origin,
+                         "needs": []})
+
+    def run_ready(everything: bool = False):
+        for name, (stage, needs) in list(waiting.items()):
+            if everything or all(document in registry.frames or document in arrived for document in needs):
+                del waiting[name]
+                start = time.perf_counter()
+                with span(name, "csv"):
+                    stage(registry, writer)
+                schedule.append({"name": name, "kind": "stage", "start": start - origin,
+                                 "end": time.perf_counter() - origin, "needs": list(needs)})
+
+    # The documents arriving, then None, then the parses finishing, all handled in this thread
+    events = queue.SimpleQueue()
+    if arrivals is None:
+        for name in documents:
+            events.put(name)
+        events.put(None)
+    else:
+        threading.Thread(target=forward, args=(arrivals, events), name="arrivals", daemon=True).start()
+
+    executor = None
+    if processes > 1:
+        executor = ThreadPoolExecutor(processes, "parse") if threads else ProcessPoolExecutor(processes)
+    running: dict[Future, str] = {}
+    arriving = True
+    try:
+        run_ready()
+        while arriving or running:
+            event = events.get()
+            if event is None:
+                arriving = False
+            elif isinstance(event, BaseException):
+                raise event
+            elif isinstance(event, str):
+                if event not in documents or event in registry.frames or event in running.values():
+                    continue
+                if event in streamed:
+                    arrived.add(event)
+                    run_ready()
+                    continue
+                args = (registry.parsers[event], registry.path(event), registry.parse_kwargs(event))
+                if executor is None:
+                    df, start, end, _ = parse_in_worker(*args, False)
+                    parsed(event, df, start, end)
+                    run_ready()
+                    continue
+                # The threads record their spans themselves
+                future = executor.submit(parse_in_worker, *args, tracing() and not threads)
+                running[future] = event
+                future.add_done_callback(events.put)
+            else:
+                df, start, end, spans = event.result()
+                add_spans(spans)
+                parsed(running.pop(event), df, start, end)
+                run_ready()
+        run_ready(everything=True)
+    except BaseException:
+        if executor is not None:
+            # Do not parse the other documents of a failed round
+            executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+    if executor is not None:
+        executor.shutdown()
+    return schedule
+
+
+def forward(arrivals: Iterable[str], events: queue.SimpleQueue):
+    """Put the arrivals in the queue of events of `run_stages`, then None, or the error raised"""
+    try:
+        for name in arrivals:
+            events.put(name)
+    except BaseException as e:
+        events.put(e)
+    events.put(None)
+
+
+def log_schedule(schedule: list[dict]):
+    """Log when every document was parsed and every stage ran, and the critical path of the run"""
+    if not schedule:
+        return
+
+    logger.info("----- Stage schedule -----")
+    for node in sorted(schedule, key=lambda node: node["start"]):
+        logger.info(f"{node['name']} ({node['kind']}): {node['start']:.3f}s -> {node['end']:.3f}s")
+
+    durations = {node["name"]: node["end"] - node["start"] for node in schedule}
+    dependencies = {node["name"]: node["needs"] for node in schedule}
+    path, seconds = critical_path(durations, dependencies)
+    wall = max(node["end"] for node in schedule) - min(node["start"] for node in schedule)
+    logger.info("Critical path: " + " -> ".join(f"{name} ({durations[name]:.3f}s)" for name in path)
+                + f" = {seconds:.3f}s")
+    logger.info(f"Wall time: {wall:.3f}s for {sum(durations.values()):.3f}s of parsing and stages")
@@ -0,0 +1,384 @@
+from __future__ import annotations
+
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+import logging
+
+from f1_data_downloader.output import TableWriter
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from f1_data_downloader.registry import DocumentRegistry
+    from f1_data_downloader.scheduler import Stage
+
+# The tables of a round, created from the parsed documents by the stages of `round_stages`. With the
+# parsers, this is the code deciding what the tables hold, see `dataset.PARSER_SOURCES`
+
+entrant_id_mapping = {
+    "Oracle Red Bull Racing": 9,
+    "McLaren Formula 1 Team": 1,
+    "Mercedes-AMG PETRONAS F1 Team": 131,
+    "Aston Martin Aramco F1 Team": 117,
+    "Scuderia Ferrari HP": 6,
+    "Atlassian Williams Racing": 3,
+    "BWT Alpine F1 Team": 214,
+    "MoneyGram Haas F1 Team": 210,
+    "Visa Cash App Racing Bulls F1 Team": 215,
+    "Stake F1 Team Kick Sauber": 15,
+    "Kick Sauber F1 Team": 15,
+}
+
+driver_mapping = {
+    "L. NORRIS": 846,
+    "M. VERSTAPPEN": 830,
+    "G. RUSSELL": 847,
+    "I. HADJAR": 863,
+    "A. ALBON": 848,
+    "L. STROLL": 840,
+    "N. HULKENBERG": 807,
+    "C. LECLERC": 844,
+    "O. PIASTRI": 857,
+    "L. HAMILTON": 1,
+    "P. GASLY": 842,
+    "Y. TSUNODA": 852,
+    "E. OCON": 839,
+    "O. BEARMAN": 860,
+    "L. LAWSON": 859,
+    "K. ANTONELLI": 864,
+    "F. ALONSO": 4,
+    "C. SAINZ": 832,
+    "J. DOOHAN": 862,
+    "G. BORTOLETO": 865,
+    "F. COLAPINTO": 861,
+}
+
+driver_no_mapping = {
+    4: 846,
+    1: 830,
+    63: 847,
+    6: 863,
+    23: 848,
+    18: 840,
+    27: 807,
+    16: 844,
+    81: 857,
+    44: 1,
+    10: 842,
+    22: 852,
+    31: 839,
+    87: 860,
+    30: 859,
+    12: 864,
+    14: 4,
+    55: 832,
+    7: 862,
+    5: 865,
+    43: 861,
+}
+
+# The documents of the stages of `round_stages(..., stream=True)`, parsed and written page
+# by page instead of parsed whole by the stage workers
+STREAMED = {
+    "constructors_championship",
+    "drivers_championship",
+    "race_history_chart",
+    "sprint_history_chart",
+}
+
+# Writes the csv files to ./csv
+CSV_WRITER = TableWriter(Path("."))
+
+logger = logging.getLogger(__name__)
+
+def create_constructor_results(registry: DocumentRegistry, writer: TableWriter = CSV_WRITER):
+    data = registry.get("race_classification")
+    data['constructor_id'] = data['entrant'].map(lambda x: entrant_id_mapping.get(x)).astype(int)
+    data = data[['constructor_id', 'points']]
+    data['points'] = data['points'].astype('Int64')
+    result = data.groupby("constructor_id", as_index=False)["points"].sum()
+    writer.write("constructor_results", result)
+
+    logger.info("----- Table written for constructor results -----")
+
+def create_constructor_standings(registry: DocumentRegistry, writer: TableWriter = CSV_WRITER):
+    data = constructor_standings(registry.get("constructors_championship"))
+
+    writer.write("constructor_standings", data)
+
+    logger.info("----- Table written for constructor standings -----")
+
+def stream_constructor_standings(registry: DocumentRegistry, writer: TableWriter = CSV_WRITER):
+    """`create_constructor_standings`, the championship parsed and written page by page"""
+    batches = registry.iter_batches("constructors_championship")
+    writer.write_batches("constructor_standings", map(constructor_standings, batches))
+
+    logger.info("----- Table written for constructor standings -----")
+
+def constructor_standings(data: pd.DataFrame) -> pd.DataFrame:
+    """The constructor standings table of a parsed constructors' championship, or of its pages"""
+    data['position'] = data['pos']
+    data['position_text'] = data['pos']
+    data['points'] = data['total']
+    data['constructor_id'] = data['entrant'].map(lambda x: entrant_id_mapping.get(x)).astype(int)
+
+    return data[['constructor_id', 'points', 'position', 'position_text', 'wins']]
+
+def create_results(registry: DocumentRegistry, writer: TableWriter = CSV_WRITER):
+    from f1_data_downloader.parser.times import to_ms
+
+    data = registry.get("race_classification")
+    grid_data = registry.get("starting_grid")
+
+    data = data.reset_index(drop=True)
+    data['driver_id'] = data['driver_no'].map(driver_no_mapping).astype('Int64')
+    data['driver_number'] = data['driver_no'].astype(int)
+    data['constructor_id'] = data['entrant'].map(lambda x: entrant_id_mapping.get(x)).astype(int)
+    data['position'] = data.index + 1
+
+    data['position_text'] = data['position'].astype(str)
+    is_dnf = data["gap"].astype(str).str.strip().eq("DNF")
+    data.loc[is_dnf, "position_text"] = "R"
+
+    data['position_order'] = data['position']
+    data["milliseconds"] = to_ms(data['time'])
+    data.loc[1:, "time"] = data.loc[1:, "gap"]
+
+    data['fastest_lap'] = data['on']
+    data['fastest_lap_time'] = data['fastest']
+    data['fastest_lap_speed'] = data['km/h']
+    data['fastest_ms'] = to_ms(data['fastest'])
+    data['rank'] = data["fastest_ms"].rank(method="min", ascending=True).astype('Int64')
+
+    data = data[[
+        'driver_id',
+        'constructor_id',
+        'driver_number',
+        'position',
+        'position_text',
+        'position_order',
+        'points',
+        'laps',
+        'time',
+        'milliseconds',
+        'fastest_lap',
+        'fastest_lap_time',
+        'rank',
+        'fastest_lap_speed',
+    ]]
+
+    grid_data = grid_data.reset_index().rename(columns={"index": "grid"})
+    grid_data['grid'] = grid_data['grid'] + 1
+
+    data = data.merge(grid_data[['car', 'grid']], left_on='driver_number', right_on='car', how='left').drop(columns=['car'])
+
+    writer.write("results", data)
+
+    logger.info("----- Table written for results -----")
+
+def create_driver_standings(registry: DocumentRegistry, writer: TableWriter = CSV_WRITER):
+    data = driver_standings(registry.get("drivers_championship"))
+
+    writer.write("driver_standings", data)
+    logger.info("----- Table written for driver standings -----")
+
+def stream_driver_standings(registry: DocumentRegistry, writer: TableWriter = CSV_WRITER):
+    """`create_driver_standings`, the championship parsed and written page by page"""
+    def standings() -> Iterator[pd.DataFrame]:
+        position = 1
+        for batch in registry.iter_batches("drivers_championship"):
+            yield driver_standings(batch, position)
+            position += len(batch)
+
+    writer.write_batches("driver_standings", standings())
+    logger.info("----- Table written for driver standings -----")
+
+def driver_standings(data: pd.DataFrame, first_position: int = 1) -> pd.DataFrame:
+    """The driver standings table of a parsed drivers' championship, or of its pages
+
+    :param first_position: The position of the first row, the rows are in the order of the standings
+    """
+    data = data.reset_index(drop=True)
+    data['points'] = data['total']
+    data['driver_id'] = data['driver'].map(lambda x: driver_mapping.get(x))
+    data['position'] = data.index + first_position
+    data['position_text'] = data['position']
+   
+    return data[[
+        'driver_id',
+        'points',
+        'position',
+        'position_text',
+        'wins'
+    ]]
+
+
+def create_lap_times(is_sprint: bool, registry: DocumentRegistry, writer: TableWriter = CSV_WRITER):
+    data = lap_times(registry.get("race_history_chart"))
+
+    writer.write("lap_times", data)
+    logger.info("----- Table written for lap times -----")
+
+def create_sprint_lap_times(registry: DocumentRegistry, writer: TableWriter = CSV_WRITER):
+    data = lap_times(registry.get("sprint_history_chart"))
+
+    writer.write("sprint_lap_times", data)
+    logger.info("----- Table written for sprint lap times -----")
+
+def stream_lap_times(document: str, table: str, registry: DocumentRegistry,
+                     writer: TableWriter = CSV_WRITER):
+    """`create_lap_times` or `create_sprint_lap_times`, the history chart parsed and written page by page
+
+    The rows are in the order of the document, see `parser.history.history_batches`, instead of
+    sorted by driver.
+    """
+    writer.write_batches(table, map(lap_times, registry.iter_batches(document)))
+    logger.info(f"----- Table written for {table.replace('_', ' ')} -----")
+
+def lap_times(data: pd.DataFrame) -> pd.DataFrame:
+    """The lap times table of a parsed history chart"""
+    from f1_data_downloader.parser.times import to_ms
+
+    data = data.reset_index(drop=True)
+
+    data['driver_id'] = data['driver_no'].map(driver_no_mapping).astype('Int64')
+    data['milliseconds'] = to_ms(data['time'])
+
+    data = data[[
+        'driver_id',
+        'lap',
+        'position',
+        'time',
+        'milliseconds',
+        'gap_ms',
+        'laps_down',
+        'in_pit'
+    ]]
+    return data
+
+def create_pit_stops(registry: DocumentRegistry, writer: TableWriter = CSV_WRITER):
+    from f1_data_downloader.parser.times import to_ms
+
+    data = registry.get("race_pit_stops")
+    data = data.reset_index(drop=True)
+
+    data['driver_id'] = data['driver_no'].map(driver_no_mapping).astype('Int64')
+    data['stop'] = data['no']
+    data['time'] = data['local_time']
+    data['milliseconds'] = to_ms(data['duration'])
+
+    data = data[[
+        'driver_id',
+        'stop',
+        'lap',
+        'time',
+        'duration',
+        'milliseconds'
+    ]]
+
+    writer.write("pit_stops", data)
+    logger.info("----- Table written for pit stops -----")
+
+def create_qualifying(registry: DocumentRegistry, writer: TableWriter = CSV_WRITER):
+    data = registry.get("quali_classification")
+    data = data.reset_index(drop=True)
+
+    data['driver_id'] = data['no'].map(driver_no_mapping).astype('Int64')
+    data['constructor_id'] = data['entrant'].map(lambda x: entrant_id_mapping.get(x)).astype('Int64')
+    data['number'] = data['no']
+    data['position'] = data.index + 1
+
+    data = data[[
+        'driver_id',
+        'constructor_id',
+        'number',
+        'position',
+        'q1',
+        'q2',
+        'q3'
+    ]]
+
+    writer.write("qualifying", data)
+    logger.info("----- Table written for qualifying -----")
+
+def create_sprint_results(registry: DocumentRegistry, writer: TableWriter = CSV_WRITER):
+    from f1_data_downloader.parser.times import to_ms
+
+    data = registry.get("sprint_classification")
+    
+    data = data.reset_index(drop=True)
+    data['driver_id'] = data['driver_no'].map(driver_no_mapping).astype('Int64')
+    data['constructor_id'] = data['entrant'].map(lambda x: entrant_id_mapping.get(x))
+    data['position'] = data.index + 1
+
+    data['position_text'] = data['position'].astype(str)
+    is_dnf = data["gap"].astype(str).str.strip().eq("DNF")
+    data.loc[is_dnf, "position_text"] = "R"
+
+    data['position_order'] = data['position']
+    data["milliseconds"] = to_ms(data['time'])
+    data.loc[1:, "time"] = data.loc[1:, "gap"]
+
+    data['fastest_lap'] = data['on']
+    data['fastest_lap_time'] = data['fastest']
+
+    data = data[[
+        'driver_id',
+        'constructor_id',
+        'driver_no',
+        'position',
+        'position_text',
+        'position_order',
+        'points',
+        'laps',
+        'time',
+        'milliseconds',
+        'fastest_lap',
+        'fastest_lap_time',
+    ]]
+
+    writer.write("sprint_results", data)
+
+    logger.info("----- Table written for sprint results -----")
+
+
+def create_sprint_classification(registry: DocumentRegistry, writer: TableWriter = CSV_WRITER):
+    data = registry.get("sprint_classification")
+    data = data[['driver_no', 'laps', 'time', 'gap', 'fastest', 'on', 'points']]
+    writer.write("sprint_classification", data)
+
+    logger.info("----- Table written for sprint classification -----")
+    return
+
+def round_stages(is_sprint: bool, stream: bool = False) -> dict[str, tuple[Stage, list[str]]]:
+    """The stages of a round and the documents each one needs, see `scheduler.run_stages`
+
+    The stages of the sprint are only run on a sprint weekend, along with the ones of the race.
+    With `stream`, the stages of the multi-page documents (`STREAMED`) parse and write them page
+    by page instead.
+    """
+    stages = {
+        "create_constructor_results": (create_constructor_results, ["race_classification"]),
+        "create_constructor_standings": (create_constructor_standings, ["constructors_championship"]),
+        "create_results": (create_results, ["race_classification", "starting_grid"]),
+        "create_driver_standings": (create_driver_standings, ["drivers_championship"]),
+        "create_lap_times": (partial(create_lap_times, is_sprint), ["race_history_chart"]),
+        "create_pit_stops": (create_pit_stops, ["race_pit_stops"]),
+        "create_qualifying": (create_qualifying, ["quali_classification"]),
+    }
+    if is_sprint:
+        stages.update({
+            "create_sprint_results": (create_sprint_results, ["sprint_classification"]),
+            "create_sprint_classification": (create_sprint_classification, ["sprint_classification"]),
+            "create_sprint_lap_times": (create_sprint_lap_times, ["sprint_history_chart"]),
+        })
+    if stream:
+        streamed = {
+            "create_constructor_standings": stream_constructor_standings,
+            "create_driver_standings": stream_driver_standings,
+            "create_lap_times": partial(stream_lap_times, "race_history_chart", "lap_times"),
+            "create_sprint_lap_times": partial(stream_lap_times, "sprint_history_chart", "sprint_lap_times"),
+        }
+        stages = {name: (streamed.get(name, stage), needs) for name, (stage, needs) in stages.items()}
+    return stages
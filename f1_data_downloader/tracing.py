@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+import json
+import logging
+import os
+import threading
+import time
+
+if TYPE_CHECKING:
+    import pstats
+
+logger = logging.getLogger(__name__)
+
+# The paths of the collapsed stacks taking less of the profiled time than this, or deeper, are not
+# expanded, see `collapsed_stacks`
+MIN_FRACTION = 1e-3
+MAX_DEPTH = 64
+
+# Spans recorded since `start_trace`, None when tracing is off
+_spans: list[dict] | None = None
+_lock = threading.Lock()
+
+
+def start_trace():
+    """Start recording the spans, forgetting the ones recorded before"""
+    global _spans
+    _spans = []
+
+
+def stop_trace() -> list[dict]:
+    """Stop recording the spans
+
+    :return: The recorded spans
+    """
+    global _spans
+    spans, _spans = _spans or [], None
+    return spans
+
+
+def tracing() -> bool:
+    return _spans is not None
+
+
+def add_spans(spans: list[dict]):
+    """Add spans recorded elsewhere, e.g. in a worker process"""
+    if _spans is not None:
+        with _lock:
+            _spans.extend(spans)
+
+
+@contextmanager
+def span(name: str, category: str, **args):
+    """Time the enclosed block as a span of the trace, if tracing is on
+
+    The spans are "complete" events of the Chrome trace event format: a trace file opens in
+    chrome://tracing or https://ui.perfetto.dev, with one track per process and thread.
+
+    :param name: The name of the span, e.g. the name of the document
+    :param category: The kind of span, e.g. "download" or "parse"
+    :param args: More details shown with the span, they should be JSON serializable
+    """
+    if _spans is None:
+        yield
+        return
+
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start / 1000,  # Microseconds
+            "dur": (end - start) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with _lock:
+            _spans.append(event)
+
+
+def write_trace(filepath: Path, spans: list[dict]):
+    """Write the spans as a JSON trace file, see `span`"""
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    filepath.write_text(json.dumps({"traceEvents": spans, "displayTimeUnit": "ms"}))
+
+
+@contextmanager
+def record_trace(filepath: Path):
+    """Record the spans of the enclosed block and write them to a JSON trace file, see `span`"""
+    start_trace()
+    try:
+        yield
+    finally:
+        spans = stop_trace()
+        write_trace(filepath, spans)
+        logger.info(f"Trace of {len(spans)} spans written to {filepath}")
+
+
+def collapsed_stacks(stats: pstats.Stats) -> list[str]:
+    """Turn profile stats into collapsed stacks, the input of flame graph tools
+
+    cProfile does not keep whole stacks, only who called whom. Every caller -> callee edge is
+    followed from the functions nobody called, and the time spent in a function itself is spread
+    over the paths leading to it in proportion of the time spent on each edge. This is an
+    approximation: a function called from several places gets the same mix of callees on every
+    path. A function calling itself is only expanded once per path.
+
+    The number of paths grows exponentially with the functions called from several places, so a
+    callee is not expanded when its path takes less than `MIN_FRACTION` of the profiled time, or is
+    deeper than `MAX_DEPTH`: it is one frame with the cumulative time of its path, too narrow to
+    see in a flame graph anyway.
+
+    :return: One "root;caller;function microseconds" line per path
+    """
+    raw = stats.stats  # {function: (primitive calls, calls, own time, cumulative time, callers)}
+
+    def label(func: tuple) -> str:
+        filename, line, name = func
+        return f"{Path(filename).name}:{line}:{name}" if line else name
+
+    callees: dict[tuple, list[tuple]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller in callers:
+            callees.setdefault(caller, []).append(func)
+
+    roots = [func for func, (_, _, _, _, callers) in raw.items() if not callers]
+    min_seconds = MIN_FRACTION * sum(raw[func][3] for func in roots)
+    lines = {}
+
+    def add(stack: list[str], seconds: float):
+        key = ";".join(stack)
+        lines[key] = lines.get(key, 0) + seconds
+
+    def walk(func: tuple, path: list[str], share: float, seen: set):
+        stack = path + [label(func)]
+        add(stack, raw[func][2] * share)
+        for callee in callees.get(func, []):
+            # The cumulative time of the callee when called by this caller, out of its whole time
+            total = raw[callee][3]
+            callee_share = share * raw[callee][4][func][3] / total if total else 0
+            if callee in seen:
+                continue
+            if total * callee_share < min_seconds or len(stack) >= MAX_DEPTH:
+                add(stack + [label(callee)], total * callee_share)
+            else:
+                walk(callee, stack, callee_share, seen | {callee})
+
+    for func in roots:
+        walk(func, [], 1.0, {func})
+
+    return [f"{stack} {round(seconds * 1e6)}" for stack, seconds in lines.items() if seconds * 1e6 >= 1]
+
+
+@contextmanager
+def profile(prefix: Path):
+    """Profile the enclosed block with cProfile
+
+    Writes `<prefix>.pstats`, readable with `python -m pstats`, and `<prefix>.collapsed`, the
+    collapsed stacks for flame graph tools (flamegraph.pl, speedscope, ...).
+    """
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        prefix.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(f"{prefix}.pstats")
+        stats = pstats.Stats(profiler)
+        Path(f"{prefix}.collapsed").write_text("\n".join(collapsed_stacks(stats)) + "\n")